@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import re
 from logging.config import fileConfig
 
 from alembic import context
@@ -19,6 +20,15 @@ from app.models import Base  # noqa: E402
 target_metadata = Base.metadata
 
 
+# The runs partitions are created and dropped at runtime (app.partitions), not
+# by migrations; autogenerate should not try to drop them.
+_RUNS_PARTITION = re.compile(r"^runs_(\d{4}_\d{2}|default)$")
+
+
+def include_name(name, type_, parent_names) -> bool:
+    return not (type_ == "table" and _RUNS_PARTITION.match(name))
+
+
 def get_database_url() -> str:
     return os.getenv(
         "DATABASE_URL",
@@ -31,6 +41,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -50,7 +61,7 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(connection=connection, target_metadata=target_metadata, include_name=include_name)
 
         with context.begin_transaction():
             context.run_migrations()
@@ -0,0 +1,34 @@
+"""add keyset pagination indexes
+
+Revision ID: 20261018_0200
+Revises: 20260223_0200
+Create Date: 2026-10-18 02:00:00
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261018_0200"
+down_revision = "20260223_0200"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_prompts_created_at_id", "prompts", ["created_at", "id"], unique=False)
+    op.create_index("ix_runs_created_at_id", "runs", ["created_at", "id"], unique=False)
+    op.create_index(
+        "ix_runs_prompt_id_created_at_id", "runs", ["prompt_id", "created_at", "id"], unique=False
+    )
+    # The composite index above leads with prompt_id, so it covers FK lookups too.
+    op.drop_index("ix_runs_prompt_id", table_name="runs")
+
+
+def downgrade() -> None:
+    op.create_index("ix_runs_prompt_id", "runs", ["prompt_id"], unique=False)
+    op.drop_index("ix_runs_prompt_id_created_at_id", table_name="runs")
+    op.drop_index("ix_runs_created_at_id", table_name="runs")
+    op.drop_index("ix_prompts_created_at_id", table_name="prompts")
@@ -0,0 +1,43 @@
+"""add prompt max_version
+
+Revision ID: 20261018_0300
+Revises: 20261018_0200
+Create Date: 2026-10-18 03:00:00
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261018_0300"
+down_revision = "20261018_0200"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("prompts", sa.Column("max_version", sa.Integer(), nullable=True))
+
+    # Backfill: latest existing version per prompt.
+    op.execute(
+        """
+        UPDATE prompts p
+        SET max_version = v.max_version
+        FROM (
+          SELECT prompt_id, MAX(version) AS max_version
+          FROM prompt_versions
+          GROUP BY prompt_id
+        ) v
+        WHERE p.id = v.prompt_id
+        """
+    )
+    op.execute("UPDATE prompts SET max_version = 1 WHERE max_version IS NULL")
+
+    op.alter_column("prompts", "max_version", nullable=False, server_default="1")
+
+
+def downgrade() -> None:
+    op.drop_column("prompts", "max_version")
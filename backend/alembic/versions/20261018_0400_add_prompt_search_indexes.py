@@ -0,0 +1,79 @@
+"""add prompt search indexes
+
+Revision ID: 20261018_0400
+Revises: 20261018_0300
+Create Date: 2026-10-18 04:00:00
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20261018_0400"
+down_revision = "20261018_0300"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.create_index(
+        "ix_prompts_name_trgm",
+        "prompts",
+        ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_prompts_description_trgm",
+        "prompts",
+        ["description"],
+        postgresql_using="gin",
+        postgresql_ops={"description": "gin_trgm_ops"},
+    )
+
+    op.add_column(
+        "prompts",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('english', name), 'A') || "
+                "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index("ix_prompts_search_vector", "prompts", ["search_vector"], postgresql_using="gin")
+
+    op.add_column(
+        "prompt_versions",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('english', content)", persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_prompt_versions_search_vector",
+        "prompt_versions",
+        ["search_vector"],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_prompt_versions_search_vector", table_name="prompt_versions")
+    op.drop_column("prompt_versions", "search_vector")
+    op.drop_index("ix_prompts_search_vector", table_name="prompts")
+    op.drop_column("prompts", "search_vector")
+    op.drop_index("ix_prompts_description_trgm", table_name="prompts")
+    op.drop_index("ix_prompts_name_trgm", table_name="prompts")
+    # pg_trgm is left installed; other objects may depend on it.
@@ -0,0 +1,31 @@
+"""add partial index on queued runs
+
+Revision ID: 20261018_0500
+Revises: 20261018_0400
+Create Date: 2026-10-18 05:00:00
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261018_0500"
+down_revision = "20261018_0400"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_runs_queued_created_at",
+        "runs",
+        ["created_at"],
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_runs_queued_created_at", table_name="runs")
@@ -0,0 +1,62 @@
+"""add datasets and dataset_items
+
+Revision ID: 20261018_0600
+Revises: 20261018_0500
+Create Date: 2026-10-18 06:00:00
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20261018_0600"
+down_revision = "20261018_0500"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "datasets",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(length=200), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("item_count", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.UniqueConstraint("name", name="datasets_name_key"),
+    )
+    op.create_index("ix_datasets_created_at_id", "datasets", ["created_at", "id"])
+
+    op.create_table(
+        "dataset_items",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("dataset_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("input", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("expected", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("metadata", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["dataset_id"],
+            ["datasets.id"],
+            name="fk_dataset_items_dataset_id_datasets",
+            ondelete="CASCADE",
+        ),
+        sa.UniqueConstraint("dataset_id", "content_hash", name="uq_dataset_items_dataset_id_content_hash"),
+    )
+    op.create_index(
+        "ix_dataset_items_dataset_id_created_at_id",
+        "dataset_items",
+        ["dataset_id", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_dataset_items_dataset_id_created_at_id", table_name="dataset_items")
+    op.drop_table("dataset_items")
+    op.drop_index("ix_datasets_created_at_id", table_name="datasets")
+    op.drop_table("datasets")
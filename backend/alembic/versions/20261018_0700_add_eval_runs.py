@@ -0,0 +1,91 @@
+"""add eval_runs and link runs to eval runs / dataset items
+
+Revision ID: 20261018_0700
+Revises: 20261018_0600
+Create Date: 2026-10-18 07:00:00
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20261018_0700"
+down_revision = "20261018_0600"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "eval_runs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("prompt_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("prompt_version", sa.Integer(), nullable=False),
+        sa.Column("dataset_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("status", sa.String(length=32), server_default="running", nullable=False),
+        sa.Column("total", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("succeeded", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("failed", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.CheckConstraint("status in ('running','completed')", name="ck_eval_runs_status"),
+        sa.ForeignKeyConstraint(
+            ["prompt_id"],
+            ["prompts.id"],
+            name="fk_eval_runs_prompt_id_prompts",
+            ondelete="RESTRICT",
+        ),
+        sa.ForeignKeyConstraint(
+            ["dataset_id"],
+            ["datasets.id"],
+            name="fk_eval_runs_dataset_id_datasets",
+            ondelete="RESTRICT",
+        ),
+    )
+    op.create_index("ix_eval_runs_created_at_id", "eval_runs", ["created_at", "id"])
+
+    op.add_column("runs", sa.Column("eval_run_id", postgresql.UUID(as_uuid=True), nullable=True))
+    op.add_column("runs", sa.Column("dataset_item_id", postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_foreign_key(
+        "fk_runs_eval_run_id_eval_runs",
+        "runs",
+        "eval_runs",
+        ["eval_run_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.create_foreign_key(
+        "fk_runs_dataset_item_id_dataset_items",
+        "runs",
+        "dataset_items",
+        ["dataset_item_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+    op.create_index(
+        "ix_runs_eval_run_id_created_at_id",
+        "runs",
+        ["eval_run_id", "created_at", "id"],
+        postgresql_where=sa.text("eval_run_id IS NOT NULL"),
+    )
+    op.create_index(
+        "ix_runs_dataset_item_id",
+        "runs",
+        ["dataset_item_id"],
+        postgresql_where=sa.text("dataset_item_id IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_runs_dataset_item_id", table_name="runs")
+    op.drop_index("ix_runs_eval_run_id_created_at_id", table_name="runs")
+    op.drop_constraint("fk_runs_dataset_item_id_dataset_items", "runs", type_="foreignkey")
+    op.drop_constraint("fk_runs_eval_run_id_eval_runs", "runs", type_="foreignkey")
+    op.drop_column("runs", "dataset_item_id")
+    op.drop_column("runs", "eval_run_id")
+    op.drop_index("ix_eval_runs_created_at_id", table_name="eval_runs")
+    op.drop_table("eval_runs")
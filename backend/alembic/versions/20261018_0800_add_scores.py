@@ -0,0 +1,61 @@
+"""add run_scores and eval_run_scores
+
+Revision ID: 20261018_0800
+Revises: 20261018_0700
+Create Date: 2026-10-18 08:00:00
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20261018_0800"
+down_revision = "20261018_0700"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "run_scores",
+        sa.Column("eval_run_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("metric", sa.String(length=64), nullable=False),
+        sa.Column("run_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("eval_run_id", "metric", "run_id", name="run_scores_pkey"),
+        sa.ForeignKeyConstraint(
+            ["eval_run_id"],
+            ["eval_runs.id"],
+            name="fk_run_scores_eval_run_id_eval_runs",
+            ondelete="CASCADE",
+        ),
+    )
+
+    op.create_table(
+        "eval_run_scores",
+        sa.Column("eval_run_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("metric", sa.String(length=64), nullable=False),
+        sa.Column("params", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("mean", sa.Float(), nullable=False),
+        sa.Column("stddev", sa.Float(), nullable=False),
+        sa.Column("min", sa.Float(), nullable=False),
+        sa.Column("max", sa.Float(), nullable=False),
+        sa.Column("scored_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("eval_run_id", "metric", name="eval_run_scores_pkey"),
+        sa.ForeignKeyConstraint(
+            ["eval_run_id"],
+            ["eval_runs.id"],
+            name="fk_eval_run_scores_eval_run_id_eval_runs",
+            ondelete="CASCADE",
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("eval_run_scores")
+    op.drop_table("run_scores")
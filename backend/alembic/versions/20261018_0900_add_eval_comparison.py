@@ -0,0 +1,39 @@
+"""add prompt baseline_version and run_scores dataset_item_id
+
+Revision ID: 20261018_0900
+Revises: 20261018_0800
+Create Date: 2026-10-18 09:00:00
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20261018_0900"
+down_revision = "20261018_0800"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("prompts", sa.Column("baseline_version", sa.Integer(), nullable=True))
+
+    op.add_column("run_scores", sa.Column("dataset_item_id", postgresql.UUID(as_uuid=True), nullable=True))
+    # Backfill from the scored runs.
+    op.execute(
+        """
+        UPDATE run_scores s
+        SET dataset_item_id = r.dataset_item_id
+        FROM runs r
+        WHERE r.id = s.run_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("run_scores", "dataset_item_id")
+    op.drop_column("prompts", "baseline_version")
@@ -0,0 +1,54 @@
+"""add run result cache
+
+Revision ID: 20261018_1000
+Revises: 20261018_0900
+Create Date: 2026-10-18 10:00:00
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261018_1000"
+down_revision = "20261018_0900"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Adding a stored generated column rewrites runs once.
+    op.add_column(
+        "runs",
+        sa.Column(
+            "cache_key",
+            sa.LargeBinary(),
+            sa.Computed(
+                "sha256(uuid_send(prompt_id) || int4send(prompt_version) || coalesce(jsonb_send(input), ''))",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.add_column(
+        "runs", sa.Column("cache_hit", sa.Boolean(), server_default=sa.text("false"), nullable=False)
+    )
+
+    op.create_table(
+        "run_cache",
+        sa.Column("cache_key", sa.LargeBinary(), nullable=False),
+        sa.Column("runner", sa.String(length=64), nullable=False),
+        sa.Column("output", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("cache_key", "runner", name="run_cache_pkey"),
+    )
+    op.create_index("ix_run_cache_created_at", "run_cache", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_run_cache_created_at", table_name="run_cache")
+    op.drop_table("run_cache")
+    op.drop_column("runs", "cache_hit")
+    op.drop_column("runs", "cache_key")
@@ -0,0 +1,47 @@
+"""add spans
+
+Revision ID: 20261018_1100
+Revises: 20261018_1000
+Create Date: 2026-10-18 11:00:00
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20261018_1100"
+down_revision = "20261018_1000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "spans",
+        sa.Column("trace_id", sa.String(length=32), nullable=False),
+        sa.Column("span_id", sa.String(length=16), nullable=False),
+        sa.Column("parent_span_id", sa.String(length=16), nullable=True),
+        sa.Column("run_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("name", sa.Text(), nullable=False),
+        sa.Column("start_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("end_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("attributes", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.PrimaryKeyConstraint("trace_id", "span_id", name="spans_pkey"),
+        sa.ForeignKeyConstraint(
+            ["run_id"],
+            ["runs.id"],
+            name="fk_spans_run_id_runs",
+            ondelete="CASCADE",
+        ),
+        sa.CheckConstraint("end_time >= start_time", name="ck_spans_end_after_start"),
+    )
+    op.create_index("ix_spans_run_id_start_time", "spans", ["run_id", "start_time"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_spans_run_id_start_time", table_name="spans")
+    op.drop_table("spans")
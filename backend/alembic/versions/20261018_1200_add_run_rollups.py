@@ -0,0 +1,83 @@
+"""add run latency and error-rate rollups
+
+Revision ID: 20261018_1200
+Revises: 20261018_1100
+Create Date: 2026-10-18 12:00:00
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20261018_1200"
+down_revision = "20261018_1100"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "run_rollups",
+        sa.Column("prompt_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("granularity", sa.String(length=8), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("prompt_version", sa.Integer(), nullable=False),
+        sa.Column("runs", sa.Integer(), nullable=False),
+        sa.Column("failed", sa.Integer(), nullable=False),
+        sa.Column("latency_sum_ms", sa.Float(), nullable=False),
+        sa.Column("latency_max_ms", sa.Float(), nullable=False),
+        sa.Column("latency_histogram", postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.CheckConstraint("granularity in ('minute','hour','day')", name="ck_run_rollups_granularity"),
+        sa.ForeignKeyConstraint(
+            ["prompt_id"], ["prompts.id"], name="fk_run_rollups_prompt_id_prompts", ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint(
+            "prompt_id", "granularity", "bucket_start", "prompt_version", name="run_rollups_pkey"
+        ),
+    )
+
+    # Backfill from the runs already executed, with the histogram layout of
+    # app.rollups at the time of writing: 8 buckets per doubling, 178 buckets.
+    op.execute(
+        """
+        WITH finished AS (
+          SELECT prompt_id, prompt_version, g.granularity,
+                 date_trunc(g.granularity, finished_at, 'UTC') AS bucket_start, status,
+                 extract(epoch FROM finished_at - started_at)::float8 * 1000 AS ms
+          FROM runs CROSS JOIN (VALUES ('minute'), ('hour'), ('day')) AS g(granularity)
+          WHERE status IN ('succeeded', 'failed') AND NOT cache_hit
+            AND started_at IS NOT NULL AND finished_at IS NOT NULL
+        ), grouped AS (
+          SELECT prompt_id, granularity, bucket_start, prompt_version, count(*) AS runs,
+                 count(*) FILTER (WHERE status = 'failed') AS failed,
+                 coalesce(sum(ms) FILTER (WHERE status = 'succeeded'), 0) AS latency_sum_ms,
+                 coalesce(max(ms) FILTER (WHERE status = 'succeeded'), 0) AS latency_max_ms
+          FROM finished GROUP BY prompt_id, granularity, bucket_start, prompt_version
+        ), counts AS (
+          SELECT prompt_id, granularity, bucket_start, prompt_version,
+                 CASE WHEN ms < 1 THEN 0 ELSE least(floor(log(2, ms::numeric) * 8)::int + 1, 177) END AS idx,
+                 count(*) AS n
+          FROM finished WHERE status = 'succeeded'
+          GROUP BY 1, 2, 3, 4, 5
+        )
+        INSERT INTO run_rollups (prompt_id, granularity, bucket_start, prompt_version, runs, failed,
+                                 latency_sum_ms, latency_max_ms, latency_histogram)
+        SELECT g.prompt_id, g.granularity, g.bucket_start, g.prompt_version, g.runs, g.failed,
+               g.latency_sum_ms, g.latency_max_ms, array_agg(coalesce(c.n, 0)::int ORDER BY i.idx)
+        FROM grouped g
+        CROSS JOIN generate_series(0, 177) AS i(idx)
+        LEFT JOIN counts c
+          ON (c.prompt_id, c.granularity, c.bucket_start, c.prompt_version, c.idx)
+           = (g.prompt_id, g.granularity, g.bucket_start, g.prompt_version, i.idx)
+        GROUP BY g.prompt_id, g.granularity, g.bucket_start, g.prompt_version, g.runs, g.failed,
+                 g.latency_sum_ms, g.latency_max_ms
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("run_rollups")
@@ -0,0 +1,169 @@
+"""partition runs by month
+
+Revision ID: 20261018_1300
+Revises: 20261018_1200
+Create Date: 2026-10-18 13:00:00
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20261018_1300"
+down_revision = "20261018_1200"
+branch_labels = None
+depends_on = None
+
+# Everything but the generated cache_key, which the copy recomputes.
+_COPY_COLUMNS = (
+    "id, prompt_id, prompt_version, status, input, output, error, created_at, started_at, finished_at, "
+    "eval_run_id, dataset_item_id, cache_hit"
+)
+
+_INDEXES = (
+    ("ix_runs_created_at_id", ["created_at", "id"], None),
+    ("ix_runs_prompt_id_created_at_id", ["prompt_id", "created_at", "id"], None),
+    ("ix_runs_queued_created_at", ["created_at"], "status = 'queued'"),
+    ("ix_runs_eval_run_id_created_at_id", ["eval_run_id", "created_at", "id"], "eval_run_id IS NOT NULL"),
+    ("ix_runs_dataset_item_id", ["dataset_item_id"], "dataset_item_id IS NOT NULL"),
+)
+
+
+def _create_runs(partitioned: bool) -> None:
+    op.create_table(
+        "runs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("prompt_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("prompt_version", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=32), server_default="queued", nullable=False),
+        sa.Column("input", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("output", sa.Text(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("eval_run_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("dataset_item_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column(
+            "cache_key",
+            sa.LargeBinary(),
+            sa.Computed(
+                "sha256(uuid_send(prompt_id) || int4send(prompt_version) || coalesce(jsonb_send(input), ''))",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+        sa.Column("cache_hit", sa.Boolean(), server_default=sa.text("false"), nullable=False),
+        # A partitioned table's unique constraints must include the partition key.
+        sa.PrimaryKeyConstraint(*(["id", "created_at"] if partitioned else ["id"]), name="runs_pkey"),
+        sa.CheckConstraint("status in ('queued','running','succeeded','failed')", name="ck_runs_status"),
+        sa.ForeignKeyConstraint(
+            ["prompt_id"], ["prompts.id"], name="fk_runs_prompt_id_prompts", ondelete="RESTRICT"
+        ),
+        sa.ForeignKeyConstraint(
+            ["eval_run_id"], ["eval_runs.id"], name="fk_runs_eval_run_id_eval_runs", ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(
+            ["dataset_item_id"],
+            ["dataset_items.id"],
+            name="fk_runs_dataset_item_id_dataset_items",
+            ondelete="SET NULL",
+        ),
+        **({"postgresql_partition_by": "RANGE (created_at)"} if partitioned else {}),
+    )
+
+
+def _create_indexes() -> None:
+    # Indexes are built after the copy; on the partitioned table each one
+    # cascades to every partition.
+    for name, columns, where in _INDEXES:
+        op.create_index(name, "runs", columns, postgresql_where=sa.text(where) if where else None)
+
+
+def _set_aside_runs() -> None:
+    op.drop_constraint("fk_spans_run_id_runs", "spans", type_="foreignkey")
+    op.rename_table("runs", "runs_old")
+    # Free the schema-wide index names for the new table.
+    op.drop_constraint("runs_pkey", "runs_old", type_="primary")
+    for name, _, _ in _INDEXES:
+        op.drop_index(name, table_name="runs_old")
+
+
+def upgrade() -> None:
+    # The data is copied into a new partitioned table: a large runs table makes
+    # this a long, write-blocking migration. Where that is not acceptable, the
+    # alternative is to attach the existing table as a single partition
+    # covering everything up to the next month and let retention age it out.
+    _set_aside_runs()
+    _create_runs(partitioned=True)
+
+    # Month boundaries in UTC, whatever the session's time zone.
+    op.execute("SET LOCAL TIME ZONE 'UTC'")
+    op.execute(
+        """
+        DO $$
+        DECLARE
+          month timestamptz;
+        BEGIN
+          FOR month IN
+            SELECT generate_series(
+              date_trunc('month', least(coalesce((SELECT min(created_at) FROM runs_old), now()), now())),
+              date_trunc('month', now()) + interval '2 months',
+              interval '1 month'
+            )
+          LOOP
+            EXECUTE format(
+              'CREATE TABLE %I PARTITION OF runs FOR VALUES FROM (%L) TO (%L)',
+              'runs_' || to_char(month, 'YYYY_MM'), month, month + interval '1 month'
+            );
+          END LOOP;
+        END
+        $$
+        """
+    )
+    op.execute("CREATE TABLE runs_default PARTITION OF runs DEFAULT")
+    op.execute(f"INSERT INTO runs ({_COPY_COLUMNS}) SELECT {_COPY_COLUMNS} FROM runs_old")
+    op.drop_table("runs_old")
+    _create_indexes()
+
+    # No unique constraint on runs.id alone can exist any more, so spans can
+    # no longer reference it; a trigger keeps deleting a run's spans with it.
+    # Dropped partitions do not fire it: retention deletes their spans itself.
+    op.execute(
+        """
+        CREATE FUNCTION runs_delete_spans() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+          DELETE FROM spans s USING deleted d WHERE s.run_id = d.id;
+          RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER runs_delete_spans AFTER DELETE ON runs "
+        "REFERENCING OLD TABLE AS deleted FOR EACH STATEMENT EXECUTE FUNCTION runs_delete_spans()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER runs_delete_spans ON runs")
+    op.execute("DROP FUNCTION runs_delete_spans()")
+    op.rename_table("runs", "runs_old")
+    op.drop_constraint("runs_pkey", "runs_old", type_="primary")
+    for name, _, _ in _INDEXES:
+        op.drop_index(name, table_name="runs_old")
+
+    _create_runs(partitioned=False)
+    # Runs of partitions already dropped by retention are gone; so are their
+    # spans.
+    op.execute(f"INSERT INTO runs ({_COPY_COLUMNS}) SELECT {_COPY_COLUMNS} FROM runs_old")
+    op.execute("DROP TABLE runs_old")  # and its partitions
+    _create_indexes()
+    op.execute("DELETE FROM spans s WHERE NOT EXISTS (SELECT 1 FROM runs r WHERE r.id = s.run_id)")
+    op.create_foreign_key(
+        "fk_spans_run_id_runs", "spans", "runs", ["run_id"], ["id"], ondelete="CASCADE"
+    )
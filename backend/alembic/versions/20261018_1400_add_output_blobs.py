@@ -0,0 +1,32 @@
+"""add blob-stored run outputs
+
+Revision ID: 20261018_1400
+Revises: 20261018_1300
+Create Date: 2026-10-18 14:00:00
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261018_1400"
+down_revision = "20261018_1300"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Nullable columns without defaults: catalog-only, no rewrite of runs.
+    for table in ("runs", "run_cache"):
+        op.add_column(table, sa.Column("output_blob_key", sa.String(length=64), nullable=True))
+        op.add_column(table, sa.Column("output_size", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    # Spilled outputs keep only their preview.
+    for table in ("runs", "run_cache"):
+        op.drop_column(table, "output_size")
+        op.drop_column(table, "output_blob_key")
@@ -0,0 +1,39 @@
+"""add streamed run output chunks and first_token_at
+
+Revision ID: 20261018_1500
+Revises: 20261018_1400
+Create Date: 2026-10-18 15:00:00
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20261018_1500"
+down_revision = "20261018_1400"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("runs", sa.Column("first_token_at", sa.DateTime(timezone=True), nullable=True))
+    # Unlogged: chunks only live while their run executes, and the final output
+    # is written to runs, so they are not worth WAL.
+    op.create_table(
+        "run_output_chunks",
+        sa.Column("run_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("start", sa.Integer(), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("run_id", "start", name="run_output_chunks_pkey"),
+        prefixes=["UNLOGGED"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("run_output_chunks")
+    op.drop_column("runs", "first_token_at")
@@ -0,0 +1,55 @@
+"""add scheduler indexes on queued and running runs, and queue wait rollups
+
+Revision ID: 20261018_1600
+Revises: 20261018_1500
+Create Date: 2026-10-18 16:00:00
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20261018_1600"
+down_revision = "20261018_1500"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_runs_queued_prompt_id_created_at",
+        "runs",
+        ["prompt_id", "created_at"],
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+    op.create_index(
+        "ix_runs_running_prompt_id",
+        "runs",
+        ["prompt_id"],
+        postgresql_where=sa.text("status = 'running'"),
+    )
+    # Constant defaults: existing rollups are not rewritten, and count no waits
+    # (app.rollups.LATENCY_BUCKETS = 178 buckets at the time of writing).
+    op.add_column("run_rollups", sa.Column("wait_sum_ms", sa.Float(), server_default="0", nullable=False))
+    op.add_column("run_rollups", sa.Column("wait_max_ms", sa.Float(), server_default="0", nullable=False))
+    op.add_column(
+        "run_rollups",
+        sa.Column(
+            "wait_histogram",
+            postgresql.ARRAY(sa.Integer()),
+            server_default=sa.text("array_fill(0, ARRAY[178])"),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("run_rollups", "wait_histogram")
+    op.drop_column("run_rollups", "wait_max_ms")
+    op.drop_column("run_rollups", "wait_sum_ms")
+    op.drop_index("ix_runs_running_prompt_id", table_name="runs")
+    op.drop_index("ix_runs_queued_prompt_id_created_at", table_name="runs")
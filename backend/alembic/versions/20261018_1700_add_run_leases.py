@@ -0,0 +1,43 @@
+"""add run claim attempts and leases, and an index for the lease sweep
+
+Revision ID: 20261018_1700
+Revises: 20261018_1600
+Create Date: 2026-10-18 17:00:00
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261018_1700"
+down_revision = "20261018_1600"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("runs", sa.Column("attempts", sa.Integer(), server_default=sa.text("0"), nullable=False))
+    op.add_column("runs", sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True))
+    # Runs running now were claimed once, by workers that predate leases and will
+    # not renew one: they get a default lease (WORKER_LEASE_SECONDS = 60) to finish
+    # in, after which the sweep takes them back. Finished runs keep 0 attempts
+    # rather than rewriting the whole table.
+    op.execute(
+        "UPDATE runs SET attempts = 1, lease_expires_at = now() + interval '60 seconds' "
+        "WHERE status = 'running'"
+    )
+    op.create_index(
+        "ix_runs_running_lease_expires_at",
+        "runs",
+        ["lease_expires_at"],
+        postgresql_where=sa.text("status = 'running'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_runs_running_lease_expires_at", table_name="runs")
+    op.drop_column("runs", "lease_expires_at")
+    op.drop_column("runs", "attempts")
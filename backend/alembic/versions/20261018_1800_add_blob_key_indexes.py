@@ -0,0 +1,34 @@
+"""add indexes on output blob keys for the blob sweep
+
+Revision ID: 20261018_1800
+Revises: 20261018_1700
+Create Date: 2026-10-18 18:00:00
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261018_1800"
+down_revision = "20261018_1700"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Partial: only spilled outputs have a blob key, so the indexes stay small.
+    for table in ("runs", "run_cache"):
+        op.create_index(
+            f"ix_{table}_output_blob_key",
+            table,
+            ["output_blob_key"],
+            postgresql_where=sa.text("output_blob_key IS NOT NULL"),
+        )
+
+
+def downgrade() -> None:
+    for table in ("runs", "run_cache"):
+        op.drop_index(f"ix_{table}_output_blob_key", table_name=table)
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from psycopg.types.json import Jsonb
+from pydantic import ValidationError
+from sqlalchemy import select, text, update
+from sqlalchemy.orm import Session
+
+from app.api.pagination import paginate, set_next_cursor
+from app.db import contains_nul, get_db
+from app.models import Dataset, DatasetItem
+from app.schemas.dataset import (
+    DatasetCreateIn,
+    DatasetItemIn,
+    DatasetItemOut,
+    DatasetOut,
+    DatasetUploadLineError,
+    DatasetUploadOut,
+)
+
+router = APIRouter(prefix="/datasets", tags=["datasets"])
+
+# An upload is ingested in batches bounded by both line count and raw bytes, so
+# memory stays flat however large the body is. Each batch is one transaction.
+UPLOAD_BATCH_MAX_LINES = 5000
+UPLOAD_BATCH_MAX_BYTES = 8 << 20
+MAX_LINE_BYTES = 1 << 20
+MAX_REPORTED_ERRORS = 100
+NUL_DETAIL = "strings cannot contain NUL (\\u0000)"
+
+
+@router.post("", response_model=DatasetOut, status_code=status.HTTP_201_CREATED)
+def create_dataset(payload: DatasetCreateIn, db: Session = Depends(get_db)):
+    existing = db.scalar(select(Dataset.id).where(Dataset.name == payload.name))
+    if existing is not None:
+        raise HTTPException(status_code=409, detail="dataset name already exists")
+
+    dataset = Dataset(name=payload.name, description=payload.description)
+    db.add(dataset)
+    db.commit()
+    db.refresh(dataset)
+    return dataset
+
+
+@router.get("", response_model=list[DatasetOut])
+def list_datasets(
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=200),
+    offset: int = Query(default=0, ge=0),
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+):
+    stmt = paginate(
+        select(Dataset), Dataset.created_at, Dataset.id, limit=limit, offset=offset, cursor=cursor
+    )
+    datasets = list(db.scalars(stmt).all())
+    return set_next_cursor(response, datasets, limit, key=lambda d: (d.created_at, d.id))
+
+
+def _require_dataset(dataset: Dataset | None) -> Dataset:
+    if dataset is None:
+        raise HTTPException(status_code=404, detail="dataset not found")
+    return dataset
+
+
+@router.get("/{dataset_id}", response_model=DatasetOut)
+def get_dataset(dataset_id: uuid.UUID, db: Session = Depends(get_db)):
+    return _require_dataset(db.get(Dataset, dataset_id))
+
+
+@router.get("/{dataset_id}/items", response_model=list[DatasetItemOut])
+def list_dataset_items(
+    dataset_id: uuid.UUID,
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=200),
+    offset: int = Query(default=0, ge=0),
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+):
+    _require_dataset(db.get(Dataset, dataset_id))
+    stmt = paginate(
+        select(DatasetItem).where(DatasetItem.dataset_id == dataset_id),
+        DatasetItem.created_at,
+        DatasetItem.id,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+    )
+    items = list(db.scalars(stmt).all())
+    return set_next_cursor(response, items, limit, key=lambda i: (i.created_at, i.id))
+
+
+def content_hash(item: DatasetItemIn) -> str:
+    """sha256 of the canonical JSON of (input, expected); key order and whitespace do not matter."""
+
+    canonical = json.dumps(
+        {"input": item.input, "expected": item.expected},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+async def _read_lines(body: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, bytes | None]]:
+    """Split a streamed body into (line_number, line) pairs.
+
+    A line longer than MAX_LINE_BYTES is yielded as None and never buffered in
+    full. Only this cheap splitting runs on the event loop; parsing happens in
+    the threadpool with the insert.
+    """
+
+    buf = bytearray()
+    lineno = 0
+    too_long = False
+
+    async for chunk in body:
+        start = 0
+        while (nl := chunk.find(b"\n", start)) != -1:
+            lineno += 1
+            if not too_long:
+                buf += chunk[start:nl]
+            yield lineno, None if too_long or len(buf) > MAX_LINE_BYTES else bytes(buf)
+            buf.clear()
+            too_long = False
+            start = nl + 1
+
+        if not too_long:
+            buf += chunk[start:]
+            if len(buf) > MAX_LINE_BYTES:
+                buf.clear()
+                too_long = True
+
+    if buf or too_long:
+        yield lineno + 1, None if too_long else bytes(buf)
+
+
+@dataclass
+class _UploadStats:
+    lines: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    error_count: int = 0
+    errors: list[DatasetUploadLineError] = field(default_factory=list)
+    item_count: int = 0
+
+    def error(self, line: int, detail: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(DatasetUploadLineError(line=line, detail=detail))
+
+
+def _validation_detail(e: ValidationError) -> str:
+    err = e.errors(include_url=False)[0]
+    loc = ".".join(str(part) for part in err["loc"])
+    return f"{loc}: {err['msg']}" if loc else err["msg"]
+
+
+def _ingest_batch(
+    db: Session, dataset_id: uuid.UUID, lines: list[tuple[int, bytes | None]], stats: _UploadStats
+) -> None:
+    """Validate one batch of raw lines and insert the valid items, deduped by content hash.
+
+    Rows are COPYed into a per-transaction staging table and moved over with
+    INSERT ... ON CONFLICT DO NOTHING, which COPY alone cannot express. This
+    also drops duplicates within the batch itself.
+    """
+
+    rows = []
+    for lineno, raw in lines:
+        if raw is None:
+            stats.error(lineno, f"line exceeds {MAX_LINE_BYTES} bytes")
+            continue
+        if not raw.strip():
+            continue
+        try:
+            item = DatasetItemIn.model_validate_json(raw)
+        except ValidationError as e:
+            stats.error(lineno, _validation_detail(e))
+            continue
+        if contains_nul([item.input, item.expected, item.metadata]):
+            stats.error(lineno, NUL_DETAIL)
+            continue
+        rows.append(
+            (
+                uuid.uuid4(),
+                content_hash(item),
+                Jsonb(item.input),
+                Jsonb(item.expected) if item.expected is not None else None,
+                Jsonb(item.metadata) if item.metadata is not None else None,
+            )
+        )
+
+    if not rows:
+        return
+
+    db.execute(
+        text(
+            "CREATE TEMP TABLE dataset_items_stage "
+            "(id uuid, content_hash text, input jsonb, expected jsonb, metadata jsonb) ON COMMIT DROP"
+        )
+    )
+    cursor = db.connection().connection.driver_connection.cursor()
+    with cursor.copy(
+        "COPY dataset_items_stage (id, content_hash, input, expected, metadata) FROM STDIN"
+    ) as copy:
+        for row in rows:
+            copy.write_row(row)
+
+    inserted = db.execute(
+        text(
+            "INSERT INTO dataset_items (id, dataset_id, content_hash, input, expected, metadata) "
+            "SELECT id, :dataset_id, content_hash, input, expected, metadata FROM dataset_items_stage "
+            "ON CONFLICT (dataset_id, content_hash) DO NOTHING"
+        ),
+        {"dataset_id": dataset_id},
+    ).rowcount
+    stats.item_count = db.execute(
+        update(Dataset)
+        .where(Dataset.id == dataset_id)
+        .values(item_count=Dataset.item_count + inserted)
+        .returning(Dataset.item_count)
+    ).scalar_one()
+    db.commit()
+
+    stats.inserted += inserted
+    stats.duplicates += len(rows) - inserted
+
+
+@router.post("/{dataset_id}/items", response_model=DatasetUploadOut)
+async def upload_dataset_items(dataset_id: uuid.UUID, request: Request, db: Session = Depends(get_db)):
+    """Ingest a JSONL body (one `{"input", "expected"?, "metadata"?}` object per line).
+
+    The body is consumed as a stream and committed batch by batch; invalid lines
+    are reported (by 1-based line number) and skipped. Items already in the
+    dataset are skipped as duplicates, so re-sending an upload that failed
+    halfway is safe.
+    """
+
+    dataset = _require_dataset(await run_in_threadpool(db.get, Dataset, dataset_id))
+    stats = _UploadStats(item_count=dataset.item_count)
+    # Don't sit idle-in-transaction while the client is still sending the body.
+    await run_in_threadpool(db.rollback)
+
+    batch: list[tuple[int, bytes | None]] = []
+    batch_bytes = 0
+    async for lineno, raw in _read_lines(request.stream()):
+        stats.lines = lineno
+        batch.append((lineno, raw))
+        batch_bytes += len(raw) if raw is not None else 0
+        if len(batch) >= UPLOAD_BATCH_MAX_LINES or batch_bytes >= UPLOAD_BATCH_MAX_BYTES:
+            await run_in_threadpool(_ingest_batch, db, dataset_id, batch, stats)
+            batch, batch_bytes = [], 0
+
+    if batch:
+        await run_in_threadpool(_ingest_batch, db, dataset_id, batch, stats)
+
+    return DatasetUploadOut(
+        lines=stats.lines,
+        inserted=stats.inserted,
+        duplicates=stats.duplicates,
+        error_count=stats.error_count,
+        errors=stats.errors,
+        item_count=stats.item_count,
+    )
@@ -0,0 +1,373 @@
+from __future__ import annotations
+
+import uuid
+
+import numpy as np
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import String, cast, delete, func, insert, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, aliased
+
+from app import blobs, run_cache
+from app.api.pagination import paginate, set_next_cursor
+from app.db import get_db
+from app.metrics import MetricError, compare_paired, score, summarize
+from app.models import Dataset, DatasetItem, EvalRun, EvalRunScore, Prompt, PromptVersion, Run, RunScore
+from app.schemas.eval_run import (
+    EvalRunCompareOut,
+    EvalRunCreateIn,
+    EvalRunOut,
+    EvalRunScoreIn,
+    EvalRunScoreOut,
+    MetricComparisonOut,
+)
+
+router = APIRouter(prefix="/eval-runs", tags=["eval-runs"])
+
+
+@router.post("", response_model=EvalRunOut, status_code=status.HTTP_201_CREATED)
+def create_eval_run(payload: EvalRunCreateIn, db: Session = Depends(get_db)):
+    """Queue one run per dataset item against a prompt version.
+
+    The runs are generated server-side with a single INSERT ... SELECT from
+    dataset_items in the same transaction as the eval run, so a 100k-item
+    suite is one round-trip and workers never see a partially created eval.
+    Items whose (prompt version, input) has a cached result are completed in
+    the same transaction and counted as succeeded; re-running an unchanged
+    suite executes nothing. Progress is then tracked on the eval run's
+    counters (see GET).
+    """
+
+    prompt = db.scalar(select(Prompt).where(Prompt.name == payload.prompt_name))
+    if prompt is None:
+        raise HTTPException(status_code=404, detail="prompt not found")
+
+    version = payload.version if payload.version is not None else prompt.active_version
+    exists = db.scalar(
+        select(PromptVersion.id).where(
+            PromptVersion.prompt_id == prompt.id, PromptVersion.version == version
+        )
+    )
+    if exists is None:
+        raise HTTPException(status_code=404, detail="prompt version not found")
+
+    dataset = db.get(Dataset, payload.dataset_id)
+    if dataset is None:
+        raise HTTPException(status_code=404, detail="dataset not found")
+
+    eval_run = EvalRun(prompt_id=prompt.id, prompt_version=version, dataset_id=dataset.id, status="running")
+    db.add(eval_run)
+    db.flush()  # assign eval_run.id
+
+    fan_out = insert(Run).from_select(
+        ["id", "prompt_id", "prompt_version", "status", "input", "eval_run_id", "dataset_item_id"],
+        select(
+            func.gen_random_uuid(),
+            literal(prompt.id),
+            literal(version),
+            literal("queued"),
+            DatasetItem.input,
+            literal(eval_run.id),
+            DatasetItem.id,
+        ).where(DatasetItem.dataset_id == dataset.id),
+    )
+    # SQLAlchemy only keeps rowcount for UPDATE/DELETE unless asked to.
+    total = db.execute(fan_out.execution_options(preserve_rowcount=True)).rowcount
+    if total == 0:
+        db.rollback()
+        raise HTTPException(status_code=422, detail="dataset has no items")
+
+    eval_run.total = total
+    eval_run.succeeded = run_cache.serve_queued(db, Run.eval_run_id == eval_run.id)
+    if eval_run.succeeded == total:
+        eval_run.status = "completed"
+        eval_run.finished_at = func.now()
+    db.commit()
+    db.refresh(eval_run)
+    return eval_run
+
+
+@router.get("", response_model=list[EvalRunOut])
+def list_eval_runs(
+    response: Response,
+    prompt_id: uuid.UUID | None = None,
+    dataset_id: uuid.UUID | None = None,
+    limit: int = Query(default=50, ge=1, le=200),
+    offset: int = Query(default=0, ge=0),
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+):
+    stmt = select(EvalRun)
+    if prompt_id is not None:
+        stmt = stmt.where(EvalRun.prompt_id == prompt_id)
+    if dataset_id is not None:
+        stmt = stmt.where(EvalRun.dataset_id == dataset_id)
+    stmt = paginate(stmt, EvalRun.created_at, EvalRun.id, limit=limit, offset=offset, cursor=cursor)
+    eval_runs = list(db.scalars(stmt).all())
+    return set_next_cursor(response, eval_runs, limit, key=lambda e: (e.created_at, e.id))
+
+
+def _require_eval_run(eval_run: EvalRun | None) -> EvalRun:
+    if eval_run is None:
+        raise HTTPException(status_code=404, detail="eval run not found")
+    return eval_run
+
+
+@router.get("/{eval_run_id}", response_model=EvalRunOut)
+def get_eval_run(eval_run_id: uuid.UUID, db: Session = Depends(get_db)):
+    """Eval run with its progress counters; its runs are at GET /api/runs?eval_run_id=."""
+
+    return _require_eval_run(db.get(EvalRun, eval_run_id))
+
+
+_COPY_RUN_SCORES = "COPY run_scores (eval_run_id, metric, run_id, dataset_item_id, score) FROM STDIN"
+_COPY_CHUNK_ROWS = 50_000
+
+
+def _copy_run_scores(
+    db: Session,
+    eval_run_id: uuid.UUID,
+    metric: str,
+    run_ids: list[str],
+    item_ids: list[str],
+    scores: list[float],
+) -> None:
+    """COPY one metric's scores in text format.
+
+    Lines are formatted chunk by chunk with map/join, which is several times
+    cheaper than a write_row call per score at a million rows. Nothing needs
+    escaping: the ids are uuids (item ids already \\N when NULL) and metric
+    names come from the registry.
+    """
+
+    line = f"{eval_run_id}\t{metric}\t{{}}\t{{}}\t{{!r}}\n".format
+    cursor = db.connection().connection.driver_connection.cursor()
+    with cursor.copy(_COPY_RUN_SCORES) as copy:
+        for start in range(0, len(run_ids), _COPY_CHUNK_ROWS):
+            end = start + _COPY_CHUNK_ROWS
+            copy.write("".join(map(line, run_ids[start:end], item_ids[start:end], scores[start:end])))
+
+
+@router.post("/{eval_run_id}/scores", response_model=list[EvalRunScoreOut])
+def score_eval_run(eval_run_id: uuid.UUID, payload: EvalRunScoreIn, db: Session = Depends(get_db)):
+    """Score every run of a completed eval run against its dataset item's `expected`.
+
+    Outputs and expected values are loaded once as two columns and each metric
+    scores the whole column in one vectorized pass (see app.metrics). Per-run
+    scores are COPYed into run_scores and the aggregate is upserted into
+    eval_run_scores in the same transaction; scoring a metric again replaces
+    both. Failed runs score 0.
+    """
+
+    eval_run = _require_eval_run(db.get(EvalRun, eval_run_id))
+    if eval_run.status != "completed":
+        raise HTTPException(status_code=409, detail="eval run is still running")
+
+    # `#>> '{}'` yields JSON strings unquoted and anything else as JSON text,
+    # which is what the metrics compare against, without decoding in Python.
+    rows = db.execute(
+        select(
+            cast(Run.id, String),
+            # Formatted for COPY text: NULL (item deleted since) is \N.
+            func.coalesce(cast(Run.dataset_item_id, String), literal_column("'\\N'")),
+            Run.output,
+            DatasetItem.expected.op("#>>")(literal_column("'{}'")),
+            Run.output_blob_key,
+        )
+        .outerjoin(DatasetItem, DatasetItem.id == Run.dataset_item_id)
+        .where(Run.eval_run_id == eval_run_id)
+    ).all()
+    run_ids, item_ids, outputs, expected, blob_keys = (
+        (list(col) for col in zip(*rows)) if rows else ([], [], [], [], [])
+    )
+    # Outputs spilled to the blob store are scored in full, not by their preview.
+    if any(blob_keys):
+        store = blobs.get_blob_store()
+        outputs = [blobs.read_text(key, store) if key else output for output, key in zip(outputs, blob_keys)]
+
+    results = []
+    for spec in payload.metrics:
+        try:
+            results.append((spec, score(spec.name, outputs, expected, spec.params)))
+        except MetricError as e:
+            raise HTTPException(status_code=422, detail=str(e)) from e
+
+    names = [spec.name for spec in payload.metrics]
+    db.execute(delete(RunScore).where(RunScore.eval_run_id == eval_run_id, RunScore.metric.in_(names)))
+    for spec, scores in results:
+        _copy_run_scores(db, eval_run_id, spec.name, run_ids, item_ids, scores.tolist())
+
+    for spec, scores in results:
+        summary = summarize(scores)
+        stmt = pg_insert(EvalRunScore).values(
+            eval_run_id=eval_run_id, metric=spec.name, params=spec.params, **summary
+        )
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[EvalRunScore.eval_run_id, EvalRunScore.metric],
+                set_=dict(
+                    params=stmt.excluded.params,
+                    scored_at=func.now(),
+                    **{k: stmt.excluded[k] for k in summary},
+                ),
+            )
+        )
+    db.commit()
+
+    return db.scalars(
+        select(EvalRunScore)
+        .where(EvalRunScore.eval_run_id == eval_run_id, EvalRunScore.metric.in_(names))
+        .order_by(EvalRunScore.metric)
+    ).all()
+
+
+@router.get("/{eval_run_id}/scores", response_model=list[EvalRunScoreOut])
+def list_eval_run_scores(eval_run_id: uuid.UUID, db: Session = Depends(get_db)):
+    _require_eval_run(db.get(EvalRun, eval_run_id))
+    return db.scalars(
+        select(EvalRunScore).where(EvalRunScore.eval_run_id == eval_run_id).order_by(EvalRunScore.metric)
+    ).all()
+
+
+def _baseline_eval_run(candidate: EvalRun, db: Session) -> EvalRun:
+    """Latest completed eval run of the prompt's baseline version on the candidate's dataset."""
+
+    baseline_version = db.scalar(select(Prompt.baseline_version).where(Prompt.id == candidate.prompt_id))
+    if baseline_version is None:
+        raise HTTPException(
+            status_code=422, detail="prompt has no baseline version; pass baseline_eval_run_id"
+        )
+    baseline = db.scalar(
+        select(EvalRun)
+        .where(
+            EvalRun.prompt_id == candidate.prompt_id,
+            EvalRun.prompt_version == baseline_version,
+            EvalRun.dataset_id == candidate.dataset_id,
+            EvalRun.status == "completed",
+            EvalRun.id != candidate.id,
+        )
+        .order_by(EvalRun.created_at.desc(), EvalRun.id.desc())
+        .limit(1)
+    )
+    if baseline is None:
+        raise HTTPException(status_code=404, detail="no completed eval run of the baseline version")
+    return baseline
+
+
+def _paired_scores(
+    db: Session, candidate_id: uuid.UUID, baseline_id: uuid.UUID, metrics: list[str]
+) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """Per metric, the candidate and baseline scores of each dataset item scored in both runs.
+
+    Scores are paired on the dataset_item_id stored with them, one join of
+    run_scores with itself. Items only one run covers (added to the dataset
+    after the other ran, or deleted before it was scored) are left out. Each
+    metric comes back as one row of two arrays rather than a row per item.
+    """
+
+    cand, base = aliased(RunScore), aliased(RunScore)
+    rows = db.execute(
+        select(cand.metric, func.array_agg(cand.score), func.array_agg(base.score))
+        .join(
+            base,
+            (base.eval_run_id == baseline_id)
+            & (base.metric == cand.metric)
+            & (base.dataset_item_id == cand.dataset_item_id),
+        )
+        .where(cand.eval_run_id == candidate_id, cand.metric.in_(metrics))
+        .group_by(cand.metric)
+    ).all()
+    # Both aggregates of a group consume its rows in the same order, so
+    # position i of the two arrays is the same item.
+    paired = {
+        metric: (np.array(cand_scores, dtype=np.float64), np.array(base_scores, dtype=np.float64))
+        for metric, cand_scores, base_scores in rows
+    }
+    empty = np.zeros(0)
+    return {metric: paired.get(metric, (empty, empty)) for metric in metrics}
+
+
+@router.get("/{eval_run_id}/compare", response_model=EvalRunCompareOut)
+def compare_eval_runs(
+    eval_run_id: uuid.UUID,
+    baseline_eval_run_id: uuid.UUID | None = None,
+    metric: list[str] | None = Query(default=None),
+    max_drop: float = Query(default=0.0, ge=0.0, le=1.0),
+    confidence: float = Query(default=0.95, gt=0.5, lt=1.0),
+    resamples: int = Query(default=2000, ge=100, le=20_000),
+    db: Session = Depends(get_db),
+):
+    """Compare an eval run's scores with a baseline eval run over the same dataset items.
+
+    The baseline is `baseline_eval_run_id`, or else the latest completed eval
+    run of the prompt's baseline version (POST /api/prompts/{id}/baseline) on
+    the same dataset. Every metric scored on both runs is compared, or just
+    the `metric` ones.
+
+    Per metric: the mean paired delta (candidate - baseline), a bootstrap
+    confidence interval for it, and a paired sign-flip test p-value (see
+    app.metrics.compare). A metric has regressed when it dropped by more than
+    `max_drop` and the drop is significant (p < 1 - confidence); improved is
+    the mirror image. The verdict is "fail" if any metric regressed, so CI can
+    gate on it.
+    """
+
+    candidate = _require_eval_run(db.get(EvalRun, eval_run_id))
+    if baseline_eval_run_id is None:
+        baseline = _baseline_eval_run(candidate, db)
+    else:
+        baseline = _require_eval_run(db.get(EvalRun, baseline_eval_run_id))
+    if baseline.id == candidate.id:
+        raise HTTPException(status_code=422, detail="cannot compare an eval run with itself")
+    if candidate.status != "completed" or baseline.status != "completed":
+        raise HTTPException(status_code=409, detail="both eval runs must be completed")
+    if baseline.dataset_id != candidate.dataset_id:
+        raise HTTPException(status_code=422, detail="eval runs are over different datasets")
+
+    params = {
+        (s.eval_run_id, s.metric): s.params
+        for s in db.scalars(
+            select(EvalRunScore).where(EvalRunScore.eval_run_id.in_([candidate.id, baseline.id]))
+        )
+    }
+    scored = {m for e, m in params if e == candidate.id} & {m for e, m in params if e == baseline.id}
+    if metric:
+        missing = sorted(set(metric) - scored)
+        if missing:
+            raise HTTPException(
+                status_code=422, detail=f"not scored on both eval runs: {', '.join(missing)}"
+            )
+        names = sorted(set(metric))
+    else:
+        names = sorted(scored)
+    if not names:
+        raise HTTPException(status_code=422, detail="no metric is scored on both eval runs")
+    differing = [m for m in names if params[(candidate.id, m)] != params[(baseline.id, m)]]
+    if differing:
+        raise HTTPException(
+            status_code=422, detail=f"scored with different params: {', '.join(differing)}"
+        )
+
+    alpha = 1 - confidence
+    comparisons = []
+    for name, (cand, base) in _paired_scores(db, candidate.id, baseline.id, names).items():
+        result = compare_paired(cand, base, confidence=confidence, resamples=resamples)
+        significant = result.p_value < alpha
+        if significant and result.delta < -max_drop:
+            outcome = "regressed"
+        elif significant and result.delta > max_drop:
+            outcome = "improved"
+        else:
+            outcome = "unchanged"
+        comparisons.append(MetricComparisonOut(metric=name, status=outcome, **vars(result)))
+
+    return EvalRunCompareOut(
+        verdict="fail" if any(c.status == "regressed" for c in comparisons) else "pass",
+        candidate_eval_run_id=candidate.id,
+        baseline_eval_run_id=baseline.id,
+        dataset_id=candidate.dataset_id,
+        confidence=confidence,
+        max_drop=max_drop,
+        metrics=comparisons,
+    )
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException, Response
+from sqlalchemy import DateTime, Select, literal, tuple_
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import InstrumentedAttribute
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, id_: uuid.UUID) -> str:
+    raw = json.dumps({"c": created_at.isoformat(), "i": str(id_)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(raw["c"]), uuid.UUID(raw["i"])
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=422, detail="invalid cursor") from e
+
+
+def paginate(
+    stmt: Select,
+    created_at: InstrumentedAttribute,
+    id_: InstrumentedAttribute,
+    *,
+    limit: int,
+    offset: int,
+    cursor: str | None,
+) -> Select:
+    """Apply newest-first ordering plus keyset (cursor) or offset paging.
+
+    Rows are ordered by (created_at DESC, id DESC) in both modes so the id acts
+    as a tie-breaker. One extra row is fetched so `set_next_cursor` can tell
+    whether another page exists.
+    """
+
+    stmt = stmt.order_by(created_at.desc(), id_.desc()).limit(limit + 1)
+
+    if cursor is None:
+        return stmt.offset(offset)
+
+    if offset != 0:
+        raise HTTPException(status_code=422, detail="cursor and offset are mutually exclusive")
+
+    c_created_at, c_id = decode_cursor(cursor)
+    # Row-value comparison lets Postgres seek straight into the (created_at, id) index.
+    return stmt.where(
+        tuple_(created_at, id_)
+        < tuple_(literal(c_created_at, DateTime(timezone=True)), literal(c_id, UUID(as_uuid=True)))
+    )
+
+
+def set_next_cursor(response: Response, rows: list, limit: int, key) -> list:
+    """Trim the look-ahead row and expose the next cursor as a response header."""
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        created_at, id_ = key(rows[-1])
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(created_at, id_)
+    return rows
@@ -1,16 +1,26 @@
 from __future__ import annotations
 
+import hashlib
 import uuid
-
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func, select
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
-
-from app.db import get_db
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy import delete, func, insert, literal, select, union, update
+from sqlalchemy.dialects.postgresql import UUID, aggregate_order_by
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+
+from app.api.pagination import paginate, set_next_cursor
+from app.cache import prompt_resolve_cache
+from app.db import get_async_db, get_db
 from app.models import Prompt, PromptVersion, Tag, prompt_tags
+from app.models.prompt import SEARCH_CONFIG
 from app.schemas.prompt import (
     PromptActivateIn,
+    PromptBaselineIn,
+    PromptBulkResolveIn,
+    PromptBulkResolveOut,
     PromptCreateIn,
     PromptDetailOut,
     PromptOut,
@@ -48,54 +58,94 @@ def _normalize_tag_names(raw: list[str] | None) -> list[str]:
     return out
 
 
-def _set_prompt_tags(prompt: Prompt, tag_names: list[str], db: Session) -> None:
-    """Replace prompt.tags with canonical tag set."""
+def _set_prompt_tags(prompt_id: uuid.UUID, tag_names: list[str], db: Session) -> None:
+    """Replace a prompt's tags with the canonical tag set.
+
+    Three statements however many tags there are: the old links go, missing
+    tags are created in one INSERT ... ON CONFLICT DO NOTHING (which also
+    copes with a concurrent request creating the same tag), and the new links
+    are inserted from a select on the tag names.
+    """
 
+    db.execute(delete(prompt_tags).where(prompt_tags.c.prompt_id == prompt_id))
     if len(tag_names) == 0:
-        prompt.tags = []
         return
 
-    existing = db.scalars(select(Tag).where(Tag.name.in_(tag_names))).all()
-    by_name = {t.name: t for t in existing}
-
-    for name in tag_names:
-        if name not in by_name:
-            tag = Tag(name=name)
-            db.add(tag)
-            db.flush()
-            by_name[name] = tag
-
-    prompt.tags = [by_name[name] for name in tag_names]
-
+    db.execute(
+        pg_insert(Tag)
+        .values([{"id": uuid.uuid4(), "name": name} for name in tag_names])
+        .on_conflict_do_nothing(index_elements=[Tag.name])
+    )
+    db.execute(
+        insert(prompt_tags).from_select(
+            ["prompt_id", "tag_id"],
+            select(literal(prompt_id, UUID(as_uuid=True)), Tag.id).where(Tag.name.in_(tag_names)),
+        )
+    )
 
-def _fetch_tags_by_prompt_id(prompt_ids: list[uuid.UUID], db: Session) -> dict[uuid.UUID, list[str]]:
-    if len(prompt_ids) == 0:
-        return {}
 
-    rows = db.execute(
+def _tags_stmt(prompt_ids: list[uuid.UUID]):
+    return (
         select(prompt_tags.c.prompt_id, Tag.name)
         .join(Tag, Tag.id == prompt_tags.c.tag_id)
         .where(prompt_tags.c.prompt_id.in_(prompt_ids))
         .order_by(Tag.name.asc())
-    ).all()
+    )
+
 
+def _group_tags(prompt_ids: list[uuid.UUID], rows) -> dict[uuid.UUID, list[str]]:
     out: dict[uuid.UUID, list[str]] = {pid: [] for pid in prompt_ids}
     for pid, name in rows:
         out.setdefault(pid, []).append(name)
     return out
 
 
+def _fetch_tags_by_prompt_id(prompt_ids: list[uuid.UUID], db: Session) -> dict[uuid.UUID, list[str]]:
+    if len(prompt_ids) == 0:
+        return {}
+
+    return _group_tags(prompt_ids, db.execute(_tags_stmt(prompt_ids)).all())
+
+
+def _etag(kind: str, *parts: object) -> str:
+    """Strong ETag over the mutable parts of a prompt representation.
+
+    Prompt versions are immutable, so (id, active_version, max version,
+    description, tags) fully determines what the read endpoints return.
+    """
+
+    raw = "\x1f".join([kind, *(repr(p) for p in parts)])
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+def _if_none_match(header: str | None, etag: str) -> bool:
+    """RFC 9110 weak comparison, as required for If-None-Match."""
+
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = (c.strip().removeprefix("W/") for c in header.split(","))
+    return etag in candidates
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
 @router.post("", response_model=PromptDetailOut, status_code=status.HTTP_201_CREATED)
 def create_prompt(payload: PromptCreateIn, db: Session = Depends(get_db)):
     existing = db.scalar(select(Prompt).where(Prompt.name == payload.name))
     if existing is not None:
         raise HTTPException(status_code=409, detail="prompt name already exists")
 
-    prompt = Prompt(name=payload.name, description=payload.description, active_version=1)
+    prompt = Prompt(
+        name=payload.name, description=payload.description, active_version=1, max_version=1
+    )
     db.add(prompt)
     db.flush()  # assign prompt.id
 
-    _set_prompt_tags(prompt, _normalize_tag_names(payload.tags), db)
+    _set_prompt_tags(prompt.id, _normalize_tag_names(payload.tags), db)
 
     version = PromptVersion(
         prompt_id=prompt.id,
@@ -103,54 +153,83 @@ def create_prompt(payload: PromptCreateIn, db: Session = Depends(get_db)):
         content=payload.content,
         parameters=payload.parameters,
     )
+    prompt_id = prompt.id
     db.add(version)
     db.commit()
 
-    # Avoid any lazy-loading surprises during response serialization.
-    return get_prompt(prompt.id, db)
-
+    # Read back with the detail queries; prompt's attributes expired on commit.
+    return _prompt_detail(prompt_id, db)[1]
 
-@router.get("", response_model=list[PromptOut])
-def list_prompts(
-    q: str | None = None,
-    tag: str | None = None,
-    limit: int = Query(default=50, ge=1, le=100),
-    offset: int = Query(default=0, ge=0),
-    db: Session = Depends(get_db),
-):
-    """List prompts with their latest version.
 
-    - Supports basic search via `q` (matches prompt name/description).
-    - Supports pagination via `limit` and `offset`.
+def _fulltext_search(stmt, q: str, search_content: bool):
+    """Add full-text/trigram match conditions; returns (stmt, rank expression).
 
-    Avoids N+1 queries by joining against a (prompt_id, max(version)) subquery.
+    Matching prompt ids come from a UNION of index-driven lookups: the
+    generated `prompts.search_vector` column (GIN), `name % q` (pg_trgm GIN)
+    and, for content, `prompt_versions.search_vector` (GIN). A single OR across
+    them would fall back to a seq scan.
     """
 
-    latest_versions = (
-        select(
-            PromptVersion.prompt_id.label("prompt_id"),
-            func.max(PromptVersion.version).label("max_version"),
+    tsq = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank_cd(Prompt.search_vector, tsq) + func.similarity(Prompt.name, q)
+
+    candidates = [
+        select(Prompt.id).where(Prompt.search_vector.bool_op("@@")(tsq)),
+        select(Prompt.id).where(Prompt.name.bool_op("%")(q)),
+    ]
+
+    if search_content:
+        active = aliased(PromptVersion)
+        on_active = (active.prompt_id == Prompt.id) & (active.version == Prompt.active_version)
+        candidates.append(
+            select(active.prompt_id)
+            .join(Prompt, on_active)
+            .where(active.search_vector.bool_op("@@")(tsq))
         )
-        .group_by(PromptVersion.prompt_id)
-        .subquery()
-    )
-
-    stmt = (
-        select(Prompt, PromptVersion)
-        .outerjoin(latest_versions, latest_versions.c.prompt_id == Prompt.id)
-        .outerjoin(
-            PromptVersion,
-            (PromptVersion.prompt_id == Prompt.id)
-            & (PromptVersion.version == latest_versions.c.max_version),
+        active_rank = (
+            select(func.ts_rank_cd(active.search_vector, tsq))
+            .where(on_active)
+            .correlate(Prompt)
+            .scalar_subquery()
         )
-        .order_by(Prompt.created_at.desc())
-        .limit(limit)
-        .offset(offset)
+        rank = rank + func.coalesce(active_rank, 0)
+
+    return stmt.where(Prompt.id.in_(union(*candidates))), rank
+
+
+def _list_prompts_stmt(
+    q: str | None,
+    tag: str | None,
+    search_mode: str,
+    search_content: bool,
+    limit: int,
+    offset: int,
+    cursor: str | None,
+):
+    """Build the list_prompts query; returns (stmt, ranked)."""
+
+    stmt = select(Prompt, PromptVersion).outerjoin(
+        PromptVersion,
+        (PromptVersion.prompt_id == Prompt.id) & (PromptVersion.version == Prompt.max_version),
     )
 
-    if q is not None and q.strip() != "":
-        like = f"%{q.strip()}%"
-        stmt = stmt.where((Prompt.name.ilike(like)) | (Prompt.description.ilike(like)))
+    q = q.strip() if q is not None else ""
+    ranked = search_mode == "fulltext" and q != ""
+
+    if ranked:
+        if cursor is not None:
+            raise HTTPException(status_code=422, detail="cursor is not supported for ranked search")
+        stmt, rank = _fulltext_search(stmt, q, search_content)
+        stmt = (
+            stmt.order_by(rank.desc(), Prompt.created_at.desc(), Prompt.id.desc())
+            .limit(limit)
+            .offset(offset)
+        )
+    else:
+        if q != "":
+            like = f"%{q}%"
+            stmt = stmt.where((Prompt.name.ilike(like)) | (Prompt.description.ilike(like)))
+        stmt = paginate(stmt, Prompt.created_at, Prompt.id, limit=limit, offset=offset, cursor=cursor)
 
     if tag is not None and tag.strip() != "":
         tag_name = tag.strip().lower()
@@ -160,11 +239,10 @@ def list_prompts(
             .where(Tag.name == tag_name)
         )
 
-    rows = db.execute(stmt).all()
+    return stmt, ranked
 
-    prompt_ids = [p.id for p, _latest in rows]
-    tags_by_prompt_id = _fetch_tags_by_prompt_id(prompt_ids, db)
 
+def _prompt_list_out(rows, tags_by_prompt_id: dict[uuid.UUID, list[str]]) -> list[PromptOut]:
     out: list[PromptOut] = []
     for prompt, latest in rows:
         out.append(
@@ -184,62 +262,271 @@ def list_prompts(
     return out
 
 
-@router.get("/by-name/{name}", response_model=PromptResolvedOut)
-def resolve_prompt_by_name(name: str, db: Session = Depends(get_db)):
-    """Resolve a prompt by stable name to its active version.
+@router.get("", response_model=list[PromptOut])
+def list_prompts(
+    response: Response,
+    q: str | None = None,
+    tag: str | None = None,
+    search_mode: Literal["substring", "fulltext"] = "substring",
+    search_content: bool = False,
+    limit: int = Query(default=50, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+):
+    """List prompts with their latest version.
 
-    This is the read path runners will use: stable prompt name → immutable prompt
-    version (content + parameters).
+    - Supports basic search via `q`. `search_mode=substring` (default) matches
+      prompt name/description with ILIKE, served by pg_trgm indexes.
+      `search_mode=fulltext` matches words (stemmed) or near-miss names and
+      orders by relevance; `search_content=true` also searches the active
+      version's content. Ranked results page with `offset` only.
+    - Supports pagination via `limit` and either `offset` or an opaque `cursor`
+      (keyset on created_at, id). The cursor for the next page is returned in
+      the `X-Next-Cursor` header; it is absent on the last page.
+
+    Avoids N+1 queries by joining each prompt to its latest version through the
+    denormalized `prompts.max_version` column (a unique-index lookup per row).
     """
 
-    prompt = db.scalar(select(Prompt).where(Prompt.name == name))
-    if prompt is None:
-        raise HTTPException(status_code=404, detail="prompt not found")
+    stmt, ranked = _list_prompts_stmt(q, tag, search_mode, search_content, limit, offset, cursor)
 
-    active = db.scalar(
-        select(PromptVersion).where(
-            (PromptVersion.prompt_id == prompt.id)
-            & (PromptVersion.version == prompt.active_version)
-        )
+    rows = db.execute(stmt).all()
+    if not ranked:
+        rows = set_next_cursor(response, rows, limit, key=lambda row: (row[0].created_at, row[0].id))
+
+    return _prompt_list_out(rows, _fetch_tags_by_prompt_id([p.id for p, _latest in rows], db))
+
+
+def _resolve_stmt():
+    """(Prompt, active PromptVersion) rows; callers add the name filter."""
+
+    return select(Prompt, PromptVersion).outerjoin(
+        PromptVersion,
+        (PromptVersion.prompt_id == Prompt.id) & (PromptVersion.version == Prompt.active_version),
     )
-    if active is None:
-        # Should never happen, but we keep the API honest.
-        raise HTTPException(status_code=409, detail="active prompt version missing")
 
+
+def _resolved_out(prompt: Prompt, active: PromptVersion, tags: list[str]) -> PromptResolvedOut:
     return PromptResolvedOut(
         id=prompt.id,
         name=prompt.name,
         description=prompt.description,
-        tags=[t.name for t in prompt.tags],
+        tags=tags,
         created_at=prompt.created_at,
         active_version=prompt.active_version,
         active=PromptVersionOut.model_validate(active),
     )
 
 
-@router.get("/{prompt_id}", response_model=PromptDetailOut)
-def get_prompt(prompt_id: uuid.UUID, db: Session = Depends(get_db)):
-    prompt = db.scalar(select(Prompt).where(Prompt.id == prompt_id))
-    if prompt is None:
+def _cache_resolved(resolved: PromptResolvedOut, generation: int) -> tuple[str, bytes]:
+    etag = _etag("resolved", resolved.id, resolved.active_version, resolved.description, resolved.tags)
+    body = resolved.model_dump_json().encode()
+    prompt_resolve_cache.put(resolved.name, (etag, body), generation=generation)
+    return etag, body
+
+
+def _cached_resolve_response(name: str, if_none_match: str | None) -> Response | None:
+    cached = prompt_resolve_cache.get(name)
+    if cached is None:
+        return None
+
+    etag, body = cached
+    if _if_none_match(if_none_match, etag):
+        return _not_modified(etag)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+def _require_resolved(row) -> tuple[Prompt, PromptVersion]:
+    if row is None:
         raise HTTPException(status_code=404, detail="prompt not found")
 
-    versions = db.scalars(
+    prompt, active = row
+    if active is None:
+        # Should never happen, but we keep the API honest.
+        raise HTTPException(status_code=409, detail="active prompt version missing")
+    return prompt, active
+
+
+def _resolve_response(
+    resolved: PromptResolvedOut, generation: int, if_none_match: str | None
+) -> Response:
+    etag, body = _cache_resolved(resolved, generation)
+    if _if_none_match(if_none_match, etag):
+        return _not_modified(etag)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+def _bulk_resolve_out(
+    names: list[str],
+    found: dict[str, tuple[Prompt, PromptVersion]],
+    tags_by_prompt_id: dict[uuid.UUID, list[str]],
+    generation: int,
+) -> PromptBulkResolveOut:
+    prompts: list[PromptResolvedOut] = []
+    missing: list[str] = []
+    for name in names:
+        if name not in found:
+            missing.append(name)
+            continue
+
+        prompt, active = found[name]
+        resolved = _resolved_out(prompt, active, tags_by_prompt_id.get(prompt.id, []))
+        _cache_resolved(resolved, generation)
+        prompts.append(resolved)
+
+    return PromptBulkResolveOut(prompts=prompts, missing=missing)
+
+
+@router.get("/cache/stats")
+def prompt_cache_stats():
+    """Hit/miss/eviction counters for the in-process resolve cache."""
+
+    return prompt_resolve_cache.snapshot()
+
+
+@router.get("/by-name/{name}", response_model=PromptResolvedOut)
+def resolve_prompt_by_name(
+    name: str,
+    if_none_match: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+):
+    """Resolve a prompt by stable name to its active version.
+
+    This is the read path runners will use: stable prompt name → immutable prompt
+    version (content + parameters).
+
+    Responses are served from an in-process cache keyed by name (see
+    `app/cache.py`); writes that change the resolved payload invalidate it.
+    Cache hits answer `If-None-Match` without touching the database.
+    """
+
+    cached = _cached_resolve_response(name, if_none_match)
+    if cached is not None:
+        return cached
+
+    generation = prompt_resolve_cache.generation
+
+    row = db.execute(_resolve_stmt().where(Prompt.name == name)).first()
+    prompt, active = _require_resolved(row)
+    tags = _fetch_tags_by_prompt_id([prompt.id], db)[prompt.id]
+    return _resolve_response(_resolved_out(prompt, active, tags), generation, if_none_match)
+
+
+def _prompt_stamp_stmt(prompt_id: uuid.UUID):
+    """The prompt row plus its tag names in one query.
+
+    Everything a detail ETag depends on, without touching version content.
+    """
+
+    tag_names = (
+        select(func.array_agg(aggregate_order_by(Tag.name, Tag.name.asc())))
+        .select_from(prompt_tags)
+        .join(Tag, Tag.id == prompt_tags.c.tag_id)
+        .where(prompt_tags.c.prompt_id == Prompt.id)
+        .scalar_subquery()
+    )
+
+    return select(Prompt, tag_names).where(Prompt.id == prompt_id)
+
+
+def _load_prompt_stamp(prompt_id: uuid.UUID, db: Session):
+    return db.execute(_prompt_stamp_stmt(prompt_id)).first()
+
+
+def _detail_etag(stamp) -> str:
+    prompt, tags = stamp
+    return _etag(
+        "detail",
+        prompt.id,
+        prompt.active_version,
+        prompt.baseline_version,
+        prompt.max_version,
+        prompt.description,
+        tags or [],
+    )
+
+
+def _versions_stmt(prompt_id: uuid.UUID):
+    return (
         select(PromptVersion)
         .where(PromptVersion.prompt_id == prompt_id)
         .order_by(PromptVersion.version.desc())
-    ).all()
+    )
+
 
+def _detail_out(stamp, versions) -> PromptDetailOut:
+    prompt, tags = stamp
     return PromptDetailOut(
         id=prompt.id,
         name=prompt.name,
         description=prompt.description,
-        tags=[t.name for t in prompt.tags],
+        tags=list(tags or []),
         created_at=prompt.created_at,
         active_version=prompt.active_version,
+        baseline_version=prompt.baseline_version,
         versions=[PromptVersionOut.model_validate(v) for v in versions],
     )
 
 
+def _require_stamp(stamp):
+    if stamp is None:
+        raise HTTPException(status_code=404, detail="prompt not found")
+    return stamp
+
+
+def _prompt_detail(prompt_id: uuid.UUID, db: Session, stamp=None) -> tuple[str, PromptDetailOut]:
+    if stamp is None:
+        stamp = _require_stamp(_load_prompt_stamp(prompt_id, db))
+
+    versions = db.scalars(_versions_stmt(prompt_id)).all()
+    return _detail_etag(stamp), _detail_out(stamp, versions)
+
+
+@router.post("/resolve", response_model=PromptBulkResolveOut)
+def resolve_prompts(payload: PromptBulkResolveIn, db: Session = Depends(get_db)):
+    """Resolve many prompt names to their active versions at once.
+
+    Runner warm-up path: one joined query for prompts + active versions and
+    one batched tag query, regardless of how many names are requested.
+    Results follow request order (duplicates collapsed); unknown names are
+    reported in `missing`. Resolved entries also warm the by-name cache.
+    """
+
+    names = list(dict.fromkeys(payload.names))
+    generation = prompt_resolve_cache.generation
+
+    rows = db.execute(_resolve_stmt().where(Prompt.name.in_(names))).all()
+    found = {prompt.name: (prompt, active) for prompt, active in rows if active is not None}
+    tags_by_prompt_id = _fetch_tags_by_prompt_id([p.id for p, _active in found.values()], db)
+
+    return _bulk_resolve_out(names, found, tags_by_prompt_id, generation)
+
+
+@router.get("/{prompt_id}", response_model=PromptDetailOut)
+def get_prompt(
+    prompt_id: uuid.UUID,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+):
+    """Prompt detail with all versions.
+
+    Supports conditional GET: the ETag is checked against a one-row stamp
+    query before any version rows are loaded or serialized.
+    """
+
+    stamp = _require_stamp(_load_prompt_stamp(prompt_id, db))
+
+    etag = _detail_etag(stamp)
+    if _if_none_match(if_none_match, etag):
+        return _not_modified(etag)
+
+    _, detail = _prompt_detail(prompt_id, db, stamp=stamp)
+    response.headers["ETag"] = etag
+    return detail
+
+
 @router.patch("/{prompt_id}", response_model=PromptDetailOut)
 def update_prompt(prompt_id: uuid.UUID, payload: PromptUpdateIn, db: Session = Depends(get_db)):
     prompt = db.scalar(select(Prompt).where(Prompt.id == prompt_id))
@@ -249,52 +536,43 @@ def update_prompt(prompt_id: uuid.UUID, payload: PromptUpdateIn, db: Session = D
     prompt.description = payload.description
 
     if payload.tags is not None:
-        _set_prompt_tags(prompt, _normalize_tag_names(payload.tags), db)
+        _set_prompt_tags(prompt.id, _normalize_tag_names(payload.tags), db)
 
+    name = prompt.name
     db.add(prompt)
     db.commit()
+    prompt_resolve_cache.invalidate(name)
 
-    return get_prompt(prompt_id, db)
+    return _prompt_detail(prompt_id, db)[1]
 
 
 @router.post("/{prompt_id}/versions", response_model=PromptVersionOut, status_code=status.HTTP_201_CREATED)
 def create_prompt_version(
     prompt_id: uuid.UUID, payload: PromptVersionCreateIn, db: Session = Depends(get_db)
 ):
-    prompt = db.scalar(select(Prompt).where(Prompt.id == prompt_id))
-    if prompt is None:
+    # Version numbers are sequential per-prompt. Bumping prompts.max_version takes a
+    # row lock that is held until commit, so concurrent writers for the same prompt
+    # queue up behind each other instead of racing on max(version).
+    next_version = db.scalar(
+        update(Prompt)
+        .where(Prompt.id == prompt_id)
+        .values(max_version=Prompt.max_version + 1)
+        .returning(Prompt.max_version)
+    )
+    if next_version is None:
         raise HTTPException(status_code=404, detail="prompt not found")
 
-    # Version numbers are sequential per-prompt. We enforce uniqueness at the DB level
-    # (prompt_id, version). In the rare case of concurrent writes, we retry.
-    for _attempt in range(3):
-        next_version = (
-            db.scalar(
-                select(func.coalesce(func.max(PromptVersion.version), 0)).where(
-                    PromptVersion.prompt_id == prompt_id
-                )
-            )
-            or 0
-        ) + 1
-
-        version = PromptVersion(
-            prompt_id=prompt_id,
-            version=next_version,
-            content=payload.content,
-            parameters=payload.parameters,
-        )
-
-        try:
-            db.add(version)
-            db.commit()
-        except IntegrityError:
-            db.rollback()
-            continue
-
-        db.refresh(version)
-        return version
+    version = PromptVersion(
+        prompt_id=prompt_id,
+        version=next_version,
+        content=payload.content,
+        parameters=payload.parameters,
+    )
+    db.add(version)
+    db.commit()
 
-    raise HTTPException(status_code=409, detail="could not allocate next prompt version (retry)")
+    db.refresh(version)
+    return version
 
 
 @router.post("/{prompt_id}/activate", response_model=PromptDetailOut)
@@ -314,10 +592,36 @@ def activate_prompt_version(
         raise HTTPException(status_code=404, detail="prompt version not found")
 
     prompt.active_version = payload.version
+    name = prompt.name
+    db.add(prompt)
+    db.commit()
+    prompt_resolve_cache.invalidate(name)
+
+    return _prompt_detail(prompt_id, db)[1]
+
+
+@router.post("/{prompt_id}/baseline", response_model=PromptDetailOut)
+def set_prompt_baseline(prompt_id: uuid.UUID, payload: PromptBaselineIn, db: Session = Depends(get_db)):
+    """Set (or clear, with version null) the version eval runs are compared against by default."""
+
+    prompt = db.scalar(select(Prompt).where(Prompt.id == prompt_id))
+    if prompt is None:
+        raise HTTPException(status_code=404, detail="prompt not found")
+
+    if payload.version is not None:
+        exists = db.scalar(
+            select(PromptVersion.id).where(
+                (PromptVersion.prompt_id == prompt_id) & (PromptVersion.version == payload.version)
+            )
+        )
+        if exists is None:
+            raise HTTPException(status_code=404, detail="prompt version not found")
+
+    prompt.baseline_version = payload.version
     db.add(prompt)
     db.commit()
 
-    return get_prompt(prompt_id, db)
+    return _prompt_detail(prompt_id, db)[1]
 
 
 @router.delete("/{prompt_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -326,5 +630,94 @@ def delete_prompt(prompt_id: uuid.UUID, db: Session = Depends(get_db)):
     if prompt is None:
         return
 
+    name = prompt.name
     db.delete(prompt)
     db.commit()
+    prompt_resolve_cache.invalidate(name)
+
+
+# Async variants of the hot read paths, mounted ahead of `router` when
+# settings.db_async is on (see app/main.py). They share statement builders and
+# serializers with the sync handlers above; only the I/O differs.
+async_router = APIRouter(prefix="/prompts", tags=["prompts"])
+
+
+async def _fetch_tags_by_prompt_id_async(
+    prompt_ids: list[uuid.UUID], db: AsyncSession
+) -> dict[uuid.UUID, list[str]]:
+    if len(prompt_ids) == 0:
+        return {}
+
+    return _group_tags(prompt_ids, (await db.execute(_tags_stmt(prompt_ids))).all())
+
+
+@async_router.get("", response_model=list[PromptOut])
+async def list_prompts_async(
+    response: Response,
+    q: str | None = None,
+    tag: str | None = None,
+    search_mode: Literal["substring", "fulltext"] = "substring",
+    search_content: bool = False,
+    limit: int = Query(default=50, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    stmt, ranked = _list_prompts_stmt(q, tag, search_mode, search_content, limit, offset, cursor)
+
+    rows = (await db.execute(stmt)).all()
+    if not ranked:
+        rows = set_next_cursor(response, rows, limit, key=lambda row: (row[0].created_at, row[0].id))
+
+    tags_by_prompt_id = await _fetch_tags_by_prompt_id_async([p.id for p, _latest in rows], db)
+    return _prompt_list_out(rows, tags_by_prompt_id)
+
+
+@async_router.get("/by-name/{name}", response_model=PromptResolvedOut)
+async def resolve_prompt_by_name_async(
+    name: str,
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    cached = _cached_resolve_response(name, if_none_match)
+    if cached is not None:
+        return cached
+
+    generation = prompt_resolve_cache.generation
+
+    row = (await db.execute(_resolve_stmt().where(Prompt.name == name))).first()
+    prompt, active = _require_resolved(row)
+    tags = (await _fetch_tags_by_prompt_id_async([prompt.id], db))[prompt.id]
+    return _resolve_response(_resolved_out(prompt, active, tags), generation, if_none_match)
+
+
+@async_router.post("/resolve", response_model=PromptBulkResolveOut)
+async def resolve_prompts_async(payload: PromptBulkResolveIn, db: AsyncSession = Depends(get_async_db)):
+    names = list(dict.fromkeys(payload.names))
+    generation = prompt_resolve_cache.generation
+
+    rows = (await db.execute(_resolve_stmt().where(Prompt.name.in_(names)))).all()
+    found = {prompt.name: (prompt, active) for prompt, active in rows if active is not None}
+    tags_by_prompt_id = await _fetch_tags_by_prompt_id_async(
+        [p.id for p, _active in found.values()], db
+    )
+
+    return _bulk_resolve_out(names, found, tags_by_prompt_id, generation)
+
+
+@async_router.get("/{prompt_id}", response_model=PromptDetailOut)
+async def get_prompt_async(
+    prompt_id: uuid.UUID,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    stamp = _require_stamp((await db.execute(_prompt_stamp_stmt(prompt_id))).first())
+
+    etag = _detail_etag(stamp)
+    if _if_none_match(if_none_match, etag):
+        return _not_modified(etag)
+
+    versions = (await db.scalars(_versions_stmt(prompt_id))).all()
+    response.headers["ETag"] = etag
+    return _detail_out(stamp, versions)
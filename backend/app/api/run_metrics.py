@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app import rollups
+from app.db import get_db
+from app.models import Prompt
+from app.schemas.run_metrics import LatencyOut, MetricsInterval, RunMetricsBucketOut, RunMetricsOut
+
+router = APIRouter(tags=["metrics"])
+
+# A day of minutes, two months of hours, or four years of days.
+MAX_METRIC_BUCKETS = 1500
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def _latency_out(histogram, count: int, sum_ms: float, max_ms: float) -> LatencyOut | None:
+    if not count:
+        return None
+    p50, p90, p95, p99 = rollups.percentiles(histogram, (0.5, 0.9, 0.95, 0.99), max_ms)
+    return LatencyOut(mean=sum_ms / count, p50=p50, p90=p90, p95=p95, p99=p99, max=max_ms)
+
+
+def _bucket_out(window: rollups.Window) -> RunMetricsBucketOut:
+    return RunMetricsBucketOut(
+        start=window.start,
+        runs=window.runs,
+        succeeded=window.succeeded,
+        failed=window.failed,
+        error_rate=window.failed / window.runs if window.runs else 0.0,
+        latency_ms=_latency_out(
+            window.histogram, window.succeeded, window.latency_sum_ms, window.latency_max_ms
+        ),
+        queue_wait_ms=_latency_out(
+            window.wait_histogram, window.waited, window.wait_sum_ms, window.wait_max_ms
+        ),
+    )
+
+
+@router.get("/prompts/{prompt_id}/metrics", response_model=RunMetricsOut)
+def get_prompt_run_metrics(
+    prompt_id: uuid.UUID,
+    version: int | None = Query(default=None, ge=1),
+    interval: MetricsInterval = "hour",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    db: Session = Depends(get_db),
+):
+    """Latency and queue wait percentiles and error rate of a prompt's runs, per UTC minute, hour or day.
+
+    Read from the rollups the worker maintains at each of those granularities
+    (app.rollups): one row per returned bucket and version, however many runs
+    there were. The window defaults to the last 24 hours and is widened to
+    whole buckets (`since` is rounded down); naive timestamps are UTC.
+    """
+
+    until = _utc(until) if until is not None else datetime.now(timezone.utc)
+    since = _utc(since) if since is not None else until - timedelta(days=1)
+    if since >= until:
+        raise HTTPException(status_code=422, detail="since must be before until")
+    since = rollups.floor(since, interval)
+    if (until - since) / rollups.GRANULARITIES[interval] > MAX_METRIC_BUCKETS:
+        raise HTTPException(
+            status_code=422, detail=f"window spans more than {MAX_METRIC_BUCKETS} {interval} buckets"
+        )
+
+    windows = rollups.series(db, prompt_id, version=version, granularity=interval, since=since, until=until)
+    if not windows and db.get(Prompt, prompt_id) is None:
+        raise HTTPException(status_code=404, detail="prompt not found")
+
+    return RunMetricsOut(
+        prompt_id=prompt_id,
+        version=version,
+        interval=interval,
+        since=since,
+        until=until,
+        total=_bucket_out(rollups.merge(windows, since)),
+        buckets=[_bucket_out(w) for w in windows],
+    )
@@ -1,54 +1,616 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import uuid
+import zlib
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from psycopg.types.json import Jsonb
+from sqlalchemy import Select, Text, and_, any_, bindparam, cast, func, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db import get_db
-from app.models import Prompt, Run
-from app.schemas.run import RunCreateIn, RunOut
+from app import blobs, events, run_cache
+from app.api.pagination import paginate, set_next_cursor
+from app.db import SessionLocal, contains_nul, get_async_db, get_db
+from app.models import Prompt, Run, RunOutputChunk
+from app.schemas.run import (
+    RunBulkCreateIn,
+    RunBulkCreateOut,
+    RunBulkItemError,
+    RunCreateIn,
+    RunOut,
+    RunOutputTailOut,
+    RunQueueOut,
+    RunQueuePromptOut,
+    RunSummaryOut,
+)
+from app.settings import settings
 
 router = APIRouter(prefix="/runs", tags=["runs"])
 
+_COPY_RUNS = "COPY runs (id, prompt_id, prompt_version, status, input) FROM STDIN"
 
-@router.post("", response_model=RunOut, status_code=status.HTTP_201_CREATED)
-def create_run(payload: RunCreateIn, db: Session = Depends(get_db)):
-    prompt = db.scalar(select(Prompt).where(Prompt.name == payload.prompt_name))
+
+def _copy_runs(db: Session, rows: list[tuple]) -> None:
+    """Stream rows into `runs` with COPY on the session's own connection/transaction.
+
+    Several times faster than a multi-row INSERT for large batches: no SQL to
+    compile or parse per row, and no bind-parameter limit to chunk around.
+    """
+
+    cursor = db.connection().connection.driver_connection.cursor()
+    with cursor.copy(_COPY_RUNS) as copy:
+        for row in rows:
+            copy.write_row(row)
+
+
+def _new_run(prompt: Prompt | None, payload: RunCreateIn) -> Run:
     if prompt is None:
         raise HTTPException(status_code=404, detail="prompt not found")
 
-    run = Run(
+    return Run(
         prompt_id=prompt.id,
         prompt_version=prompt.active_version,
         status="queued",
         input=payload.input,
     )
+
+
+@router.post("", response_model=RunOut, status_code=status.HTTP_201_CREATED)
+def create_run(payload: RunCreateIn, db: Session = Depends(get_db)):
+    """Queue a run, or complete it on the spot if its result is cached (see app.run_cache)."""
+
+    prompt = db.scalar(select(Prompt).where(Prompt.name == payload.prompt_name))
+    run = _new_run(prompt, payload)
     db.add(run)
+    if run_cache.enabled():
+        db.flush()  # computes run.cache_key
+        output = run_cache.memory_get(run.cache_key)
+        if output is None:
+            row = db.execute(run_cache.lookup_stmt(run.cache_key)).first()
+            if row is not None:
+                output = run_cache.memory_put_row(run.cache_key, row)
+        if output is not None:
+            run_cache.mark_hit(run, output)
     db.commit()
     db.refresh(run)
 
     return run
 
 
-@router.get("", response_model=list[RunOut])
+@router.post("/bulk", response_model=RunBulkCreateOut, status_code=status.HTTP_201_CREATED)
+def create_runs_bulk(payload: RunBulkCreateIn, db: Session = Depends(get_db)):
+    """Queue many runs in one transaction.
+
+    Each distinct prompt name is resolved once (one query for the whole batch)
+    and rows go in via COPY. Items whose prompt does not exist, or whose input
+    Postgres cannot store (a NUL character), are reported in `errors` and
+    skipped; the rest are still created. Runs with a cached result
+    are then completed by one UPDATE against the cache and counted in `cached`.
+    """
+
+    items = payload.items()
+    names = {item.prompt_name for item in items}
+    prompts = {
+        row.name: (row.id, row.active_version)
+        for row in db.execute(
+            select(Prompt.name, Prompt.id, Prompt.active_version).where(Prompt.name.in_(names))
+        )
+    }
+
+    ids: list[uuid.UUID | None] = []
+    errors: list[RunBulkItemError] = []
+    rows: list[tuple] = []
+    for index, item in enumerate(items):
+        resolved = prompts.get(item.prompt_name)
+        if resolved is None:
+            ids.append(None)
+            errors.append(RunBulkItemError(index=index, detail="prompt not found"))
+            continue
+        if contains_nul(item.input):
+            ids.append(None)
+            errors.append(RunBulkItemError(index=index, detail="input strings cannot contain NUL (\\u0000)"))
+            continue
+
+        run_id = uuid.uuid4()
+        ids.append(run_id)
+        rows.append((run_id, resolved[0], resolved[1], "queued", Jsonb(item.input)))
+
+    cached = 0
+    if rows:
+        _copy_runs(db, rows)
+        # One array parameter rather than an IN list of up to 50k binds.
+        new_ids = bindparam("new_ids", [row[0] for row in rows], type_=ARRAY(UUID(as_uuid=True)))
+        cached = run_cache.serve_queued(db, Run.id == any_(new_ids))
+    db.commit()
+
+    return RunBulkCreateOut(ids=ids, created=len(rows), cached=cached, errors=errors)
+
+
+@router.get("", response_model=list[RunSummaryOut])
 def list_runs(
+    response: Response,
     prompt_id: uuid.UUID | None = None,
+    eval_run_id: uuid.UUID | None = None,
     limit: int = Query(default=50, ge=1, le=200),
     offset: int = Query(default=0, ge=0),
+    cursor: str | None = None,
     db: Session = Depends(get_db),
 ):
-    stmt = select(Run).order_by(Run.created_at.desc()).limit(limit).offset(offset)
+    """List runs newest-first.
+
+    Prefer `cursor` over `offset` for deep pages: it seeks on the
+    (created_at, id) index instead of scanning past skipped rows, and does not
+    skip or repeat rows when new runs are inserted between page loads. The next
+    cursor is returned in the `X-Next-Cursor` header.
+
+    Inputs and outputs come as previews and sizes, cut in the query, so a page
+    never carries full payloads; GET /api/runs/{id} has the input and
+    /api/runs/{id}/output the full output.
+    """
+
+    stmt = _list_runs_stmt(prompt_id, eval_run_id, limit, offset, cursor)
+    runs = list(db.execute(stmt).all())
+    return set_next_cursor(response, runs, limit, key=lambda run: (run.created_at, run.id))
+
+
+def _list_runs_stmt(
+    prompt_id: uuid.UUID | None,
+    eval_run_id: uuid.UUID | None,
+    limit: int,
+    offset: int,
+    cursor: str | None,
+):
+    input_text = cast(Run.input, Text)
+    stmt = select(
+        Run.id,
+        Run.prompt_id,
+        Run.prompt_version,
+        Run.eval_run_id,
+        Run.dataset_item_id,
+        Run.status,
+        Run.cache_hit,
+        func.left(input_text, settings.run_preview_chars).label("input_preview"),
+        func.octet_length(input_text).label("input_size"),
+        func.left(Run.output, settings.run_preview_chars).label("output_preview"),
+        # octet_length reads a TOASTed value's size from its header, without fetching it.
+        func.coalesce(Run.output_size, func.octet_length(Run.output)).label("output_size"),
+        Run.error,
+        Run.created_at,
+        Run.started_at,
+        Run.first_token_at,
+        Run.finished_at,
+    )
+    if prompt_id is not None:
+        stmt = stmt.where(Run.prompt_id == prompt_id)
+    if eval_run_id is not None:
+        stmt = stmt.where(Run.eval_run_id == eval_run_id)
+    return paginate(stmt, Run.created_at, Run.id, limit=limit, offset=offset, cursor=cursor)
+
+
+RunStatus = Literal["queued", "running", "succeeded", "failed"]
+
+# Rows fetched per server-side cursor round-trip during export; also the number
+# of NDJSON lines joined into one response chunk.
+EXPORT_BATCH_SIZE = 2000
+
+_EXPORT_COLUMNS = (
+    Run.id,
+    Run.prompt_id,
+    Run.prompt_version,
+    Run.eval_run_id,
+    Run.dataset_item_id,
+    Run.status,
+    Run.cache_hit,
+    Run.input,
+    Run.output,
+    Run.output_blob_key,
+    Run.error,
+    Run.created_at,
+    Run.started_at,
+    Run.first_token_at,
+    Run.finished_at,
+)
+
+
+def _export_runs_stmt(
+    prompt_id: uuid.UUID | None,
+    run_status: str | None,
+    created_after: datetime | None,
+    created_before: datetime | None,
+) -> Select:
+    stmt = select(*_EXPORT_COLUMNS)
     if prompt_id is not None:
         stmt = stmt.where(Run.prompt_id == prompt_id)
+    if run_status is not None:
+        stmt = stmt.where(Run.status == run_status)
+    if created_after is not None:
+        stmt = stmt.where(Run.created_at >= created_after)
+    if created_before is not None:
+        stmt = stmt.where(Run.created_at < created_before)
+    # Oldest first on the (created_at, id) indexes, so an export can be resumed
+    # from the last created_at it saw.
+    return stmt.order_by(Run.created_at, Run.id)
+
+
+def _str_or_none(value: uuid.UUID | None) -> str | None:
+    return str(value) if value is not None else None
+
+
+def _iso(value: datetime | None) -> str | None:
+    # Same format RunOut serializes to (pydantic writes UTC as "Z").
+    return value.isoformat().replace("+00:00", "Z") if value is not None else None
+
+
+def _full_output(row, store: blobs.BlobStore) -> str | None:
+    return blobs.read_text(row.output_blob_key, store) if row.output_blob_key else row.output
+
+
+def _ndjson_chunks(stmt: Select) -> Iterator[bytes]:
+    """Yield NDJSON, one chunk per server-side cursor batch.
+
+    Rows are plain tuples (no ORM identity map) and the session is owned by the
+    generator rather than the request, so memory stays bounded by one batch and
+    the connection is released as soon as the stream ends or the client leaves.
+    Outputs in the blob store are read back, so every line has the full output
+    (and output_truncated is always false).
+    """
+
+    store = blobs.get_blob_store()
+    with SessionLocal() as db:
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for batch in result.partitions():
+            outputs = [_full_output(r, store) for r in batch]
+            lines = [
+                json.dumps(
+                    {
+                        "id": str(r.id),
+                        "prompt_id": str(r.prompt_id),
+                        "prompt_version": r.prompt_version,
+                        "eval_run_id": _str_or_none(r.eval_run_id),
+                        "dataset_item_id": _str_or_none(r.dataset_item_id),
+                        "status": r.status,
+                        "cache_hit": r.cache_hit,
+                        "input": r.input,
+                        "output": output,
+                        "output_size": len(output.encode()) if output is not None else None,
+                        "output_truncated": False,
+                        "error": r.error,
+                        "created_at": _iso(r.created_at),
+                        "started_at": _iso(r.started_at),
+                        "first_token_at": _iso(r.first_token_at),
+                        "finished_at": _iso(r.finished_at),
+                    },
+                    separators=(",", ":"),
+                )
+                for r, output in zip(batch, outputs)
+            ]
+            lines.append("")
+            yield "\n".join(lines).encode()
+
+
+def _gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+@router.get("/export")
+def export_runs(
+    prompt_id: uuid.UUID | None = None,
+    run_status: RunStatus | None = Query(default=None, alias="status"),
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    gzip: bool = False,
+):
+    """Stream runs as NDJSON (one RunOut-shaped object per line), oldest first.
+
+    `created_after` is inclusive and `created_before` exclusive. With
+    `gzip=true` the body is a gzip file (`runs.ndjson.gz`).
+    """
+
+    chunks = _ndjson_chunks(_export_runs_stmt(prompt_id, run_status, created_after, created_before))
+    if not gzip:
+        return StreamingResponse(chunks, media_type="application/x-ndjson")
+
+    return StreamingResponse(
+        _gzip_chunks(chunks),
+        media_type="application/gzip",
+        headers={"Content-Disposition": 'attachment; filename="runs.ndjson.gz"'},
+    )
+
+
+@router.get("/queue", response_model=RunQueueOut)
+def get_run_queue(db: Session = Depends(get_db)):
+    """How many runs are queued and running per prompt, and how long the oldest queued run has waited.
+
+    Counted from the partial indexes on queued and running runs, so the cost
+    follows the queue, not the table. Waits so far; waits of runs that
+    started are in the prompt metrics (GET /api/prompts/{id}/metrics).
+    """
 
-    return list(db.scalars(stmt).all())
+    queued = (
+        select(
+            Run.prompt_id,
+            func.count().label("queued"),
+            func.min(Run.created_at).label("oldest_queued_at"),
+        )
+        .where(Run.status == "queued")
+        .group_by(Run.prompt_id)
+        .subquery()
+    )
+    running = (
+        select(Run.prompt_id, func.count().label("running"))
+        .where(Run.status == "running")
+        .group_by(Run.prompt_id)
+        .subquery()
+    )
+    prompt_id = func.coalesce(queued.c.prompt_id, running.c.prompt_id)
+    wait = func.coalesce(func.extract("epoch", func.now() - queued.c.oldest_queued_at), 0)
+    rows = db.execute(
+        select(
+            Prompt.id,
+            Prompt.name,
+            func.coalesce(queued.c.queued, 0).label("queued"),
+            func.coalesce(running.c.running, 0).label("running"),
+            queued.c.oldest_queued_at,
+            wait.label("wait"),
+        )
+        .select_from(queued)
+        .join(running, queued.c.prompt_id == running.c.prompt_id, full=True)
+        .join(Prompt, Prompt.id == prompt_id)
+        .order_by(queued.c.oldest_queued_at.nulls_last(), Prompt.name)
+    ).all()
+    prompts = [
+        RunQueuePromptOut(
+            prompt_id=row.id,
+            prompt_name=row.name,
+            queued=row.queued,
+            running=row.running,
+            oldest_queued_at=row.oldest_queued_at,
+            max_wait_seconds=float(row.wait),
+        )
+        for row in rows
+    ]
+    return RunQueueOut(
+        queued=sum(p.queued for p in prompts),
+        running=sum(p.running for p in prompts),
+        max_wait_seconds=max((p.max_wait_seconds for p in prompts), default=0.0),
+        prompts=prompts,
+    )
+
+
+def _require_run(run: Run | None) -> Run:
+    if run is None:
+        raise HTTPException(status_code=404, detail="run not found")
+    return run
 
 
 @router.get("/{run_id}", response_model=RunOut)
 def get_run(run_id: uuid.UUID, db: Session = Depends(get_db)):
-    run = db.scalar(select(Run).where(Run.id == run_id))
+    return _require_run(db.scalar(select(Run).where(Run.id == run_id)))
+
+
+@router.get("/{run_id}/output")
+def get_run_output(run_id: uuid.UUID, db: Session = Depends(get_db)):
+    """The run's full output as text/plain, streamed from the blob store if it was spilled there."""
+
+    row = db.execute(select(Run.output, Run.output_blob_key).where(Run.id == run_id)).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="run not found")
+    if row.output is None:
+        raise HTTPException(status_code=404, detail="run has no output")
+    if row.output_blob_key is None:
+        return Response(row.output, media_type="text/plain; charset=utf-8")
+    try:
+        chunks = blobs.iter_blob(row.output_blob_key)
+    except blobs.BlobNotFoundError as e:
+        raise HTTPException(status_code=500, detail="run output is missing from the blob store") from e
+    return StreamingResponse(chunks, media_type="text/plain; charset=utf-8")
+
+
+TERMINAL_STATUSES = frozenset({"succeeded", "failed"})
+
+
+def _read_output_tail(db: Session, run_id: uuid.UUID, offset: int) -> RunOutputTailOut | None:
+    # One statement, so the run's status and its chunks come from one snapshot:
+    # finish_runs deletes the chunks in the transaction that records the output.
+    rows = db.execute(
+        select(Run.status, Run.output, Run.output_blob_key, RunOutputChunk.start, RunOutputChunk.text)
+        .outerjoin(
+            RunOutputChunk,
+            and_(
+                RunOutputChunk.run_id == Run.id,
+                Run.status == "running",
+                RunOutputChunk.start + func.length(RunOutputChunk.text) > offset,
+            ),
+        )
+        .where(Run.id == run_id)
+        .order_by(RunOutputChunk.start)
+    ).all()
+    if not rows:
+        return None
+    first = rows[0]
+    done = first.status in TERMINAL_STATUSES
+    if done:
+        text = (_full_output(first, blobs.get_blob_store()) or "")[offset:]
+    elif first.text is None:
+        text = ""
+    else:
+        text = "".join(row.text for row in rows)[offset - first.start :]
+    return RunOutputTailOut(
+        status=first.status, offset=offset, text=text, next_offset=offset + len(text), done=done
+    )
+
+
+@router.get("/{run_id}/output/tail", response_model=RunOutputTailOut)
+def tail_run_output(
+    run_id: uuid.UUID, offset: int = Query(default=0, ge=0), db: Session = Depends(get_db)
+):
+    """The run's output from `offset` (in characters) on, including while it executes.
+
+    Output that runners stream is readable within RUN_OUTPUT_FLUSH_SECONDS
+    (see app.worker.output). Read repeatedly from `next_offset` to tail a run
+    until `done`; GET /api/runs/{id}/events pushes the same chunks instead.
+    """
+
+    tail = _read_output_tail(db, run_id, offset)
+    if tail is None:
+        raise HTTPException(status_code=404, detail="run not found")
+    return tail
+
+
+def _load_run(run_id: uuid.UUID) -> RunOut | None:
+    with SessionLocal() as db:
+        run = db.scalar(select(Run).where(Run.id == run_id))
+        return RunOut.model_validate(run) if run is not None else None
+
+
+def _load_output_tail(run_id: uuid.UUID, offset: int) -> RunOutputTailOut | None:
+    with SessionLocal() as db:
+        return _read_output_tail(db, run_id, offset)
+
+
+def _sse(event: str, data: str) -> bytes:
+    return f"event: {event}\ndata: {data}\n\n".encode()
+
+
+async def _run_event_stream(subscription: events.Subscription, run: RunOut) -> AsyncIterator[bytes]:
+    # Characters of streamed output sent so far.
+    sent = 0
+
+    async def output_from(offset: int, text: str | None = None) -> bytes | None:
+        nonlocal sent
+        if text is None:
+            tail = await run_in_threadpool(_load_output_tail, run.id, offset)
+            if tail is None or tail.done:
+                return None  # the run event that follows has the final output
+            text = tail.text
+        if not text:
+            return None
+        sent = offset + len(text)
+        return _sse("output", json.dumps({"offset": offset, "text": text}))
+
+    try:
+        yield _sse("run", run.model_dump_json())
+        if run.status == "running" and (chunk := await output_from(0)):
+            yield chunk
+        while run.status not in TERMINAL_STATUSES:
+            try:
+                event = await asyncio.wait_for(subscription.get(), settings.run_events_heartbeat_seconds)
+            except TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if event is not events.RESYNC and "output_offset" in event:
+                if event["output_offset"] + event["output_length"] <= sent:
+                    continue
+                # Read from the table when the chunk is not in the event or
+                # does not start where the watcher is.
+                inline = event.get("output") if event["output_offset"] == sent else None
+                if chunk := await output_from(sent, inline):
+                    yield chunk
+                continue
+            if event is events.RESYNC or event["status"] in TERMINAL_STATUSES:
+                latest = await run_in_threadpool(_load_run, run.id)
+                if latest is None:
+                    return  # deleted by retention
+            else:
+                latest = run.model_validate({**run.model_dump(), **event})
+            if latest != run:
+                run = latest
+                yield _sse("run", run.model_dump_json())
+            if event is events.RESYNC and run.status == "running" and (chunk := await output_from(sent)):
+                yield chunk
+    finally:
+        subscription.close()
+
+
+@router.get("/{run_id}/events")
+async def watch_run(run_id: uuid.UUID):
+    """Server-sent events: the run now, then again on every status change, until it finishes.
+
+    Each `run` event carries the run as GET /api/runs/{id} returns it. While
+    the run executes, `output` events carry its streamed output as it is
+    written, as {"offset", "text"} pieces that add up to the output so far.
+    The stream closes after the succeeded or failed event, which has the
+    final output; a comment line is sent every RUN_EVENTS_HEARTBEAT_SECONDS
+    meanwhile. Changes are pushed by the worker (see app.events), so
+    watching mostly costs no queries.
+    """
+
+    # Subscribe before reading the run, so no transition can fall in between.
+    subscription = events.broker.subscribe(run_id)
+    try:
+        run = await run_in_threadpool(_load_run, run_id)
+    except BaseException:
+        subscription.close()
+        raise
     if run is None:
+        subscription.close()
         raise HTTPException(status_code=404, detail="run not found")
+    return StreamingResponse(
+        _run_event_stream(subscription, run),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Async variants, mounted ahead of `router` when settings.db_async is on.
+async_router = APIRouter(prefix="/runs", tags=["runs"])
+
+# No async twins: the export streams from its own sync session on the threadpool,
+# and the queue summary is one aggregate query. They are registered here too so
+# that get_run_async's /{run_id} does not shadow them.
+async_router.add_api_route("/export", export_runs, methods=["GET"])
+async_router.add_api_route("/queue", get_run_queue, methods=["GET"], response_model=RunQueueOut)
+
+
+@async_router.post("", response_model=RunOut, status_code=status.HTTP_201_CREATED)
+async def create_run_async(payload: RunCreateIn, db: AsyncSession = Depends(get_async_db)):
+    prompt = await db.scalar(select(Prompt).where(Prompt.name == payload.prompt_name))
+    run = _new_run(prompt, payload)
+    db.add(run)
+    if run_cache.enabled():
+        await db.flush()
+        output = run_cache.memory_get(run.cache_key)
+        if output is None:
+            row = (await db.execute(run_cache.lookup_stmt(run.cache_key))).first()
+            if row is not None:
+                output = run_cache.memory_put_row(run.cache_key, row)
+        if output is not None:
+            run_cache.mark_hit(run, output)
+    await db.commit()
+    await db.refresh(run)
+
     return run
+
+
+@async_router.get("", response_model=list[RunSummaryOut])
+async def list_runs_async(
+    response: Response,
+    prompt_id: uuid.UUID | None = None,
+    eval_run_id: uuid.UUID | None = None,
+    limit: int = Query(default=50, ge=1, le=200),
+    offset: int = Query(default=0, ge=0),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    stmt = _list_runs_stmt(prompt_id, eval_run_id, limit, offset, cursor)
+    runs = list((await db.execute(stmt)).all())
+    return set_next_cursor(response, runs, limit, key=lambda run: (run.created_at, run.id))
+
+
+@async_router.get("/{run_id}", response_model=RunOut)
+async def get_run_async(run_id: uuid.UUID, db: AsyncSession = Depends(get_async_db)):
+    return _require_run(await db.scalar(select(Run).where(Run.id == run_id)))
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException
+from psycopg.types.json import Jsonb
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.db import get_db
+from app.models import Run, Span
+from app.schemas.span import (
+    MAX_SPANS_PER_REQUEST,
+    OtlpKeyValue,
+    OtlpPartialSuccess,
+    OtlpSpan,
+    OtlpTracesIn,
+    OtlpTracesOut,
+    RunSpanTreeOut,
+    SpanBatchIn,
+    SpanIngestOut,
+    SpanNodeOut,
+)
+
+router = APIRouter(tags=["spans"])
+
+# OTLP spans name their run with this attribute, on the span or its resource.
+RUN_ID_ATTRIBUTE = "llm_evals.run_id"
+
+_SPAN_COLUMNS = "trace_id, span_id, parent_span_id, run_id, name, start_time, end_time, attributes"
+_HEX_TRACE_ID = re.compile(r"^[0-9a-f]{32}$")
+_HEX_SPAN_ID = re.compile(r"^[0-9a-f]{16}$")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _ingest(db: Session, rows: list[tuple]) -> tuple[int, int]:
+    """Insert span rows in one transaction; returns (rows whose run exists, rows inserted).
+
+    Rows are COPYed into a per-transaction staging table and moved over with a
+    single INSERT ... SELECT that drops spans of unknown runs and, via ON
+    CONFLICT DO NOTHING, spans already stored, neither of which COPY alone can
+    do. A whole batch is one round-trip for the data and one commit.
+    """
+
+    db.execute(
+        text(
+            "CREATE TEMP TABLE spans_stage (trace_id text, span_id text, parent_span_id text, run_id uuid, "
+            "name text, start_time timestamptz, end_time timestamptz, attributes jsonb) ON COMMIT DROP"
+        )
+    )
+    cursor = db.connection().connection.driver_connection.cursor()
+    with cursor.copy(f"COPY spans_stage ({_SPAN_COLUMNS}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+
+    known, inserted = db.execute(
+        text(
+            f"""
+            WITH known AS (
+              SELECT {_SPAN_COLUMNS} FROM spans_stage s
+              WHERE EXISTS (SELECT 1 FROM runs r WHERE r.id = s.run_id)
+            ), inserted AS (
+              INSERT INTO spans ({_SPAN_COLUMNS})
+              SELECT {_SPAN_COLUMNS} FROM known
+              ON CONFLICT (trace_id, span_id) DO NOTHING
+              RETURNING 1
+            )
+            SELECT (SELECT count(*) FROM known), (SELECT count(*) FROM inserted)
+            """
+        )
+    ).one()
+    db.commit()
+    return known, inserted
+
+
+@router.post("/spans", response_model=SpanIngestOut)
+def ingest_spans(payload: SpanBatchIn, db: Session = Depends(get_db)):
+    """Store a batch of spans (up to MAX_SPANS_PER_REQUEST) in one transaction.
+
+    Idempotent: spans already stored are counted as duplicates, so a client
+    can retry a failed batch as is. Spans whose run does not exist are dropped
+    and counted.
+    """
+
+    rows = [
+        (
+            s.trace_id,
+            s.span_id,
+            s.parent_span_id,
+            s.run_id,
+            s.name,
+            s.start_time,
+            s.end_time,
+            Jsonb(s.attributes) if s.attributes is not None else None,
+        )
+        for s in payload.spans
+    ]
+    known, inserted = _ingest(db, rows)
+    return SpanIngestOut(
+        received=len(rows), inserted=inserted, duplicates=known - inserted, unknown_run=len(rows) - known
+    )
+
+
+def _any_value(value: dict[str, Any]) -> Any:
+    """An OTLP AnyValue as plain JSON."""
+
+    if "stringValue" in value:
+        return value["stringValue"]
+    if "boolValue" in value:
+        return value["boolValue"]
+    if "intValue" in value:
+        return int(value["intValue"])  # int64s are JSON strings in OTLP
+    if "doubleValue" in value:
+        return float(value["doubleValue"])
+    if "arrayValue" in value:
+        return [_any_value(v) for v in value["arrayValue"].get("values", [])]
+    if "kvlistValue" in value:
+        return _attributes(OtlpKeyValue.model_validate(kv) for kv in value["kvlistValue"].get("values", []))
+    if "bytesValue" in value:
+        return value["bytesValue"]  # base64, kept as is
+    return None
+
+
+def _attributes(kvs) -> dict[str, Any]:
+    return {kv.key: _any_value(kv.value) for kv in kvs}
+
+
+def _unix_nano(ns: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=ns // 1000)
+
+
+def _otlp_row(span: OtlpSpan, resource_run_id: Any) -> tuple | None:
+    """The span as a row, or None if it has malformed ids, bad times or no run id."""
+
+    attributes = _attributes(span.attributes)
+    trace_id, span_id, parent = span.trace_id.lower(), span.span_id.lower(), span.parent_span_id.lower()
+    if not (_HEX_TRACE_ID.match(trace_id) and _HEX_SPAN_ID.match(span_id)):
+        return None
+    if parent and not _HEX_SPAN_ID.match(parent):
+        return None
+    if span.end_time_unix_nano < span.start_time_unix_nano:
+        return None
+    try:
+        run_id = uuid.UUID(str(attributes.pop(RUN_ID_ATTRIBUTE, resource_run_id)))
+    except ValueError:
+        return None
+
+    if span.kind:
+        attributes["otel.span_kind"] = span.kind
+    if span.status is not None and span.status.code:
+        attributes["otel.status_code"] = span.status.code
+        if span.status.message:
+            attributes["otel.status_description"] = span.status.message
+    return (
+        trace_id,
+        span_id,
+        parent or None,
+        run_id,
+        span.name,
+        _unix_nano(span.start_time_unix_nano),
+        _unix_nano(span.end_time_unix_nano),
+        Jsonb(attributes) if attributes else None,
+    )
+
+
+@router.post("/spans/otlp", response_model=OtlpTracesOut)
+def ingest_otlp_traces(payload: OtlpTracesIn, db: Session = Depends(get_db)):
+    """OTLP/HTTP JSON trace export (point OTEL_EXPORTER_OTLP_TRACES_ENDPOINT here).
+
+    Each span's run comes from its `llm_evals.run_id` attribute, or its
+    resource's. Spans without a valid run id, with malformed ids, or whose run
+    does not exist are rejected and counted in `partialSuccess`; the rest are
+    stored as by POST /api/spans. Span kind and status are kept as the
+    `otel.span_kind` / `otel.status_code` / `otel.status_description`
+    attributes.
+    """
+
+    rows: list[tuple] = []
+    rejected = 0
+    for resource_spans in payload.resource_spans:
+        resource = _attributes(resource_spans.resource.attributes) if resource_spans.resource else {}
+        resource_run_id = resource.get(RUN_ID_ATTRIBUTE)
+        for scope_spans in resource_spans.scope_spans:
+            for span in scope_spans.spans:
+                row = _otlp_row(span, resource_run_id)
+                if row is None:
+                    rejected += 1
+                else:
+                    rows.append(row)
+    if len(rows) + rejected > MAX_SPANS_PER_REQUEST:
+        raise HTTPException(status_code=422, detail=f"at most {MAX_SPANS_PER_REQUEST} spans per request")
+
+    known = _ingest(db, rows)[0] if rows else 0
+    rejected += len(rows) - known
+    message = ""
+    if rejected:
+        message = f"{rejected} span(s) without a valid, existing {RUN_ID_ATTRIBUTE} or with bad ids"
+    return OtlpTracesOut(partial_success=OtlpPartialSuccess(rejected_spans=rejected, error_message=message))
+
+
+@router.get("/runs/{run_id}/spans", response_model=RunSpanTreeOut)
+def get_run_span_tree(run_id: uuid.UUID, db: Session = Depends(get_db)):
+    """A run's spans as a tree, fetched with one range scan of ix_spans_run_id_start_time.
+
+    Rows come back in start order and the tree is linked in one pass, so
+    siblings stay in start order. A span whose parent is not among the run's
+    spans (e.g. a remote parent) is a root.
+    """
+
+    spans = db.execute(
+        select(
+            Span.trace_id,
+            Span.span_id,
+            Span.parent_span_id,
+            Span.name,
+            Span.start_time,
+            Span.end_time,
+            Span.attributes,
+        )
+        .where(Span.run_id == run_id)
+        .order_by(Span.start_time)
+    ).all()
+    if not spans and db.get(Run, run_id) is None:
+        raise HTTPException(status_code=404, detail="run not found")
+
+    nodes = {
+        (s.trace_id, s.span_id): SpanNodeOut(
+            trace_id=s.trace_id,
+            span_id=s.span_id,
+            parent_span_id=s.parent_span_id,
+            name=s.name,
+            start_time=s.start_time,
+            end_time=s.end_time,
+            duration_ms=(s.end_time - s.start_time) / timedelta(milliseconds=1),
+            attributes=s.attributes,
+        )
+        for s in spans
+    }
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get((node.trace_id, node.parent_span_id)) if node.parent_span_id else None
+        if parent is None:
+            roots.append(node)
+        else:
+            parent.children.append(node)
+    return RunSpanTreeOut(run_id=run_id, span_count=len(nodes), roots=roots)
@@ -0,0 +1,207 @@
+"""Blob store for large run payloads.
+
+Run outputs above RUN_OUTPUT_SPILL_BYTES are not stored in the runs row:
+`spill` writes them to the blob store and the row keeps a preview (the first
+RUN_PREVIEW_CHARS characters), the blob key and the full size. That keeps
+multi-hundred-KB outputs out of the table, its TOAST and every response that
+lists runs; the full body is read back from the store only when asked for.
+
+Blobs are content-addressed (the key is the sha256 of the bytes), so storing
+the same output twice, e.g. for every run served from the run result cache,
+keeps one copy, and writing is idempotent. `LocalBlobStore` keeps them as
+files on local disk; another backend (an object store) only has to provide
+`put`, `open`, and `keys` and `delete` for the sweep.
+
+Rows stop pointing at a blob when their runs partition is dropped (see
+app.partitions) or their run cache entry is evicted (see app.run_cache).
+`sweep`, run periodically by the worker, deletes the blobs nothing points at
+any more.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import os
+import re
+import time
+import uuid
+from collections.abc import Iterator
+from pathlib import Path
+from typing import BinaryIO, NamedTuple, Protocol
+
+from sqlalchemy import any_, bindparam, select, union
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from app.db import AdvisoryLock, try_advisory_xact_lock
+from app.models import Run, RunCacheEntry
+from app.settings import settings
+
+# Chunk size for streaming a blob out.
+READ_CHUNK_BYTES = 64 * 1024
+# The sweep leaves blobs written (or rewritten) this recently alone: their row
+# may not have committed yet.
+SWEEP_GRACE_SECONDS = 3600.0
+SWEEP_BATCH_KEYS = 1000
+
+_KEY = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobNotFoundError(Exception):
+    pass
+
+
+class BlobStore(Protocol):
+    def put(self, data: bytes) -> str:
+        """Store `data`; returns its key."""
+
+    def open(self, key: str) -> BinaryIO:
+        """The blob for reading; raises BlobNotFoundError."""
+
+    def keys(self, older_than_seconds: float) -> Iterator[str]:
+        """Keys of the blobs last written more than `older_than_seconds` ago."""
+
+    def delete(self, key: str, older_than_seconds: float) -> bool:
+        """Remove the blob, unless it was written in the last `older_than_seconds`; returns whether it was."""
+
+
+class LocalBlobStore:
+    """Blobs as files under `root`, at <root>/<key[:2]>/<key>.
+
+    A blob is written to a temporary file, synced and renamed, so a file under
+    its key is always complete and durable before the row pointing to it
+    commits. Storing a blob that exists touches its file, so the sweep sees it
+    as just written.
+    """
+
+    def __init__(self, root: str | os.PathLike[str]) -> None:
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        if not _KEY.match(key):
+            raise BlobNotFoundError(key)
+        return self.root / key[:2] / key
+
+    def put(self, data: bytes) -> str:
+        key = hashlib.sha256(data).hexdigest()
+        path = self._path(key)
+        if path.exists():
+            try:
+                os.utime(path)
+                return key
+            except FileNotFoundError:
+                pass  # swept meanwhile: write it again
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f"{key}.{uuid.uuid4().hex}.partial")
+        with open(partial, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(partial, path)
+        return key
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            return open(self._path(key), "rb")
+        except FileNotFoundError:
+            raise BlobNotFoundError(key) from None
+
+    def keys(self, older_than_seconds: float) -> Iterator[str]:
+        for path in self.root.glob("??/*"):
+            if _KEY.match(path.name) and self._older_than(path, older_than_seconds):
+                yield path.name
+
+    def delete(self, key: str, older_than_seconds: float) -> bool:
+        path = self._path(key)
+        if not self._older_than(path, older_than_seconds):
+            return False
+        path.unlink(missing_ok=True)
+        return True
+
+    @staticmethod
+    def _older_than(path: Path, seconds: float) -> bool:
+        try:
+            return path.stat().st_mtime < time.time() - seconds
+        except FileNotFoundError:
+            return False
+
+
+def get_blob_store() -> BlobStore:
+    if settings.blob_store == "local":
+        return LocalBlobStore(settings.blob_dir)
+    raise ValueError(f"unknown blob store: {settings.blob_store!r}")
+
+
+class StoredText(NamedTuple):
+    """A text as stored in a row: in full, or as a preview plus the blob holding it."""
+
+    text: str
+    blob_key: str | None = None
+    # UTF-8 bytes of the full text; only recorded for spilled texts.
+    size: int | None = None
+
+
+def spill(text: str, store: BlobStore | None = None) -> StoredText:
+    """`text` as it should be stored: inline if small enough, else spilled to the blob store."""
+
+    if settings.run_output_spill_bytes <= 0 or len(text) * 4 <= settings.run_output_spill_bytes:
+        return StoredText(text)  # cannot be over the limit, whatever the encoding
+    data = text.encode()
+    if len(data) <= settings.run_output_spill_bytes:
+        return StoredText(text)
+    key = (store or get_blob_store()).put(data)
+    return StoredText(text[: settings.run_preview_chars], key, len(data))
+
+
+def read_text(key: str, store: BlobStore | None = None) -> str:
+    with (store or get_blob_store()).open(key) as f:
+        return f.read().decode()
+
+
+def iter_blob(key: str, store: BlobStore | None = None) -> Iterator[bytes]:
+    """The blob in READ_CHUNK_BYTES chunks; the file is opened before the first one is asked for."""
+
+    f = (store or get_blob_store()).open(key)
+
+    def chunks() -> Iterator[bytes]:
+        with f:
+            while chunk := f.read(READ_CHUNK_BYTES):
+                yield chunk
+
+    return chunks()
+
+
+def sweep(db: Session, store: BlobStore | None = None, *, grace_seconds: float = SWEEP_GRACE_SECONDS) -> int:
+    """Delete the blobs no run or run cache entry points at; returns how many.
+
+    Blobs younger than `grace_seconds` are kept, since the row pointing at a
+    blob commits after the blob is written. Keys are checked in batches
+    against the partial output_blob_key indexes of both tables. Workers take
+    turns: a sweep under way makes the others return 0.
+    """
+
+    if not try_advisory_xact_lock(db, AdvisoryLock.BLOB_SWEEP):
+        db.rollback()
+        return 0
+    store = store or get_blob_store()
+    deleted = 0
+    keys = store.keys(grace_seconds)
+    while batch := list(itertools.islice(keys, SWEEP_BATCH_KEYS)):
+        candidates = bindparam("keys", batch, type_=ARRAY(Run.output_blob_key.type))
+        referenced = set(
+            db.scalars(
+                union(
+                    select(Run.output_blob_key).where(Run.output_blob_key == any_(candidates)),
+                    select(RunCacheEntry.output_blob_key).where(
+                        RunCacheEntry.output_blob_key == any_(candidates)
+                    ),
+                )
+            )
+        )
+        for key in batch:
+            # The age is checked again: the blob may have been stored for a new row meanwhile.
+            if key not in referenced and store.delete(key, grace_seconds):
+                deleted += 1
+    db.commit()
+    return deleted
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+from .settings import settings
+
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+
+class TTLCache(Generic[V]):
+    """Small thread-safe LRU cache with a per-entry TTL.
+
+    Sync route handlers run on FastAPI's threadpool, so every operation takes a
+    lock. Values are stored as-is; callers should cache immutable data.
+
+    Invalidation bumps a generation counter. A reader that missed, queried the
+    DB and then tries to `put` a value computed before a concurrent
+    invalidation passes the generation it observed at miss time; the write is
+    dropped if anything was invalidated in between, so a stale value can never
+    outlive the write that made it stale.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._data: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.stats = CacheStats()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> V | None:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def put(
+        self, key: Hashable, value: V, generation: int | None = None, ttl_seconds: float | None = None
+    ) -> None:
+        """Cache `value` for the cache's TTL, or for `ttl_seconds` if that is shorter."""
+
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+
+            self._data[key] = (self._clock() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._generation += 1
+            if self._data.pop(key, None) is not None:
+                self.stats.invalidations += 1
+
+    def keys(self) -> list[Hashable]:
+        with self._lock:
+            return list(self._data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def snapshot(self) -> dict[str, int | float]:
+        with self._lock:
+            lookups = self.stats.hits + self.stats.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.stats.hits,
+                "misses": self.stats.misses,
+                "evictions": self.stats.evictions,
+                "expirations": self.stats.expirations,
+                "invalidations": self.stats.invalidations,
+                "hit_ratio": (self.stats.hits / lookups) if lookups else 0.0,
+            }
+
+
+# Keyed by prompt name; values are (ETag, serialized PromptResolvedOut body).
+# The cache is per-process: with several API workers, a write on one worker is
+# only seen by the others once their entry expires, so keep the TTL short.
+prompt_resolve_cache: TTLCache[tuple[str, bytes]] = TTLCache(
+    max_entries=settings.prompt_cache_max_entries,
+    ttl_seconds=settings.prompt_cache_ttl_seconds,
+)
+
+
+# Keyed by (runner, Run.cache_key); values are cached run outputs (an
+# app.blobs.StoredText). Fronts the run_cache table for single run creation.
+# An entry expires no later than its row; one evicted for size by another
+# process may be served for up to the TTL after.
+run_result_cache: TTLCache[tuple] = TTLCache(
+    max_entries=settings.run_cache_memory_entries,
+    ttl_seconds=settings.run_cache_memory_ttl_seconds,
+)
@@ -1,11 +1,49 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from enum import IntEnum
 
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .pool import PoolWaitStats, timed_pool_class
 from .settings import settings
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
+sync_pool_stats = PoolWaitStats()
+async_pool_stats = PoolWaitStats()
+
+
+def _engine_kwargs() -> dict:
+    kwargs: dict = dict(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+    if settings.db_pgbouncer:
+        # psycopg 3 auto-prepares statements after 5 executions; under PgBouncer's
+        # transaction pooling the next transaction may land on a backend that has
+        # never seen them.
+        kwargs["connect_args"] = {"prepare_threshold": None}
+    return kwargs
+
+
+engine = create_engine(
+    settings.database_url,
+    poolclass=timed_pool_class(QueuePool, sync_pool_stats),
+    **_engine_kwargs(),
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# psycopg 3 speaks asyncio natively, so the same postgresql+psycopg:// URL works.
+# Engines connect lazily; this costs nothing unless settings.db_async is on.
+async_engine = create_async_engine(
+    settings.database_url,
+    poolclass=timed_pool_class(AsyncAdaptedQueuePool, async_pool_stats),
+    **_engine_kwargs(),
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 def get_db():
     db = SessionLocal()
@@ -13,3 +51,49 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Transaction-scoped advisory locks take two int4 keys: this namespace and one of
+# the AdvisoryLock keys. Every lock the app takes is listed there, so two features
+# cannot end up serializing on the same key by accident.
+ADVISORY_LOCK_NAMESPACE = 0x6C6C6D65  # "llme"
+
+
+class AdvisoryLock(IntEnum):
+    PARTITION_MAINTENANCE = 1
+    RUN_CLAIM = 2
+    BLOB_SWEEP = 3
+
+
+def advisory_xact_lock(db: Session, lock: AdvisoryLock) -> None:
+    """Wait for `lock` and hold it until the current transaction ends."""
+
+    db.execute(select(func.pg_advisory_xact_lock(ADVISORY_LOCK_NAMESPACE, int(lock))))
+
+
+def try_advisory_xact_lock(db: Session, lock: AdvisoryLock) -> bool:
+    """Take `lock` until the current transaction ends, unless another transaction holds it."""
+
+    return db.execute(select(func.pg_try_advisory_xact_lock(ADVISORY_LOCK_NAMESPACE, int(lock)))).scalar_one()
+
+
+def contains_nul(value: object) -> bool:
+    """Whether a JSON value has a NUL character in any string or key.
+
+    Postgres cannot store NUL in text or jsonb (it rejects the \\u0000 escape
+    too), so a write of such a value fails and takes its whole transaction
+    or COPY with it. Bulk ingestion checks each item first.
+    """
+
+    if isinstance(value, str):
+        return "\x00" in value
+    if isinstance(value, dict):
+        return any(contains_nul(k) or contains_nul(v) for k, v in value.items())
+    if isinstance(value, list):
+        return any(contains_nul(v) for v in value)
+    return False
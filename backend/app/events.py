@@ -0,0 +1,191 @@
+"""Run status events, pushed to watchers of GET /api/runs/{id}/events.
+
+The worker announces every status transition it makes with `notify`, in the
+transaction that makes it, so an event is only seen once the change is
+committed:
+
+- With RUN_EVENTS=postgres (the default) the events go out as one
+  `pg_notify` per batch on the `run_events` channel. Each API process holds a
+  single LISTEN connection, on a background thread of the `broker`, and fans
+  every notification out to the subscribers of that run.
+- With RUN_EVENTS=memory they are handed to this process's `broker` when the
+  session commits. That only reaches watchers when the worker runs in the
+  API process (tests, a single-node deployment).
+
+Events are small (the run id, its new status and the start time when
+running); watchers read anything else from the row. A subscriber whose
+queue overflows, or that may have missed events while the listener was
+(re)connecting, gets a `RESYNC` marker instead, telling it to re-read the
+run.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import uuid
+
+import psycopg
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "run_events"
+# Events buffered per subscriber before it is told to resync instead.
+SUBSCRIBER_QUEUE_SIZE = 64
+# Seconds between reconnection attempts of the LISTEN connection.
+RECONNECT_DELAY_SECONDS = 1.0
+
+# Queued to a subscriber in place of events it may have missed.
+RESYNC = None
+
+_PENDING = "run_events_pending"
+
+_NOTIFY = text(f"SELECT pg_notify('{CHANNEL}', payload) FROM unnest(CAST(:payloads AS text[])) AS payload")
+
+
+def _encode(event: dict) -> str:
+    return json.dumps(event, default=str, separators=(",", ":"))
+
+
+def notify(db: Session, events: list[dict]) -> None:
+    """Announce `events` ({"id": ..., "status": ..., ...}) when `db`'s transaction commits."""
+
+    if not events:
+        return
+    if settings.run_events == "postgres":
+        db.execute(_NOTIFY, {"payloads": [_encode(e) for e in events]})
+    else:
+        db.info.setdefault(_PENDING, []).extend(events)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(db: Session) -> None:
+    pending = db.info.pop(_PENDING, None)
+    if pending:
+        # Round-tripped so subscribers see the same event as from a notification.
+        broker.dispatch([json.loads(_encode(e)) for e in pending])
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(db: Session) -> None:
+    db.info.pop(_PENDING, None)
+
+
+class Subscription:
+    """One watcher's queue of events for one run, filled from any thread."""
+
+    def __init__(self, broker: RunEventBroker, run_id: uuid.UUID) -> None:
+        self.broker = broker
+        self.run_id = run_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[dict | None] = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+
+    def offer(self, event: dict | None) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            pass  # the loop is closed; its watcher is gone
+
+    def _put(self, event: dict | None) -> None:
+        if self.queue.full():
+            # Whatever is queued is stale once a resync is due.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = RESYNC
+        self.queue.put_nowait(event)
+
+    async def get(self) -> dict | None:
+        return await self.queue.get()
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class RunEventBroker:
+    """Fans run events out to the subscriptions of each run.
+
+    Thread-safe; `subscribe` must be called from the event loop the
+    subscription will be read on. With RUN_EVENTS=postgres the first
+    subscription starts the listener thread, which keeps one connection open
+    for the life of the process.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscriptions: dict[uuid.UUID, set[Subscription]] = {}
+        self._listener: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def subscribe(self, run_id: uuid.UUID) -> Subscription:
+        subscription = Subscription(self, run_id)
+        with self._lock:
+            self._subscriptions.setdefault(run_id, set()).add(subscription)
+            if settings.run_events == "postgres" and self._listener is None:
+                self._stop.clear()
+                self._listener = threading.Thread(target=self._listen, name="run-events", daemon=True)
+                self._listener.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.run_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.run_id]
+
+    def subscriber_count(self, run_id: uuid.UUID) -> int:
+        with self._lock:
+            return len(self._subscriptions.get(run_id, ()))
+
+    def dispatch(self, events: list[dict]) -> None:
+        """Deliver decoded events to the subscribers of their runs."""
+
+        with self._lock:
+            targets = [
+                (subscription, e)
+                for e in events
+                for subscription in self._subscriptions.get(uuid.UUID(e["id"]), ())
+            ]
+        for subscription, e in targets:
+            subscription.offer(e)
+
+    def resync_all(self) -> None:
+        with self._lock:
+            targets = [s for subscriptions in self._subscriptions.values() for s in subscriptions]
+        for subscription in targets:
+            subscription.offer(RESYNC)
+
+    def close(self) -> None:
+        with self._lock:
+            listener, self._listener = self._listener, None
+        if listener is not None:
+            self._stop.set()
+            listener.join()
+
+    def _listen(self) -> None:
+        url = make_url(settings.run_events_database_url or settings.database_url)
+        conninfo = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(conninfo, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {CHANNEL}")
+                    # Anything that happened before LISTEN took effect was missed.
+                    self.resync_all()
+                    while not self._stop.is_set():
+                        # Wakes up every second to check for close().
+                        for notification in conn.notifies(timeout=1.0):
+                            self.dispatch([json.loads(notification.payload)])
+            except Exception:
+                logger.exception("run events listener failed; reconnecting")
+                self._stop.wait(RECONNECT_DELAY_SECONDS)
+
+
+broker = RunEventBroker()
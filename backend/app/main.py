@@ -1,24 +1,101 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 
+from app.api.datasets import router as datasets_router
+from app.api.eval_runs import router as eval_runs_router
+from app.api.prompts import async_router as prompts_async_router
 from app.api.prompts import router as prompts_router
+from app.api.run_metrics import router as run_metrics_router
+from app.api.runs import async_router as runs_async_router
 from app.api.runs import router as runs_router
+from app.api.spans import router as spans_router
+from app import observability
+from app.db import async_engine, engine
+from app.events import broker
+from app.pool import pool_snapshot
+from app.settings import settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Stops the run events listener, if a watcher started it.
+    broker.close()
+
+
+def create_app(
+    db_async: bool = settings.db_async,
+    metrics: bool = settings.metrics_enabled,
+    query_headers: bool = settings.debug_query_headers,
+) -> FastAPI:
+    app = FastAPI(title="llm-evals-platform", lifespan=lifespan)
+
+    # v0 CORS: allow local Next dev server. Tighten later.
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["ETag", "X-Next-Cursor", "X-DB-Queries", "Server-Timing"],
+    )
+    if metrics or query_headers:
+        observability.instrument_engine(engine)
+        observability.instrument_engine(async_engine.sync_engine)
+    if query_headers:
+        app.add_middleware(observability.QueryHeadersMiddleware)
+    if metrics:
+        # Added last, so it runs first and its timing includes the other middleware.
+        app.add_middleware(observability.MetricsMiddleware)
+
+        @app.get("/metrics", include_in_schema=False)
+        def prometheus_metrics():
+            return Response(observability.render(), media_type=CONTENT_TYPE_LATEST)
+
+    if db_async:
+        # Routes match in registration order, so the async handlers shadow their
+        # sync twins; endpoints without an async variant fall through to the sync routers.
+        app.include_router(prompts_async_router, prefix="/api")
+        app.include_router(runs_async_router, prefix="/api")
+
+    app.include_router(prompts_router, prefix="/api")
+    app.include_router(runs_router, prefix="/api")
+    app.include_router(datasets_router, prefix="/api")
+    app.include_router(eval_runs_router, prefix="/api")
+    app.include_router(spans_router, prefix="/api")
+    app.include_router(run_metrics_router, prefix="/api")
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
 
-app = FastAPI(title="llm-evals-platform")
+    @app.get("/health/db")
+    def health_db(response: Response):
+        status = "ok"
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except SQLAlchemyError:
+            status = "unavailable"
+            response.status_code = 503
 
-# v0 CORS: allow local Next dev server. Tighten later.
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+        return {
+            "status": status,
+            "pgbouncer": settings.db_pgbouncer,
+            "pre_ping": settings.db_pool_pre_ping,
+            "recycle_seconds": settings.db_pool_recycle,
+            "pools": {
+                "sync": pool_snapshot(engine.pool),
+                "async": pool_snapshot(async_engine.pool),
+            },
+        }
 
-app.include_router(prompts_router, prefix="/api")
-app.include_router(runs_router, prefix="/api")
+    return app
 
 
-@app.get("/health")
-def health():
-    return {"status": "ok"}
+app = create_app()
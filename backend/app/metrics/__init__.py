@@ -0,0 +1,15 @@
+"""Vectorized scoring of (output, expected) columns: `score("token_f1", outputs, expected)`."""
+
+from .compare import PairedComparison, compare_paired
+from .scoring import METRICS, Metric, MetricError, metric_params, score, summarize
+
+__all__ = [
+    "METRICS",
+    "Metric",
+    "MetricError",
+    "PairedComparison",
+    "compare_paired",
+    "metric_params",
+    "score",
+    "summarize",
+]
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+# Resampling draws one count per distinct delta value rather than one index
+# per item, so its cost is resamples x distinct values, independent of how
+# many items the suite has. Continuous metrics are binned down to this many
+# values; a bin is represented by the mean of its deltas, so sums (and the
+# observed mean) are exact and only within-bin spread is lost.
+MAX_DISTINCT_DELTAS = 256
+
+
+@dataclass(frozen=True)
+class PairedComparison:
+    n: int
+    baseline_mean: float
+    candidate_mean: float
+    delta: float
+    ci_low: float
+    ci_high: float
+    p_value: float
+
+
+def _support(deltas: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Distinct delta values and their counts, binned if there are too many."""
+
+    values, counts = np.unique(deltas, return_counts=True)
+    if len(values) <= MAX_DISTINCT_DELTAS:
+        return values, counts
+
+    edges = np.linspace(values[0], values[-1], MAX_DISTINCT_DELTAS + 1)
+    bins = np.clip(np.searchsorted(edges, deltas, side="right") - 1, 0, MAX_DISTINCT_DELTAS - 1)
+    counts = np.bincount(bins, minlength=MAX_DISTINCT_DELTAS)
+    sums = np.bincount(bins, weights=deltas, minlength=MAX_DISTINCT_DELTAS)
+    used = counts > 0
+    return sums[used] / counts[used], counts[used]
+
+
+def compare_paired(
+    candidate: np.ndarray,
+    baseline: np.ndarray,
+    *,
+    confidence: float = 0.95,
+    resamples: int = 2000,
+    seed: int = 0,
+) -> PairedComparison:
+    """Compare per-item scores of two runs over the same items (candidate[i] pairs with baseline[i]).
+
+    - delta: mean of candidate - baseline.
+    - ci_low/ci_high: percentile bootstrap interval for delta, resampling items
+      with replacement (multinomial counts over the distinct deltas).
+    - p_value: two-sided paired sign-flip permutation test of "no difference":
+      under the null each item's delta is equally likely to have either sign.
+      For 0/1 metrics this is the randomization form of McNemar's test.
+
+    The generator is seeded, so the same inputs always give the same result.
+    """
+
+    if candidate.shape != baseline.shape:
+        raise ValueError("candidate and baseline must be paired (same length)")
+    n = len(candidate)
+    if n == 0:
+        return PairedComparison(0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+
+    rng = np.random.default_rng(seed)
+    deltas = candidate - baseline
+    observed = float(deltas.mean())
+    alpha = 1 - confidence
+
+    values, counts = _support(deltas)
+    draws = rng.multinomial(n, counts / n, size=resamples)
+    boot = draws @ values / n
+    ci_low, ci_high = np.quantile(boot, [alpha / 2, 1 - alpha / 2])
+
+    nonzero = deltas != 0
+    if not nonzero.any():
+        p_value = 1.0
+    else:
+        magnitudes, mag_counts = _support(np.abs(deltas[nonzero]))
+        positives = rng.binomial(mag_counts, 0.5, size=(resamples, len(mag_counts)))
+        null = (2 * positives - mag_counts) @ magnitudes / n
+        # Small tolerance so ties with the observed statistic count as extreme.
+        extreme = np.count_nonzero(np.abs(null) >= abs(observed) - 1e-12)
+        p_value = (extreme + 1) / (resamples + 1)
+
+    return PairedComparison(
+        n=n,
+        baseline_mean=float(baseline.mean()),
+        candidate_mean=float(candidate.mean()),
+        delta=observed,
+        ci_low=float(ci_low),
+        ci_high=float(ci_high),
+        p_value=float(p_value),
+    )
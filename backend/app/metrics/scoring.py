@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import inspect
+import json
+import math
+import re
+from collections.abc import Callable, Sequence
+from typing import Any
+
+import numpy as np
+
+from .tokens import Tokens, clipped_overlap, ngram_streams, ngrams, tokenize
+
+# A metric maps n outputs and n expected values to n scores in [0, 1].
+Metric = Callable[..., np.ndarray]
+
+_NUMBER = re.compile(r"[-+]?(?:\d[\d,]*(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+class MetricError(ValueError):
+    """Unknown metric, bad parameters, or inputs a metric cannot score."""
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _texts(values: Sequence[Any]) -> list[str]:
+    # Almost every value is already a str; skip the call for those.
+    return [v if type(v) is str else _text(v) for v in values]
+
+
+def _f1(matches: np.ndarray, out_len: np.ndarray, exp_len: np.ndarray) -> np.ndarray:
+    total = out_len + exp_len
+    return np.divide(2 * matches, total, out=np.zeros(len(matches)), where=total > 0)
+
+
+def exact_match(outputs: Sequence[str | None], expected: Sequence[Any]) -> np.ndarray:
+    """1 if the output equals the expected value, ignoring leading/trailing whitespace."""
+
+    # Comparing Python strs in C (map) beats numpy's string ufuncs here: converting
+    # both columns to a numpy string dtype costs more than the comparison itself.
+    same = map(str.__eq__, map(str.strip, _texts(outputs)), map(str.strip, _texts(expected)))
+    return np.fromiter(same, dtype=np.float64, count=len(outputs))
+
+
+def _squad_tokens(outputs: Sequence[str | None], expected: Sequence[Any]) -> Tokens:
+    # SQuAD answer normalization: lowercase, drop punctuation and articles,
+    # collapse whitespace.
+    return tokenize(_texts(outputs), _texts(expected), strip_punctuation=True, drop_articles=True)
+
+
+def normalized_match(outputs: Sequence[str | None], expected: Sequence[Any]) -> np.ndarray:
+    """1 if output and expected are equal after SQuAD-style normalization."""
+
+    tokens = _squad_tokens(outputs, expected)
+    n = tokens.n
+    out_len, exp_len = tokens.lengths()
+    same = out_len == exp_len
+
+    # For pairs of equal length the selected output and expected tokens line
+    # up position by position, so one vectorized comparison checks them all.
+    out_part = tokens.rows < n
+    out_rows, exp_rows = tokens.rows[out_part], tokens.rows[~out_part] - n
+    out_sel = same[out_rows]
+    exp_sel = same[exp_rows]
+    differs = tokens.ids[out_part][out_sel] != tokens.ids[~out_part][exp_sel]
+    same[out_rows[out_sel][differs]] = False
+    return same.astype(np.float64)
+
+
+def token_f1(outputs: Sequence[str | None], expected: Sequence[Any]) -> np.ndarray:
+    """SQuAD token F1: harmonic mean of token precision and recall after normalization.
+
+    If either side has no tokens the score is 1 when both are empty, else 0.
+    """
+
+    tokens = _squad_tokens(outputs, expected)
+    out_len, exp_len = tokens.lengths()
+    scores = _f1(clipped_overlap(tokens), out_len, exp_len)
+    empty = (out_len == 0) | (exp_len == 0)
+    scores[empty] = (out_len == exp_len)[empty]
+    return scores
+
+
+def _rouge(outputs: Sequence[str | None], expected: Sequence[Any], order: int) -> np.ndarray:
+    grams = ngrams(tokenize(_texts(outputs), _texts(expected), strip_punctuation=False), order)
+    out_len, exp_len = grams.lengths()
+    return _f1(clipped_overlap(grams), out_len, exp_len)
+
+
+def rouge1(outputs: Sequence[str | None], expected: Sequence[Any]) -> np.ndarray:
+    """ROUGE-1 F-measure (unigram overlap; lowercased, punctuation splits tokens)."""
+
+    return _rouge(outputs, expected, 1)
+
+
+def rouge2(outputs: Sequence[str | None], expected: Sequence[Any]) -> np.ndarray:
+    """ROUGE-2 F-measure (bigram overlap)."""
+
+    return _rouge(outputs, expected, 2)
+
+
+def bleu(outputs: Sequence[str | None], expected: Sequence[Any], *, max_order: int = 4) -> np.ndarray:
+    """Sentence BLEU with add-one smoothing for orders above 1 (BLEU+1, Lin & Och 2004).
+
+    The expected value is the single reference. Outputs with no unigram match
+    score 0.
+    """
+
+    if not 1 <= max_order <= 8:
+        raise MetricError("max_order must be between 1 and 8")
+
+    tokens = tokenize(_texts(outputs), _texts(expected), strip_punctuation=False)
+    out_len, exp_len = tokens.lengths()
+    log_precision = np.zeros(tokens.n)
+    unigram_hits = np.zeros(tokens.n)
+    for order, grams in enumerate(ngram_streams(tokens, max_order), start=1):
+        matches = clipped_overlap(grams)
+        candidates = np.maximum(out_len - order + 1, 0)
+        if order == 1:
+            unigram_hits = matches
+            precision = np.divide(matches, candidates, out=np.zeros(tokens.n), where=candidates > 0)
+        else:
+            precision = (matches + 1) / (candidates + 1)
+        with np.errstate(divide="ignore"):
+            log_precision += np.log(precision)
+
+    with np.errstate(divide="ignore"):
+        brevity = np.minimum(0.0, 1 - np.divide(exp_len, out_len, out=np.zeros(tokens.n), where=out_len > 0))
+    scores = np.exp(brevity + log_precision / max_order)
+    scores[unigram_hits == 0] = 0.0
+    return scores
+
+
+def _memoized(fn: Callable[[str], Any], values: Sequence[str]) -> list[Any]:
+    # Eval outputs and references repeat a lot; evaluate each distinct value once.
+    memo: dict[str, Any] = {}
+    return [memo[v] if v in memo else memo.setdefault(v, fn(v)) for v in values]
+
+
+def regex(
+    outputs: Sequence[str | None],
+    expected: Sequence[Any],
+    *,
+    pattern: str | None = None,
+    ignore_case: bool = False,
+) -> np.ndarray:
+    """1 if the output contains a match of `pattern`, or of the expected value when no pattern is given.
+
+    There is no vectorized regex engine; each distinct (pattern, output) pair
+    is searched once.
+    """
+
+    flags = re.IGNORECASE if ignore_case else 0
+
+    def compile_(p: str) -> re.Pattern:
+        try:
+            return re.compile(p, flags)
+        except re.error as e:
+            raise MetricError(f"invalid pattern {p!r}: {e}") from e
+
+    texts = _texts(outputs)
+    if pattern is not None:
+        search = compile_(pattern).search
+        return np.array(_memoized(lambda s: search(s) is not None, texts), dtype=np.float64)
+
+    compiled = _memoized(compile_, _texts(expected))
+    memo: dict[tuple[str, str], bool] = {}
+    hits = []
+    for rx, text in zip(compiled, texts):
+        key = (rx.pattern, text)
+        if key not in memo:
+            memo[key] = rx.search(text) is not None
+        hits.append(memo[key])
+    return np.array(hits, dtype=np.float64)
+
+
+def _last_number(text: str) -> float:
+    matches = _NUMBER.findall(text)
+    if not matches:
+        return math.nan
+    try:
+        return float(matches[-1].replace(",", ""))
+    except ValueError:
+        return math.nan
+
+
+def _number(value: Any) -> float:
+    if isinstance(value, bool) or value is None:
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    return _last_number(_text(value))
+
+
+def numeric(
+    outputs: Sequence[str | None],
+    expected: Sequence[Any],
+    *,
+    abs_tol: float = 1e-6,
+    rel_tol: float = 0.0,
+) -> np.ndarray:
+    """1 if the last number in the output is within tolerance of the expected number.
+
+    Within tolerance means |output - expected| <= abs_tol + rel_tol * |expected|.
+    Thousands separators are ignored ("1,234" is 1234).
+    """
+
+    if abs_tol < 0 or rel_tol < 0:
+        raise MetricError("tolerances must be >= 0")
+    got = np.array(_memoized(_last_number, _texts(outputs)), dtype=np.float64)
+    want = np.fromiter((_number(v) for v in expected), dtype=np.float64, count=len(expected))
+    return np.isclose(got, want, rtol=rel_tol, atol=abs_tol).astype(np.float64)
+
+
+METRICS: dict[str, Metric] = {
+    "exact_match": exact_match,
+    "normalized_match": normalized_match,
+    "regex": regex,
+    "numeric": numeric,
+    "token_f1": token_f1,
+    "bleu": bleu,
+    "rouge1": rouge1,
+    "rouge2": rouge2,
+}
+
+
+def metric_params(name: str) -> set[str]:
+    """The keyword parameters a metric accepts."""
+
+    signature = inspect.signature(METRICS[name])
+    return {p.name for p in signature.parameters.values() if p.kind is inspect.Parameter.KEYWORD_ONLY}
+
+
+def score(
+    name: str,
+    outputs: Sequence[str | None],
+    expected: Sequence[Any],
+    params: dict[str, Any] | None = None,
+) -> np.ndarray:
+    """Score a column of outputs against a column of expected values.
+
+    A missing output (None, e.g. a failed run) always scores 0.
+    """
+
+    if name not in METRICS:
+        raise MetricError(f"unknown metric {name!r}")
+    if len(outputs) != len(expected):
+        raise MetricError("outputs and expected must have the same length")
+    params = params or {}
+    unknown = set(params) - metric_params(name)
+    if unknown:
+        raise MetricError(f"unknown parameter(s) for {name}: {', '.join(sorted(unknown))}")
+
+    try:
+        scores = METRICS[name](outputs, expected, **params)
+    except TypeError as e:
+        raise MetricError(f"bad parameters for {name}: {e}") from e
+    missing = np.fromiter((o is None for o in outputs), dtype=bool, count=len(outputs))
+    scores[missing] = 0.0
+    return scores
+
+
+def summarize(scores: np.ndarray) -> dict[str, float | int]:
+    """count, mean, sample standard deviation, min and max of a score column."""
+
+    count = len(scores)
+    if count == 0:
+        return {"count": 0, "mean": 0.0, "stddev": 0.0, "min": 0.0, "max": 0.0}
+    return {
+        "count": count,
+        "mean": float(scores.mean()),
+        "stddev": float(scores.std(ddof=1)) if count > 1 else 0.0,
+        "min": float(scores.min()),
+        "max": float(scores.max()),
+    }
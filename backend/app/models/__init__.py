@@ -1,6 +1,29 @@
 from .base import Base
+from .dataset import Dataset, DatasetItem
+from .eval_run import EvalRun
 from .prompt import Prompt, PromptVersion, prompt_tags
+from .rollup import RunRollup
 from .run import Run
+from .run_cache import RunCacheEntry
+from .run_output_chunk import RunOutputChunk
+from .score import EvalRunScore, RunScore
+from .span import Span
 from .tag import Tag
 
-__all__ = ["Base", "Prompt", "PromptVersion", "prompt_tags", "Run", "Tag"]
+__all__ = [
+    "Base",
+    "Dataset",
+    "DatasetItem",
+    "EvalRun",
+    "EvalRunScore",
+    "Prompt",
+    "PromptVersion",
+    "prompt_tags",
+    "Run",
+    "RunCacheEntry",
+    "RunOutputChunk",
+    "RunRollup",
+    "RunScore",
+    "Span",
+    "Tag",
+]
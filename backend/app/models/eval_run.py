@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import CheckConstraint, DateTime, ForeignKey, Index, Integer, String, func, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class EvalRun(Base):
+    """A prompt version evaluated against every item of a dataset (one Run per item)."""
+
+    __tablename__ = "eval_runs"
+    __table_args__ = (
+        CheckConstraint("status in ('running','completed')", name="ck_eval_runs_status"),
+        Index("ix_eval_runs_created_at_id", "created_at", "id"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    prompt_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("prompts.id", ondelete="RESTRICT"),
+        nullable=False,
+    )
+    prompt_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    dataset_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("datasets.id", ondelete="RESTRICT"),
+        nullable=False,
+    )
+    status: Mapped[str] = mapped_column(String(32), nullable=False, server_default="running")
+
+    # Progress counters, bumped by the worker in the same transaction that
+    # finishes each run, so reading progress never needs COUNT(*) over runs.
+    total: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    succeeded: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    failed: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
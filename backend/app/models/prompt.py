@@ -6,8 +6,10 @@ from typing import TYPE_CHECKING
 
 from sqlalchemy import (
     Column,
+    Computed,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Table,
@@ -16,7 +18,7 @@ from sqlalchemy import (
     func,
     text,
 )
-from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -24,6 +26,10 @@ from .base import Base
 if TYPE_CHECKING:
     from .tag import Tag
 
+# Text search configuration shared by the generated search_vector columns and the
+# queries that search them.
+SEARCH_CONFIG = "english"
+
 prompt_tags = Table(
     "prompt_tags",
     Base.metadata,
@@ -45,18 +51,54 @@ prompt_tags = Table(
 
 class Prompt(Base):
     __tablename__ = "prompts"
+    __table_args__ = (
+        Index("ix_prompts_created_at_id", "created_at", "id"),
+        # pg_trgm indexes: serve ILIKE '%q%' and similarity (`%`) lookups.
+        Index(
+            "ix_prompts_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_prompts_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+        Index("ix_prompts_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name: Mapped[str] = mapped_column(String(200), unique=True, index=True)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     active_version: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("1"))
+    # Version that eval runs are compared against by default (regression checks).
+    baseline_version: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Highest PromptVersion.version for this prompt, maintained on version create.
+    max_version: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("1"))
+    # Name outranks description in full-text search. Deferred: never needed in Python.
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', name), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
+    # The API reads versions and tags with explicit (batched) queries. Touching an
+    # unloaded collection raises instead of lazy-loading one prompt at a time, and
+    # deletes leave the child rows to ON DELETE CASCADE instead of loading them first.
     versions: Mapped[list["PromptVersion"]] = relationship(
         "PromptVersion",
         back_populates="prompt",
         cascade="all, delete-orphan",
         order_by=lambda: PromptVersion.version.desc(),
+        lazy="raise_on_sql",
+        passive_deletes=True,
     )
 
     tags: Mapped[list["Tag"]] = relationship(
@@ -64,12 +106,17 @@ class Prompt(Base):
         secondary=prompt_tags,
         back_populates="prompts",
         order_by="Tag.name",
+        lazy="raise_on_sql",
+        passive_deletes=True,
     )
 
 
 class PromptVersion(Base):
     __tablename__ = "prompt_versions"
-    __table_args__ = (UniqueConstraint("prompt_id", "version", name="uq_prompt_versions_prompt_id_version"),)
+    __table_args__ = (
+        UniqueConstraint("prompt_id", "version", name="uq_prompt_versions_prompt_id_version"),
+        Index("ix_prompt_versions_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     prompt_id: Mapped[uuid.UUID] = mapped_column(
@@ -81,5 +128,11 @@ class PromptVersion(Base):
     content: Mapped[str] = mapped_column(Text)
     parameters: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Stored rather than an expression index so ranking does not re-parse content.
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{SEARCH_CONFIG}', content)", persisted=True),
+        deferred=True,
+    )
 
     prompt: Mapped[Prompt] = relationship("Prompt", back_populates="versions")
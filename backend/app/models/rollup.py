@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import CheckConstraint, DateTime, Float, ForeignKey, Integer, String, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class RunRollup(Base):
+    """Executed runs of one prompt version that finished within one UTC minute, hour or day, aggregated.
+
+    Maintained by the worker in the transaction that records the runs (see
+    app.rollups), at all three granularities, so a latency and error-rate
+    query reads one row per bucket it returns instead of every run. Keyed
+    prompt-first, then granularity and time: a prompt's window is one
+    primary-key range scan, with or without a version filter.
+
+    latency_histogram counts succeeded runs per log-scale latency bucket
+    (app.rollups.LATENCY_BUCKETS). Histograms add up elementwise, so merging
+    rows (versions, a whole window) loses nothing beyond the bucket width.
+    wait_histogram counts all runs by time spent queued, in the same buckets;
+    rows written before it existed have it all zeros.
+    """
+
+    __tablename__ = "run_rollups"
+    __table_args__ = (
+        CheckConstraint("granularity in ('minute','hour','day')", name="ck_run_rollups_granularity"),
+    )
+
+    prompt_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("prompts.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    granularity: Mapped[str] = mapped_column(String(8), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    prompt_version: Mapped[int] = mapped_column(Integer, primary_key=True)
+    runs: Mapped[int] = mapped_column(Integer, nullable=False)
+    failed: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Over succeeded runs, in milliseconds.
+    latency_sum_ms: Mapped[float] = mapped_column(Float, nullable=False)
+    latency_max_ms: Mapped[float] = mapped_column(Float, nullable=False)
+    latency_histogram: Mapped[list[int]] = mapped_column(ARRAY(Integer), nullable=False)
+    # Over all runs: created_at to started_at, in milliseconds.
+    wait_sum_ms: Mapped[float] = mapped_column(Float, nullable=False, server_default="0")
+    wait_max_ms: Mapped[float] = mapped_column(Float, nullable=False, server_default="0")
+    wait_histogram: Mapped[list[int]] = mapped_column(
+        ARRAY(Integer), nullable=False, server_default=text("array_fill(0, ARRAY[178])")
+    )
@@ -3,7 +3,20 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import CheckConstraint, DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import (
+    Boolean,
+    CheckConstraint,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    func,
+    text,
+)
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -11,12 +24,63 @@ from .base import Base
 
 
 class Run(Base):
+    """One execution of a prompt version on an input.
+
+    The table is range-partitioned by month on created_at (see
+    app.partitions), so its primary key has to include created_at. Runs are
+    still identified by id alone: the mapper's primary key is just id, and a
+    lookup by id probes each partition's primary key index.
+    """
+
     __tablename__ = "runs"
     __table_args__ = (
         CheckConstraint(
             "status in ('queued','running','succeeded','failed')",
             name="ck_runs_status",
         ),
+        # Keyset pagination (newest-first), globally and per prompt. The per-prompt
+        # index also serves the prompt_id foreign key.
+        Index("ix_runs_created_at_id", "created_at", "id"),
+        Index("ix_runs_prompt_id_created_at_id", "prompt_id", "created_at", "id"),
+        # Worker queue: only queued rows are indexed, so claiming stays O(batch)
+        # no matter how many finished runs accumulate.
+        Index("ix_runs_queued_created_at", "created_at", postgresql_where=text("status = 'queued'")),
+        # Scheduler: the prompts with queued runs (skipping through the index one
+        # prompt at a time), each prompt's oldest queued runs, and runs in flight.
+        Index(
+            "ix_runs_queued_prompt_id_created_at",
+            "prompt_id",
+            "created_at",
+            postgresql_where=text("status = 'queued'"),
+        ),
+        Index("ix_runs_running_prompt_id", "prompt_id", postgresql_where=text("status = 'running'")),
+        # Lease sweep: running runs whose worker stopped renewing them.
+        Index(
+            "ix_runs_running_lease_expires_at",
+            "lease_expires_at",
+            postgresql_where=text("status = 'running'"),
+        ),
+        # Eval runs: listing an eval's runs, and the foreign keys' ON DELETE
+        # actions, which would otherwise scan every run per deleted parent row.
+        Index(
+            "ix_runs_eval_run_id_created_at_id",
+            "eval_run_id",
+            "created_at",
+            "id",
+            postgresql_where=text("eval_run_id IS NOT NULL"),
+        ),
+        Index(
+            "ix_runs_dataset_item_id",
+            "dataset_item_id",
+            postgresql_where=text("dataset_item_id IS NOT NULL"),
+        ),
+        # Blob sweep: which blobs are still referenced (see app.blobs.sweep).
+        Index(
+            "ix_runs_output_blob_key",
+            "output_blob_key",
+            postgresql_where=text("output_blob_key IS NOT NULL"),
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -24,16 +88,61 @@ class Run(Base):
     prompt_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("prompts.id", ondelete="RESTRICT"),
-        index=True,
     )
     prompt_version: Mapped[int] = mapped_column(Integer, nullable=False)
 
+    # Set for runs fanned out by an eval run, one per dataset item.
+    eval_run_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("eval_runs.id", ondelete="CASCADE"),
+        nullable=True,
+    )
+    dataset_item_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("dataset_items.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+
     status: Mapped[str] = mapped_column(String(32), nullable=False, server_default="queued")
 
     input: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    # With output_blob_key set, `output` is only a preview: the full output
+    # (output_size bytes) is in the blob store under that key (see app.blobs).
     output: Mapped[str | None] = mapped_column(Text, nullable=True)
+    output_blob_key: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    output_size: Mapped[int | None] = mapped_column(Integer, nullable=True)
     error: Mapped[str | None] = mapped_column(Text, nullable=True)
 
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Content address of what the run executes: the prompt version (which pins
+    # content and parameters) and the input, hashed in its canonical jsonb form
+    # so key order and whitespace do not matter. Keys the run result cache.
+    cache_key: Mapped[bytes] = mapped_column(
+        LargeBinary,
+        Computed(
+            "sha256(uuid_send(prompt_id) || int4send(prompt_version) || coalesce(jsonb_send(input), ''))",
+            persisted=True,
+        ),
+    )
+    # Served from the run result cache at creation instead of executed.
+    cache_hit: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default=text("false"))
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, server_default=func.now()
+    )
     started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # When a streaming runner produced the first output chunk; None for runners
+    # that only return whole outputs. first_token_at - started_at is the
+    # run's time to first token.
+    first_token_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # How many times the run has been claimed, and until when the current claim's
+    # worker holds it (see app.worker.queue): it renews the lease while the run
+    # executes, and a run whose lease ran out is requeued or failed.
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __mapper_args__ = {"primary_key": [id]}
+
+    @property
+    def output_truncated(self) -> bool:
+        return self.output_blob_key is not None
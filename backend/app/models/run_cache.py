@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, LargeBinary, String, Text, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class RunCacheEntry(Base):
+    """Output of a succeeded run, keyed by its Run.cache_key and the runner that produced it."""
+
+    __tablename__ = "run_cache"
+    __table_args__ = (
+        # Expiry and size eviction both delete oldest-first.
+        Index("ix_run_cache_created_at", "created_at"),
+        # Blob sweep: which blobs are still referenced (see app.blobs.sweep).
+        Index(
+            "ix_run_cache_output_blob_key",
+            "output_blob_key",
+            postgresql_where=text("output_blob_key IS NOT NULL"),
+        ),
+    )
+
+    cache_key: Mapped[bytes] = mapped_column(LargeBinary, primary_key=True)
+    runner: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # A preview when the output is in the blob store, as for Run.output.
+    output: Mapped[str] = mapped_column(Text, nullable=False)
+    output_blob_key: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    output_size: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, Text, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class RunOutputChunk(Base):
+    """A piece of a running run's streamed output, starting `start` characters into it.
+
+    Scratch space for tailing a run while it executes: the worker appends
+    chunks as the runner streams (see app.worker.output) and deletes them
+    when it records the final output on the run. The table is UNLOGGED, so
+    chunks cost no WAL and are not replicated; after a crash it comes back
+    empty, which loses nothing the runs table does not have.
+
+    run_id is not a foreign key, as for spans: runs is partitioned.
+    """
+
+    __tablename__ = "run_output_chunks"
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    run_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    # Offset in characters of the chunk's first character in the output.
+    start: Mapped[int] = mapped_column(Integer, primary_key=True)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
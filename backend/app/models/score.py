@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class RunScore(Base):
+    """One metric's score for one run of an eval run.
+
+    Keyed eval-first: scoring writes and re-scoring deletes one contiguous
+    (eval_run_id, metric) range, and the primary key alone serves both. Scores
+    go away with their eval run, as its runs do.
+
+    dataset_item_id is copied from the run at scoring time so that comparing two
+    eval runs pairs their scores item by item without joining back to runs.
+    """
+
+    __tablename__ = "run_scores"
+
+    eval_run_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("eval_runs.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    metric: Mapped[str] = mapped_column(String(64), primary_key=True)
+    run_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    dataset_item_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+
+
+class EvalRunScore(Base):
+    """Aggregate of a metric over an eval run, written together with its RunScore rows."""
+
+    __tablename__ = "eval_run_scores"
+
+    eval_run_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("eval_runs.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    metric: Mapped[str] = mapped_column(String(64), primary_key=True)
+    params: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    count: Mapped[int] = mapped_column(Integer, nullable=False)
+    mean: Mapped[float] = mapped_column(Float, nullable=False)
+    stddev: Mapped[float] = mapped_column(Float, nullable=False)
+    min: Mapped[float] = mapped_column(Float, nullable=False)
+    max: Mapped[float] = mapped_column(Float, nullable=False)
+    scored_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
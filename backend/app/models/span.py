@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import CheckConstraint, DateTime, Index, String, Text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class Span(Base):
+    """One timed operation inside a run (an LLM call, a tool call, ...), OpenTelemetry-shaped.
+
+    Keyed by the OpenTelemetry ids (lowercase hex), so re-sending a batch is a
+    no-op. A run's spans form a tree through parent_span_id; spans whose parent
+    was never sent are roots.
+
+    run_id is not a foreign key: runs is partitioned and has no unique key on
+    id alone. Ingestion drops spans of unknown runs, the runs_delete_spans
+    trigger deletes a run's spans with it, and partition retention deletes (or
+    archives) the spans of the runs it drops.
+    """
+
+    __tablename__ = "spans"
+    __table_args__ = (
+        CheckConstraint("end_time >= start_time", name="ck_spans_end_after_start"),
+        # A run's span tree in one index range scan, already in start order.
+        # Also serves deleting a run's spans with it.
+        Index("ix_spans_run_id_start_time", "run_id", "start_time"),
+    )
+
+    trace_id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    span_id: Mapped[str] = mapped_column(String(16), primary_key=True)
+    parent_span_id: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    run_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    name: Mapped[str] = mapped_column(Text, nullable=False)
+    start_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    end_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    attributes: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
@@ -22,4 +22,6 @@ class Tag(Base):
         secondary="prompt_tags",
         back_populates="tags",
         order_by="Prompt.created_at",
+        lazy="raise_on_sql",
+        passive_deletes=True,
     )
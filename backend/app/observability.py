@@ -0,0 +1,298 @@
+"""Prometheus metrics for the API: request timing, per-request DB work, pool and cache stats.
+
+`MetricsMiddleware` times every HTTP request by route template (so
+/api/runs/{run_id}, not one series per run) and tracks requests in flight.
+SQLAlchemy engine events time every statement; while a request is being
+served its statements are also added up in a `RequestStats` held in a
+context variable, which reaches the threadpool that sync handlers run on,
+and observed per route once the response is sent. Pool checkout stats
+(app.pool) and the in-process caches' counters (app.cache) are read at
+scrape time, so they cost nothing per request. `QueryHeadersMiddleware`
+reports the same per-request statement counts in response headers, for
+development.
+
+Metrics are per process, like the caches: with several uvicorn workers,
+scrape each (or put them behind one that aggregates).
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from prometheus_client import (
+    CollectorRegistry,
+    Gauge,
+    Histogram,
+    ProcessCollector,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.cache import TTLCache, prompt_resolve_cache, run_result_cache
+from app.db import async_engine, engine
+from app.pool import WAIT_BUCKETS_MS, PoolWaitStats
+
+# Requests that matched no route share one label value.
+UNMATCHED_ROUTE = "<unmatched>"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+registry = CollectorRegistry()
+ProcessCollector(registry=registry)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time from request to the end of the response body (streams included), by route template.",
+    ("method", "route", "status"),
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests being served, open event streams included.",
+    ("method",),
+    registry=registry,
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed while serving a request.",
+    ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS,
+    registry=registry,
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent executing SQL statements while serving a request.",
+    ("method", "route"),
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "Time to execute one SQL statement (cursor execute, not fetching), in or out of requests.",
+    buckets=QUERY_BUCKETS,
+    registry=registry,
+)
+
+
+@dataclass
+class RequestStats:
+    """SQL statements executed on behalf of one request so far."""
+
+    queries: int = 0
+    db_seconds: float = 0.0
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> RequestStats | None:
+    return _request_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = getattr(context, "_metrics_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    QUERY_SECONDS.observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time the statements `engine` executes (for an AsyncEngine, pass its sync_engine). Idempotent."""
+
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def route_template(scope: Scope) -> str:
+    """The matched route's path with its parameters in braces, e.g. /api/runs/{run_id}.
+
+    The route's path_format only covers the router it was declared on, not the
+    prefixes it was included under (/api). Path parameters match one segment
+    each, so those prefixes are the request path's leading segments beyond the
+    template's: taken by position, never by matching parameter values.
+    """
+
+    template = getattr(scope.get("route"), "path_format", None)
+    if template is None:
+        return UNMATCHED_ROUTE
+    path = scope["path"]
+    extra = path.count("/") - template.count("/")
+    if extra <= 0:
+        return template
+    return "/".join(path.split("/")[: extra + 1]) + template
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streamed responses pass through untouched and the overhead stays small.
+
+    The route is known only once routing has run, so it is read from the
+    scope after the app returns; requests in flight are counted per method.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            _request_stats.reset(token)
+            path = route_template(scope)
+            REQUEST_SECONDS.labels(method, path, str(status)).observe(elapsed)
+            REQUEST_DB_QUERIES.labels(method, path).observe(stats.queries)
+            REQUEST_DB_SECONDS.labels(method, path).observe(stats.db_seconds)
+
+
+class QueryHeadersMiddleware:
+    """Development aid: report the SQL a request ran in its response headers.
+
+    `X-DB-Queries` carries the statement count and `Server-Timing` the time
+    spent in them (`db;dur=<ms>`, shown in browser dev tools). Headers go out
+    with the start of the response, so a streamed response only counts the
+    statements run before its first byte. Shares the request's `RequestStats`
+    with MetricsMiddleware when both are on.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = _request_stats.get()
+        token = None
+        if stats is None:
+            stats = RequestStats()
+            token = _request_stats.set(stats)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Queries"] = str(stats.queries)
+                headers.append("Server-Timing", f"db;dur={stats.db_seconds * 1000:.2f}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            if token is not None:
+                _request_stats.reset(token)
+
+
+class PoolCollector(Collector):
+    """Connection pool occupancy and checkout waits, read from the pools at scrape time."""
+
+    def __init__(self, engines: dict[str, Engine]) -> None:
+        self.engines = engines
+
+    def collect(self) -> Iterator:
+        size = GaugeMetricFamily("db_pool_size", "Connections the pool keeps open.", labels=["pool"])
+        checked_out = GaugeMetricFamily(
+            "db_pool_checked_out", "Connections checked out right now.", labels=["pool"]
+        )
+        overflow = GaugeMetricFamily(
+            "db_pool_overflow",
+            "Connections open beyond the pool size (negative: not yet opened).",
+            labels=["pool"],
+        )
+        timeouts = CounterMetricFamily(
+            "db_pool_checkout_timeouts", "Checkouts that gave up after DB_POOL_TIMEOUT.", labels=["pool"]
+        )
+        waits = HistogramMetricFamily(
+            "db_pool_checkout_wait_seconds",
+            "Time waited to check out a connection (timed-out checkouts included).",
+            labels=["pool"],
+        )
+        for name, target in self.engines.items():
+            pool = target.pool
+            if isinstance(pool, QueuePool):
+                size.add_metric([name], pool.size())
+                checked_out.add_metric([name], pool.checkedout())
+                overflow.add_metric([name], pool.overflow())
+            stats = getattr(pool, "stats", None)
+            if isinstance(stats, PoolWaitStats):
+                snapshot = stats.snapshot()
+                timeouts.add_metric([name], snapshot["timeouts"])
+                cumulative, buckets = 0, []
+                bounds = [*WAIT_BUCKETS_MS, float("inf")]
+                for bound, count in zip(bounds, snapshot["wait_histogram"].values()):
+                    cumulative += count
+                    buckets.append((str(bound / 1000), cumulative))
+                waits.add_metric([name], buckets, snapshot["wait_sum_ms"] / 1000)
+        yield from (size, checked_out, overflow, timeouts, waits)
+
+
+class CacheCollector(Collector):
+    """Lookups, hits and size of the in-process caches, read at scrape time."""
+
+    def __init__(self, caches: dict[str, TTLCache]) -> None:
+        self.caches = caches
+
+    def collect(self) -> Iterator:
+        families = {
+            key: CounterMetricFamily(f"cache_{key}", f"Cache {key.replace('_', ' ')}.", labels=["cache"])
+            for key in ("hits", "misses", "evictions", "expirations", "invalidations")
+        }
+        entries = GaugeMetricFamily("cache_entries", "Entries held.", labels=["cache"])
+        for name, cache in self.caches.items():
+            snapshot = cache.snapshot()
+            for key, family in families.items():
+                family.add_metric([name], snapshot[key])
+            entries.add_metric([name], snapshot["entries"])
+        yield from families.values()
+        yield entries
+
+
+registry.register(PoolCollector({"sync": engine, "async": async_engine.sync_engine}))
+registry.register(CacheCollector({"prompt_resolve": prompt_resolve_cache, "run_result": run_result_cache}))
+
+
+def render() -> bytes:
+    """Every metric, in the Prometheus text format."""
+
+    return generate_latest(registry)
@@ -0,0 +1,201 @@
+"""Monthly range partitions of `runs`, and their retention.
+
+runs is partitioned on created_at by UTC calendar month (runs_2026_10 holds
+October 2026), plus runs_default for anything no month partition covers, so
+an insert never fails for want of a partition. `ensure` creates the current
+month's partition and RUNS_PARTITION_MONTHS_AHEAD more. `expire` removes the
+months that ended more than RUNS_RETENTION_MONTHS ago whole, with DETACH and
+DROP: reclaiming a month is a catalog change instead of a DELETE of every
+row and the vacuum behind it, and each partition's indexes only ever cover
+one month. With RUNS_ARCHIVE_DIR set, a month's runs and their spans are
+first written to gzipped CSV files there.
+
+Rollups, eval run summaries and scores do not reference runs and survive
+their runs' retention.
+
+The worker runs `maintain` (both) periodically; `python -m app.partitions`
+runs it once, e.g. from cron.
+"""
+
+from __future__ import annotations
+
+import gzip
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db import AdvisoryLock, SessionLocal, try_advisory_xact_lock
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARTITION = "runs_default"
+
+_PARTITION_NAME = re.compile(r"^runs_(\d{4})_(\d{2})$")
+
+
+def month_start(ts: datetime) -> datetime:
+    """Start of the UTC month `ts` falls in."""
+
+    ts = ts.astimezone(timezone.utc)
+    return datetime(ts.year, ts.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, n: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month: datetime) -> str:
+    return f"runs_{month:%Y_%m}"
+
+
+def partitions(db: Session) -> list[datetime]:
+    """The months that have a partition, oldest first."""
+
+    names = db.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'runs'::regclass"
+        )
+    ).scalars()
+    months = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            months.append(datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc))
+    return sorted(months)
+
+
+def _lock(db: Session) -> bool:
+    """Take the maintenance lock for the current transaction, unless another one holds it."""
+
+    return try_advisory_xact_lock(db, AdvisoryLock.PARTITION_MAINTENANCE)
+
+
+def ensure(db: Session, *, now: datetime | None = None, months_ahead: int | None = None) -> list[str]:
+    """Create the missing partitions from the current month to `months_ahead` later; returns their names.
+
+    A month runs_default already holds rows for is skipped with a warning:
+    creating its partition would fail, since those rows would belong to it.
+    Moving them out is left to an operator. Does nothing while another
+    process is maintaining the partitions.
+    """
+
+    ahead = settings.runs_partition_months_ahead if months_ahead is None else months_ahead
+    current = month_start(now or datetime.now(timezone.utc))
+    if not _lock(db):
+        db.rollback()
+        return []
+    existing = set(partitions(db))
+    created = []
+    for month in (add_months(current, i) for i in range(ahead + 1)):
+        if month in existing:
+            continue
+        bounds = {"start": month, "end": add_months(month, 1)}
+        stranded = db.execute(
+            text(
+                f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} "
+                "WHERE created_at >= :start AND created_at < :end)"
+            ),
+            bounds,
+        ).scalar_one()
+        if stranded:
+            logger.warning("%s has rows for %s; not creating it", DEFAULT_PARTITION, partition_name(month))
+            continue
+        # Bounds cannot be bind parameters in DDL; they are generated here.
+        db.execute(
+            text(
+                f"CREATE TABLE {partition_name(month)} PARTITION OF runs "
+                f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+            )
+        )
+        created.append(partition_name(month))
+    db.commit()
+    return created
+
+
+def _archive(db: Session, name: str, directory: Path) -> None:
+    """Write partition `name` and its runs' spans to gzipped CSV files in `directory`.
+
+    Each file is written under a temporary name, synced and renamed, so a file
+    with the final name is always complete.
+    """
+
+    directory.mkdir(parents=True, exist_ok=True)
+    cursor = db.connection().connection.driver_connection.cursor()
+    for path, query in (
+        (directory / f"{name}.csv.gz", f"SELECT * FROM {name}"),
+        (directory / f"{name}_spans.csv.gz", f"SELECT s.* FROM spans s JOIN {name} r ON r.id = s.run_id"),
+    ):
+        partial = path.with_name(path.name + ".partial")
+        with open(partial, "wb") as f:
+            with (
+                gzip.GzipFile(fileobj=f, mode="wb", compresslevel=6) as gz,
+                cursor.copy(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)") as copy,
+            ):
+                for block in copy:
+                    gz.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(partial, path)
+
+
+def expire(
+    db: Session,
+    *,
+    now: datetime | None = None,
+    retention_months: int | None = None,
+    archive_dir: str | None = None,
+) -> list[str]:
+    """Drop (after archiving, with an archive dir) the partitions past retention; returns their names.
+
+    Keeps the current month and the `retention_months` before it. Each
+    partition goes in its own transaction, oldest first: its runs' spans are
+    deleted, then it is detached and dropped; the detach's exclusive lock on
+    runs is held only to the commit, which follows immediately. Stops early
+    while another process is maintaining the partitions.
+    """
+
+    retention = settings.runs_retention_months if retention_months is None else retention_months
+    archive = settings.runs_archive_dir if archive_dir is None else archive_dir
+    if retention <= 0:
+        return []
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -retention)
+    dropped = []
+    while _lock(db):
+        expired = [month for month in partitions(db) if add_months(month, 1) <= cutoff]
+        if not expired:
+            break
+        name = partition_name(expired[0])
+        if archive:
+            _archive(db, name, Path(archive))
+        db.execute(text(f"DELETE FROM spans s USING {name} r WHERE s.run_id = r.id"))
+        db.execute(text(f"ALTER TABLE runs DETACH PARTITION {name}"))
+        db.execute(text(f"DROP TABLE {name}"))
+        db.commit()
+        dropped.append(name)
+    db.rollback()
+    return dropped
+
+
+def maintain(db: Session, *, now: datetime | None = None) -> tuple[list[str], list[str]]:
+    """`ensure`, then `expire`, with the settings; returns (created, dropped)."""
+
+    return ensure(db, now=now), expire(db, now=now)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    with SessionLocal() as db:
+        created, dropped = maintain(db)
+    logger.info("runs partitions created: %s; dropped: %s", created or "none", dropped or "none")
+
+
+if __name__ == "__main__":
+    main()
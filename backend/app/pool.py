@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import exc
+from sqlalchemy.pool import Pool, QueuePool
+
+# Upper bounds (ms) of the checkout-wait histogram buckets; the last bucket is open-ended.
+WAIT_BUCKETS_MS: tuple[float, ...] = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PoolWaitStats:
+    """Thread-safe counters for how long callers waited to check out a connection.
+
+    The measured time covers queueing for a free connection, opening a new one
+    when the pool may overflow, and the pre-ping round-trip if enabled. A steadily
+    non-zero wait means requests are queueing on the pool rather than on Postgres.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait_ms = 0.0
+            # Timed-out checkouts included, to go with the histogram.
+            self.wait_sum_ms = 0.0
+            self.max_wait_ms = 0.0
+            self.buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def record(self, wait_ms: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.total_wait_ms += wait_ms
+            self.wait_sum_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            for i, bound in enumerate(WAIT_BUCKETS_MS):
+                if wait_ms <= bound:
+                    self.buckets[i] += 1
+                    break
+            else:
+                self.buckets[-1] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            labels = [f"le_{b:g}ms" for b in WAIT_BUCKETS_MS] + ["inf"]
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": (self.total_wait_ms / self.checkouts) if self.checkouts else 0.0,
+                "max_wait_ms": self.max_wait_ms,
+                "wait_sum_ms": self.wait_sum_ms,
+                "wait_histogram": dict(zip(labels, self.buckets)),
+            }
+
+
+class _TimedPoolMixin:
+    stats: PoolWaitStats
+
+    def connect(self):
+        t0 = time.perf_counter()
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            self.stats.record((time.perf_counter() - t0) * 1000, timed_out=True)
+            raise
+        self.stats.record((time.perf_counter() - t0) * 1000)
+        return conn
+
+
+def timed_pool_class(base: type[QueuePool], stats: PoolWaitStats) -> type[QueuePool]:
+    """Return a subclass of `base` that records checkout waits into `stats`.
+
+    The stats object is bound on the class rather than the instance because
+    SQLAlchemy rebuilds pools via `self.__class__(...)` on dispose/invalidation.
+    """
+
+    return type(f"Timed{base.__name__}", (_TimedPoolMixin, base), {"stats": stats})
+
+
+def pool_snapshot(pool: Pool) -> dict[str, Any]:
+    out: dict[str, Any] = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        out.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            timeout_seconds=pool.timeout(),
+        )
+    stats = getattr(pool, "stats", None)
+    if isinstance(stats, PoolWaitStats):
+        out["wait"] = stats.snapshot()
+    return out
+
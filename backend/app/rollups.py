@@ -0,0 +1,308 @@
+"""Latency and error-rate rollups of executed runs, per UTC minute, hour and day.
+
+`record` folds the runs a worker just finished into `run_rollups`, one row
+per (prompt, granularity, bucket, version), in the same transaction, with a
+single upsert. Counters add up; latencies go into a fixed log-scale
+histogram (HDR-style: SUB_BUCKETS buckets per doubling, so any percentile
+read from it is within about 4.4% of the true value), and histograms add up
+elementwise. Time spent queued (created_at to started_at) goes into a second
+histogram of the same layout. `series` then answers "percentiles and error
+rate per hour over the last day" from one row per hour (and version), never
+from runs.
+
+Runs served from the run result cache are never executed and are not counted.
+"""
+
+from __future__ import annotations
+
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.models import RunRollup
+
+GRANULARITIES: dict[str, timedelta] = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+SUB_BUCKETS = 8
+# Bucket 0 is < 1 ms, bucket i covers [2**((i-1)/8), 2**(i/8)) ms, and the last
+# one everything from 2**22 ms (~70 minutes) up.
+MAX_EXPONENT = 22
+LATENCY_BUCKETS = SUB_BUCKETS * MAX_EXPONENT + 2
+
+# A bucket's representative latency: the geometric middle of its bounds.
+_MIDPOINTS = np.concatenate(
+    [[0.5], 2 ** ((np.arange(1, LATENCY_BUCKETS - 1) - 0.5) / SUB_BUCKETS), [2.0**MAX_EXPONENT]]
+)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+_COLUMNS = (
+    "prompt_id",
+    "granularity",
+    "bucket_start",
+    "prompt_version",
+    "runs",
+    "failed",
+    "latency_sum_ms",
+    "latency_max_ms",
+    "wait_sum_ms",
+    "wait_max_ms",
+    "cell_row",
+    "cell_bucket",
+    "cell_count",
+    "wait_cell_row",
+    "wait_cell_bucket",
+    "wait_cell_count",
+)
+
+# Rows arrive as one array per column plus the non-zero histogram cells as
+# (row, bucket, count) triples, and the dense histograms are built
+# server-side: a flush sends a few small arrays instead of 178 integers per
+# row, which is what the upsert's cost on the worker was dominated by.
+_UPSERT = text(
+    f"""
+    WITH new AS (
+      SELECT * FROM unnest(
+        CAST(:prompt_id AS uuid[]), CAST(:granularity AS text[]), CAST(:bucket_start AS timestamptz[]),
+        CAST(:prompt_version AS int[]), CAST(:runs AS int[]), CAST(:failed AS int[]),
+        CAST(:latency_sum_ms AS float8[]), CAST(:latency_max_ms AS float8[]),
+        CAST(:wait_sum_ms AS float8[]), CAST(:wait_max_ms AS float8[])
+      ) WITH ORDINALITY AS r(prompt_id, granularity, bucket_start, prompt_version, runs, failed,
+                             latency_sum_ms, latency_max_ms, wait_sum_ms, wait_max_ms, row_no)
+    ), cells AS (
+      SELECT * FROM unnest(CAST(:cell_row AS int[]), CAST(:cell_bucket AS int[]), CAST(:cell_count AS int[]))
+        AS c(row_no, bucket, n)
+    ), wait_cells AS (
+      SELECT * FROM unnest(
+        CAST(:wait_cell_row AS int[]), CAST(:wait_cell_bucket AS int[]), CAST(:wait_cell_count AS int[])
+      ) AS c(row_no, bucket, n)
+    )
+    INSERT INTO run_rollups (prompt_id, granularity, bucket_start, prompt_version, runs, failed,
+                             latency_sum_ms, latency_max_ms, latency_histogram,
+                             wait_sum_ms, wait_max_ms, wait_histogram)
+    SELECT prompt_id, granularity, bucket_start, prompt_version, runs, failed, latency_sum_ms, latency_max_ms,
+           ARRAY(
+             SELECT coalesce(c.n, 0) FROM generate_series(0, {LATENCY_BUCKETS - 1}) AS i(bucket)
+             LEFT JOIN cells c ON c.row_no = new.row_no AND c.bucket = i.bucket
+             ORDER BY i.bucket
+           ),
+           wait_sum_ms, wait_max_ms,
+           ARRAY(
+             SELECT coalesce(c.n, 0) FROM generate_series(0, {LATENCY_BUCKETS - 1}) AS i(bucket)
+             LEFT JOIN wait_cells c ON c.row_no = new.row_no AND c.bucket = i.bucket
+             ORDER BY i.bucket
+           )
+    FROM new ORDER BY row_no
+    ON CONFLICT (prompt_id, granularity, bucket_start, prompt_version) DO UPDATE SET
+      runs = run_rollups.runs + excluded.runs,
+      failed = run_rollups.failed + excluded.failed,
+      latency_sum_ms = run_rollups.latency_sum_ms + excluded.latency_sum_ms,
+      latency_max_ms = greatest(run_rollups.latency_max_ms, excluded.latency_max_ms),
+      latency_histogram = ARRAY(
+        SELECT a + b FROM unnest(run_rollups.latency_histogram, excluded.latency_histogram) AS t(a, b)
+      ),
+      wait_sum_ms = run_rollups.wait_sum_ms + excluded.wait_sum_ms,
+      wait_max_ms = greatest(run_rollups.wait_max_ms, excluded.wait_max_ms),
+      wait_histogram = ARRAY(
+        SELECT a + b FROM unnest(run_rollups.wait_histogram, excluded.wait_histogram) AS t(a, b)
+      )
+    """
+)
+
+
+def bucket_index(latency_ms: np.ndarray) -> np.ndarray:
+    """The histogram bucket of each latency."""
+
+    index = np.floor(np.log2(np.maximum(latency_ms, 1.0)) * SUB_BUCKETS).astype(np.int64) + 1
+    index[latency_ms < 1.0] = 0
+    return np.minimum(index, LATENCY_BUCKETS - 1)
+
+
+def percentiles(histogram: np.ndarray, quantiles: Iterable[float], max_ms: float) -> list[float]:
+    """Nearest-rank percentiles of a histogram, capped at the largest latency seen."""
+
+    cumulative = np.cumsum(histogram)
+    ranks = np.maximum(np.ceil(np.asarray(list(quantiles)) * cumulative[-1]), 1)
+    estimates = _MIDPOINTS[np.searchsorted(cumulative, ranks)]
+    return [float(v) for v in np.minimum(estimates, max_ms)]
+
+
+def floor(ts: datetime, granularity: str) -> datetime:
+    """Start of the UTC minute, hour or day `ts` falls in."""
+
+    step = GRANULARITIES[granularity]
+    return _EPOCH + (ts - _EPOCH) // step * step
+
+
+def record(db: Session, runs: Iterable) -> None:
+    """Add finished runs to the rollups.
+
+    `runs` are rows with prompt_id, prompt_version, status, created_at,
+    started_at and finished_at, e.g. the RETURNING of the UPDATE that finished
+    them.
+
+    Does not commit: meant to run in the transaction that marks the runs
+    finished, so the rollups always agree with the runs table.
+    """
+
+    groups: dict[tuple, list] = {}
+    for run in runs:
+        if run.started_at is None or run.finished_at is None:
+            continue
+        for granularity in GRANULARITIES:
+            key = (run.prompt_id, granularity, floor(run.finished_at, granularity), run.prompt_version)
+            groups.setdefault(key, []).append(run)
+    if not groups:
+        return
+
+    columns: dict[str, list] = {name: [] for name in _COLUMNS}
+    # Sorted so concurrent workers lock rollup rows in the same order.
+    keys = sorted(groups, key=str)
+    for row_no, key in enumerate(keys, start=1):
+        finished = groups[key]
+        latency_ms = np.array(
+            [
+                (run.finished_at - run.started_at).total_seconds() * 1000
+                for run in finished
+                if run.status == "succeeded"
+            ],
+            dtype=np.float64,
+        )
+        wait_ms = np.array(
+            [(run.started_at - run.created_at).total_seconds() * 1000 for run in finished],
+            dtype=np.float64,
+        )
+        buckets, counts = np.unique(bucket_index(latency_ms), return_counts=True)
+        wait_buckets, wait_counts = np.unique(bucket_index(wait_ms), return_counts=True)
+        for name, value in zip(
+            _COLUMNS,
+            (
+                *key,
+                len(finished),
+                sum(run.status == "failed" for run in finished),
+                float(latency_ms.sum()),
+                float(latency_ms.max(initial=0.0)),
+                float(wait_ms.sum()),
+                float(wait_ms.max(initial=0.0)),
+            ),
+        ):
+            columns[name].append(value)
+        columns["cell_row"] += [row_no] * len(buckets)
+        columns["cell_bucket"] += buckets.tolist()
+        columns["cell_count"] += counts.tolist()
+        columns["wait_cell_row"] += [row_no] * len(wait_buckets)
+        columns["wait_cell_bucket"] += wait_buckets.tolist()
+        columns["wait_cell_count"] += wait_counts.tolist()
+
+    db.execute(_UPSERT, columns)
+
+
+@dataclass(frozen=True)
+class Window:
+    """Rollups merged over one time bucket (or a whole series)."""
+
+    start: datetime
+    runs: int
+    failed: int
+    latency_sum_ms: float
+    latency_max_ms: float
+    histogram: np.ndarray
+    wait_sum_ms: float
+    wait_max_ms: float
+    wait_histogram: np.ndarray
+
+    @property
+    def succeeded(self) -> int:
+        return self.runs - self.failed
+
+    @property
+    def waited(self) -> int:
+        """Runs with a recorded queue wait (rollups predating it have none)."""
+
+        return int(self.wait_histogram.sum())
+
+
+def series(
+    db: Session,
+    prompt_id: uuid.UUID,
+    *,
+    version: int | None,
+    granularity: str,
+    since: datetime,
+    until: datetime,
+) -> list[Window]:
+    """The prompt's (or one version's) `granularity` buckets starting in [since, until).
+
+    Only buckets with runs are returned, oldest first. Without a version, the
+    versions' rows for a bucket are merged.
+    """
+
+    stmt = (
+        select(
+            RunRollup.bucket_start,
+            RunRollup.runs,
+            RunRollup.failed,
+            RunRollup.latency_sum_ms,
+            RunRollup.latency_max_ms,
+            RunRollup.latency_histogram,
+            RunRollup.wait_sum_ms,
+            RunRollup.wait_max_ms,
+            RunRollup.wait_histogram,
+        )
+        .where(
+            RunRollup.prompt_id == prompt_id,
+            RunRollup.granularity == granularity,
+            RunRollup.bucket_start >= since,
+            RunRollup.bucket_start < until,
+        )
+        .order_by(RunRollup.bucket_start)
+    )
+    if version is not None:
+        stmt = stmt.where(RunRollup.prompt_version == version)
+    rows = db.execute(stmt).all()
+    if not rows:
+        return []
+
+    starts = [row.bucket_start for row in rows]
+    first = [i for i in range(len(rows)) if i == 0 or starts[i] != starts[i - 1]]
+    counts = np.add.reduceat(np.array([(row.runs, row.failed) for row in rows], dtype=np.int64), first)
+    sums = np.add.reduceat(np.array([row.latency_sum_ms for row in rows]), first)
+    maxima = np.maximum.reduceat(np.array([row.latency_max_ms for row in rows]), first)
+    histograms = np.add.reduceat(np.array([row.latency_histogram for row in rows], dtype=np.int64), first)
+    wait_sums = np.add.reduceat(np.array([row.wait_sum_ms for row in rows]), first)
+    wait_maxima = np.maximum.reduceat(np.array([row.wait_max_ms for row in rows]), first)
+    wait_histograms = np.add.reduceat(np.array([row.wait_histogram for row in rows], dtype=np.int64), first)
+    return [
+        Window(starts[i], int(c[0]), int(c[1]), float(s), float(m), h, float(ws), float(wm), wh)
+        for i, c, s, m, h, ws, wm, wh in zip(
+            first, counts, sums, maxima, histograms, wait_sums, wait_maxima, wait_histograms
+        )
+    ]
+
+
+def merge(windows: list[Window], start: datetime) -> Window:
+    """All of `windows` as one."""
+
+    if not windows:
+        empty = np.zeros(LATENCY_BUCKETS, dtype=np.int64)
+        return Window(start, 0, 0, 0.0, 0.0, empty, 0.0, 0.0, empty)
+    return Window(
+        start,
+        sum(w.runs for w in windows),
+        sum(w.failed for w in windows),
+        sum(w.latency_sum_ms for w in windows),
+        max(w.latency_max_ms for w in windows),
+        np.sum([w.histogram for w in windows], axis=0),
+        sum(w.wait_sum_ms for w in windows),
+        max(w.wait_max_ms for w in windows),
+        np.sum([w.wait_histogram for w in windows], axis=0),
+    )
@@ -0,0 +1,192 @@
+"""Content-addressed run result cache.
+
+A succeeded run's output is stored under (Run.cache_key, runner name). When a
+run with the same key is created later, for the runner this deployment is
+configured with (WORKER_RUNNER), it is inserted as already succeeded with the
+cached output and `cache_hit` set, and never reaches the worker queue. An
+output spilled to the blob store is cached as its preview and blob key, and
+shared by every run served from it.
+
+Entries expire RUN_CACHE_TTL_SECONDS after they were written; beyond
+RUN_CACHE_MAX_ENTRIES the oldest are evicted (see `evict`, run periodically by
+the worker). The in-process memory tier (app.cache.run_result_cache) keeps an
+entry no longer than its row stays fresh, and `evict` drops the entries of
+rows it deleted.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from sqlalchemy import ColumnElement, LargeBinary, String, column, delete, func, select, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.blobs import StoredText
+from app.cache import run_result_cache
+from app.models import Run, RunCacheEntry
+from app.settings import settings
+
+
+def enabled() -> bool:
+    return settings.run_cache_ttl_seconds > 0
+
+
+def _fresh() -> ColumnElement[bool]:
+    return RunCacheEntry.created_at > func.now() - timedelta(seconds=settings.run_cache_ttl_seconds)
+
+
+def lookup_stmt(cache_key: bytes):
+    """The fresh cached output for `cache_key` under the configured runner, if any.
+
+    As StoredText fields, then `fresh_for`: the seconds until the entry expires.
+    """
+
+    fresh_for = func.extract("epoch", RunCacheEntry.created_at - func.now()) + settings.run_cache_ttl_seconds
+    return select(
+        RunCacheEntry.output,
+        RunCacheEntry.output_blob_key,
+        RunCacheEntry.output_size,
+        fresh_for.label("fresh_for"),
+    ).where(
+        RunCacheEntry.cache_key == cache_key,
+        RunCacheEntry.runner == settings.worker_runner,
+        _fresh(),
+    )
+
+
+def memory_get(cache_key: bytes) -> StoredText | None:
+    return run_result_cache.get((settings.worker_runner, cache_key))
+
+
+def memory_put_row(cache_key: bytes, row) -> StoredText:
+    """Cache a lookup_stmt row in memory until the entry expires; returns its output."""
+
+    output = StoredText(row.output, row.output_blob_key, row.output_size)
+    run_result_cache.put((settings.worker_runner, cache_key), output, ttl_seconds=float(row.fresh_for))
+    return output
+
+
+def mark_hit(run: Run, output: StoredText) -> None:
+    """Turn a pending (not yet committed) run into a cache hit."""
+
+    run.status = "succeeded"
+    run.output, run.output_blob_key, run.output_size = output
+    run.cache_hit = True
+    run.started_at = run.finished_at = func.now()
+
+
+def serve_queued(db: Session, *where: ColumnElement[bool]) -> int:
+    """Complete the queued runs matching `where` that have a cached output; returns how many.
+
+    One UPDATE ... FROM run_cache, meant to run in the transaction that
+    inserted the runs, so workers never see the runs it serves as queued.
+    """
+
+    if not enabled():
+        return 0
+    stmt = (
+        update(Run)
+        .where(
+            Run.status == "queued",
+            RunCacheEntry.cache_key == Run.cache_key,
+            RunCacheEntry.runner == settings.worker_runner,
+            _fresh(),
+            *where,
+        )
+        .values(
+            status="succeeded",
+            output=RunCacheEntry.output,
+            output_blob_key=RunCacheEntry.output_blob_key,
+            output_size=RunCacheEntry.output_size,
+            cache_hit=True,
+            started_at=func.now(),
+            finished_at=func.now(),
+        )
+        .execution_options(synchronize_session=False, preserve_rowcount=True)
+    )
+    return db.execute(stmt).rowcount
+
+
+def store(db: Session, runner: str, entries: dict[bytes, StoredText]) -> None:
+    """Write cache_key -> output entries for `runner`; rewriting a key refreshes its TTL."""
+
+    if not entries:
+        return
+    stmt = pg_insert(RunCacheEntry).values(
+        [
+            {
+                "cache_key": key,
+                "runner": runner,
+                "output": output.text,
+                "output_blob_key": output.blob_key,
+                "output_size": output.size,
+            }
+            for key, output in entries.items()
+        ]
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[RunCacheEntry.cache_key, RunCacheEntry.runner],
+            set_={
+                "output": stmt.excluded.output,
+                "output_blob_key": stmt.excluded.output_blob_key,
+                "output_size": stmt.excluded.output_size,
+                "created_at": func.now(),
+            },
+        )
+    )
+
+
+def evict(db: Session) -> int:
+    """Delete expired entries, then the oldest beyond the size limit; returns how many.
+
+    This process's memory tier forgets the deleted entries too.
+    """
+
+    expired = db.execute(
+        delete(RunCacheEntry)
+        .where(~_fresh())
+        .execution_options(synchronize_session=False, preserve_rowcount=True)
+    ).rowcount
+    # The created_at of the newest entry past the limit; it and everything
+    # older go. An index-only walk down ix_run_cache_created_at.
+    cutoff = (
+        select(RunCacheEntry.created_at)
+        .order_by(RunCacheEntry.created_at.desc())
+        .offset(settings.run_cache_max_entries)
+        .limit(1)
+        .scalar_subquery()
+    )
+    overflow = db.execute(
+        delete(RunCacheEntry)
+        .where(RunCacheEntry.created_at <= cutoff)
+        .execution_options(synchronize_session=False, preserve_rowcount=True)
+    ).rowcount
+    db.commit()
+    if expired + overflow:
+        _forget_deleted(db)
+    return expired + overflow
+
+
+def _forget_deleted(db: Session) -> None:
+    """Drop memory tier entries whose row is gone: one lookup for the whole tier."""
+
+    cached = run_result_cache.keys()
+    if not cached:
+        return
+    entry = values(column("runner", String), column("cache_key", LargeBinary), name="entry").data(cached)
+    kept = {
+        tuple(row)
+        for row in db.execute(
+            select(entry.c.runner, entry.c.cache_key).where(
+                select(RunCacheEntry.cache_key)
+                .where(RunCacheEntry.runner == entry.c.runner, RunCacheEntry.cache_key == entry.c.cache_key)
+                .exists()
+            )
+        )
+    }
+    db.rollback()
+    for key in cached:
+        if key not in kept:
+            run_result_cache.invalidate(key)
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class DatasetCreateIn(BaseModel):
+    name: str = Field(min_length=1, max_length=200)
+    description: str | None = None
+
+
+class DatasetOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: uuid.UUID
+    name: str
+    description: str | None = None
+    item_count: int
+    created_at: datetime
+
+
+class DatasetItemIn(BaseModel):
+    """One JSONL line of a dataset upload."""
+
+    model_config = ConfigDict(extra="forbid")
+    input: dict
+    expected: Any = None
+    metadata: dict | None = None
+
+
+class DatasetItemOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: uuid.UUID
+    dataset_id: uuid.UUID
+    content_hash: str
+    input: dict
+    expected: Any = None
+    metadata: dict | None = Field(default=None, validation_alias="metadata_")
+    created_at: datetime
+
+
+class DatasetUploadLineError(BaseModel):
+    line: int
+    detail: str
+
+
+class DatasetUploadOut(BaseModel):
+    lines: int
+    inserted: int
+    duplicates: int
+    error_count: int
+    # First MAX_REPORTED_ERRORS line errors; error_count has the total.
+    errors: list[DatasetUploadLineError] = []
+    item_count: int
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Any, Literal
+
+from pydantic import BaseModel, ConfigDict, Field, computed_field, field_validator, model_validator
+
+from app.metrics import METRICS, metric_params
+
+
+class EvalRunCreateIn(BaseModel):
+    dataset_id: uuid.UUID
+    prompt_name: str = Field(min_length=1, max_length=200)
+    # Defaults to the prompt's active version.
+    version: int | None = Field(default=None, ge=1)
+
+
+class EvalRunOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: uuid.UUID
+    prompt_id: uuid.UUID
+    prompt_version: int
+    dataset_id: uuid.UUID
+    status: str
+    total: int
+    succeeded: int
+    failed: int
+    created_at: datetime
+    finished_at: datetime | None = None
+
+    @computed_field
+    @property
+    def progress(self) -> float:
+        return (self.succeeded + self.failed) / self.total if self.total else 1.0
+
+
+class MetricSpecIn(BaseModel):
+    name: str
+    params: dict[str, Any] = Field(default_factory=dict)
+
+    @model_validator(mode="after")
+    def _known(self) -> MetricSpecIn:
+        if self.name not in METRICS:
+            raise ValueError(f"unknown metric {self.name!r}; expected one of {', '.join(METRICS)}")
+        unknown = set(self.params) - metric_params(self.name)
+        if unknown:
+            raise ValueError(f"unknown parameter(s) for {self.name}: {', '.join(sorted(unknown))}")
+        return self
+
+
+class EvalRunScoreIn(BaseModel):
+    metrics: list[MetricSpecIn] = Field(min_length=1, max_length=len(METRICS))
+
+    @field_validator("metrics")
+    @classmethod
+    def _distinct(cls, metrics: list[MetricSpecIn]) -> list[MetricSpecIn]:
+        if len({m.name for m in metrics}) != len(metrics):
+            raise ValueError("each metric may appear once")
+        return metrics
+
+
+class EvalRunScoreOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    metric: str
+    params: dict[str, Any]
+    count: int
+    mean: float
+    stddev: float
+    min: float
+    max: float
+    scored_at: datetime
+
+
+class MetricComparisonOut(BaseModel):
+    metric: str
+    # Items scored in both runs.
+    n: int
+    baseline_mean: float
+    candidate_mean: float
+    delta: float
+    ci_low: float
+    ci_high: float
+    p_value: float
+    status: Literal["improved", "unchanged", "regressed"]
+
+
+class EvalRunCompareOut(BaseModel):
+    verdict: Literal["pass", "fail"]
+    candidate_eval_run_id: uuid.UUID
+    baseline_eval_run_id: uuid.UUID
+    dataset_id: uuid.UUID
+    confidence: float
+    max_drop: float
+    metrics: list[MetricComparisonOut]
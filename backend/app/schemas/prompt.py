@@ -36,6 +36,7 @@ class PromptDetailOut(BaseModel):
     tags: list[str] = []
     created_at: datetime
     active_version: int
+    baseline_version: int | None = None
     versions: list[PromptVersionOut]
 
 
@@ -56,6 +57,15 @@ class PromptResolvedOut(BaseModel):
     active: PromptVersionOut
 
 
+class PromptBulkResolveIn(BaseModel):
+    names: list[str] = Field(min_length=1, max_length=1000)
+
+
+class PromptBulkResolveOut(BaseModel):
+    prompts: list[PromptResolvedOut]
+    missing: list[str] = []
+
+
 class PromptCreateIn(BaseModel):
     name: str = Field(min_length=1, max_length=200)
     description: str | None = None
@@ -76,3 +86,8 @@ class PromptVersionCreateIn(BaseModel):
 
 class PromptActivateIn(BaseModel):
     version: int = Field(ge=1)
+
+
+class PromptBaselineIn(BaseModel):
+    # null clears the baseline.
+    version: int | None = Field(ge=1)
@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class RunCreateIn(BaseModel):
@@ -11,16 +11,125 @@ class RunCreateIn(BaseModel):
     input: dict | None = None
 
 
+class RunBulkCreateIn(BaseModel):
+    """Either `runs` (mixed prompts) or `prompt_name` + `inputs` (one prompt, many inputs)."""
+
+    runs: list[RunCreateIn] | None = Field(default=None, min_length=1, max_length=50_000)
+    prompt_name: str | None = Field(default=None, min_length=1, max_length=200)
+    inputs: list[dict | None] | None = Field(default=None, min_length=1, max_length=50_000)
+
+    @model_validator(mode="after")
+    def _one_form(self) -> RunBulkCreateIn:
+        single = (self.prompt_name, self.inputs)
+        if self.runs is not None and single == (None, None):
+            return self
+        if self.runs is None and None not in single:
+            return self
+        raise ValueError("provide either runs, or prompt_name and inputs")
+
+    def items(self) -> list[RunCreateIn]:
+        if self.runs is not None:
+            return self.runs
+        return [RunCreateIn(prompt_name=self.prompt_name, input=input) for input in self.inputs]
+
+
+class RunBulkItemError(BaseModel):
+    index: int
+    detail: str
+
+
+class RunBulkCreateOut(BaseModel):
+    # Aligned with the request items; None where the item failed (see errors).
+    ids: list[uuid.UUID | None]
+    created: int
+    # Of `created`, how many were served from the run result cache.
+    cached: int = 0
+    errors: list[RunBulkItemError] = []
+
+
 class RunOut(BaseModel):
     id: uuid.UUID
     prompt_id: uuid.UUID
     prompt_version: int
+    eval_run_id: uuid.UUID | None = None
+    dataset_item_id: uuid.UUID | None = None
     status: str
+    cache_hit: bool = False
     input: dict | None
+    # Only a preview when output_truncated; the full body is at
+    # GET /api/runs/{id}/output. output_size is in UTF-8 bytes.
     output: str | None
+    output_size: int | None = None
+    output_truncated: bool = False
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    # Set for runs whose runner streams output; minus started_at, the time to
+    # first token.
+    first_token_at: datetime | None = None
+    finished_at: datetime | None
+
+    model_config = {"from_attributes": True}
+
+    @model_validator(mode="after")
+    def _inline_output_size(self) -> RunOut:
+        if self.output_size is None and self.output is not None:
+            self.output_size = len(self.output.encode())
+        return self
+
+
+class RunSummaryOut(BaseModel):
+    """A run in a listing: input and output as previews of RUN_PREVIEW_CHARS characters and sizes."""
+
+    id: uuid.UUID
+    prompt_id: uuid.UUID
+    prompt_version: int
+    eval_run_id: uuid.UUID | None = None
+    dataset_item_id: uuid.UUID | None = None
+    status: str
+    cache_hit: bool = False
+    # The input as JSON text; sizes are in UTF-8 bytes.
+    input_preview: str | None
+    input_size: int | None
+    output_preview: str | None
+    output_size: int | None
     error: str | None
     created_at: datetime
     started_at: datetime | None
+    first_token_at: datetime | None = None
     finished_at: datetime | None
 
     model_config = {"from_attributes": True}
+
+
+class RunOutputTailOut(BaseModel):
+    """The run's output from `offset` on, as far as it is known; offsets count characters.
+
+    While the run executes this is what the runner has streamed so far; once
+    it finished (`done`), the final output. Poll again from `next_offset`.
+    """
+
+    status: str
+    offset: int
+    text: str
+    next_offset: int
+    done: bool
+
+
+class RunQueuePromptOut(BaseModel):
+    prompt_id: uuid.UUID
+    prompt_name: str
+    queued: int
+    running: int
+    # None when nothing is queued; waits are in seconds, up to now.
+    oldest_queued_at: datetime | None
+    max_wait_seconds: float
+
+
+class RunQueueOut(BaseModel):
+    """Queue depth right now, in total and per prompt (longest waiting first)."""
+
+    queued: int
+    running: int
+    max_wait_seconds: float
+    prompts: list[RunQueuePromptOut]
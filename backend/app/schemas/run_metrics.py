@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+MetricsInterval = Literal["minute", "hour", "day"]
+
+
+class LatencyOut(BaseModel):
+    # Milliseconds. Percentiles are read from a log-scale histogram and are
+    # within ~4.4% of the exact value; mean and max are exact.
+    mean: float
+    p50: float
+    p90: float
+    p95: float
+    p99: float
+    max: float
+
+
+class RunMetricsBucketOut(BaseModel):
+    start: datetime
+    runs: int
+    succeeded: int
+    failed: int
+    error_rate: float
+    # Execution time of succeeded runs; None when no run in the bucket succeeded.
+    latency_ms: LatencyOut | None = None
+    # Time runs spent queued before they started, failed ones included; None
+    # when the bucket has none recorded.
+    queue_wait_ms: LatencyOut | None = None
+
+
+class RunMetricsOut(BaseModel):
+    prompt_id: uuid.UUID
+    # None: all versions together.
+    version: int | None = None
+    interval: MetricsInterval
+    since: datetime
+    until: datetime
+    # The whole window, with start = since.
+    total: RunMetricsBucketOut
+    # Only buckets with runs, oldest first.
+    buckets: list[RunMetricsBucketOut]
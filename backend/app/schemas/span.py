@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+from pydantic.alias_generators import to_camel
+
+# Per request, for both the native and the OTLP endpoint. OTLP exporters send
+# 512 spans per batch by default.
+MAX_SPANS_PER_REQUEST = 10_000
+
+
+class SpanIn(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    # OpenTelemetry ids, hex. Stored lowercase.
+    trace_id: str = Field(pattern=r"^[0-9a-f]{32}$")
+    span_id: str = Field(pattern=r"^[0-9a-f]{16}$")
+    parent_span_id: str | None = Field(default=None, pattern=r"^[0-9a-f]{16}$")
+    run_id: uuid.UUID
+    name: str = Field(min_length=1)
+    start_time: datetime
+    end_time: datetime
+    attributes: dict[str, Any] | None = None
+
+    @field_validator("trace_id", "span_id", "parent_span_id", mode="before")
+    @classmethod
+    def _lowercase(cls, value: Any) -> Any:
+        return value.lower() if isinstance(value, str) else value
+
+    @model_validator(mode="after")
+    def _ordered(self) -> SpanIn:
+        if self.end_time < self.start_time:
+            raise ValueError("end_time is before start_time")
+        return self
+
+
+class SpanBatchIn(BaseModel):
+    spans: list[SpanIn] = Field(min_length=1, max_length=MAX_SPANS_PER_REQUEST)
+
+
+class SpanIngestOut(BaseModel):
+    received: int
+    inserted: int
+    # Already stored (same trace_id and span_id).
+    duplicates: int
+    # Dropped because their run does not exist.
+    unknown_run: int
+
+
+class SpanNodeOut(BaseModel):
+    trace_id: str
+    span_id: str
+    parent_span_id: str | None = None
+    name: str
+    start_time: datetime
+    end_time: datetime
+    duration_ms: float
+    attributes: dict[str, Any] | None = None
+    children: list[SpanNodeOut] = []
+
+
+class RunSpanTreeOut(BaseModel):
+    run_id: uuid.UUID
+    span_count: int
+    # Spans without a parent in the run, in start order; children likewise.
+    roots: list[SpanNodeOut]
+
+
+# OTLP/HTTP JSON (ExportTraceServiceRequest). Only the fields we store are
+# modeled; ids are hex and 64-bit integers may arrive as strings, per the spec.
+class _Otlp(BaseModel):
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
+
+class OtlpKeyValue(_Otlp):
+    key: str
+    # An AnyValue: {"stringValue": ...}, {"intValue": ...}, {"arrayValue": {"values": [...]}}, ...
+    value: dict[str, Any] = {}
+
+
+class OtlpStatus(_Otlp):
+    code: int = 0
+    message: str = ""
+
+
+class OtlpSpan(_Otlp):
+    trace_id: str
+    span_id: str
+    parent_span_id: str = ""
+    name: str
+    kind: int = 0
+    start_time_unix_nano: int
+    end_time_unix_nano: int
+    attributes: list[OtlpKeyValue] = []
+    status: OtlpStatus | None = None
+
+
+class OtlpScopeSpans(_Otlp):
+    spans: list[OtlpSpan] = []
+
+
+class OtlpResource(_Otlp):
+    attributes: list[OtlpKeyValue] = []
+
+
+class OtlpResourceSpans(_Otlp):
+    resource: OtlpResource | None = None
+    scope_spans: list[OtlpScopeSpans] = []
+
+
+class OtlpTracesIn(_Otlp):
+    resource_spans: list[OtlpResourceSpans] = []
+
+
+class OtlpPartialSuccess(_Otlp):
+    rejected_spans: int = 0
+    error_message: str = ""
+
+
+class OtlpTracesOut(_Otlp):
+    partial_success: OtlpPartialSuccess
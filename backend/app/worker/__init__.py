@@ -0,0 +1,40 @@
+"""Run execution worker: `python -m app.worker`."""
+
+from .output import OutputWriter
+from .queue import claim_runs, finish_run, finish_runs, queued_prompts, renew_leases, requeue_expired_runs
+from .ratelimit import TokenBucket
+from .runners import (
+    CodexRunner,
+    FakeRunner,
+    Runner,
+    RunnerError,
+    RunJob,
+    RunResult,
+    StreamingRunner,
+    get_runner,
+)
+from .scheduler import QueuedPrompt, Scheduler, parse_weights
+from .worker import Worker
+
+__all__ = [
+    "claim_runs",
+    "finish_run",
+    "finish_runs",
+    "queued_prompts",
+    "renew_leases",
+    "requeue_expired_runs",
+    "OutputWriter",
+    "CodexRunner",
+    "FakeRunner",
+    "Runner",
+    "RunnerError",
+    "RunJob",
+    "RunResult",
+    "StreamingRunner",
+    "QueuedPrompt",
+    "Scheduler",
+    "parse_weights",
+    "TokenBucket",
+    "get_runner",
+    "Worker",
+]
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import logging
+import signal
+import threading
+
+from app.settings import settings
+
+from .runners import get_runner
+from .scheduler import Scheduler, parse_weights
+from .worker import Worker
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    worker = Worker(
+        get_runner(settings.worker_runner),
+        concurrency=settings.worker_concurrency,
+        batch_size=settings.worker_batch_size,
+        poll_interval_seconds=settings.worker_poll_interval_seconds,
+        scheduler=Scheduler(
+            weights=parse_weights(settings.worker_prompt_weights),
+            prompt_rate=settings.worker_prompt_max_runs_per_second,
+            prompt_max_in_flight=settings.worker_prompt_max_in_flight,
+            runner_rate=settings.worker_max_runs_per_second,
+            max_in_flight=settings.worker_max_in_flight,
+        ),
+        cache_results=settings.run_cache_ttl_seconds > 0,
+    )
+    logging.getLogger(__name__).info(
+        "worker started: runner=%s concurrency=%d batch_size=%d",
+        settings.worker_runner,
+        settings.worker_concurrency,
+        settings.worker_batch_size,
+    )
+    worker.run_forever(stop)
+
+
+if __name__ == "__main__":
+    main()
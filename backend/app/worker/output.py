@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable
+
+from sqlalchemy import DateTime, Integer, Text, and_, column, select, update, values
+from sqlalchemy.dialects.postgresql import UUID, insert
+from sqlalchemy.orm import Session
+
+from app import events
+from app.models import Run, RunOutputChunk
+
+logger = logging.getLogger(__name__)
+
+# A chunk rides along in its run event up to this many characters of JSON
+# (ASCII, so bytes), keeping the notification under Postgres's 8000-byte
+# payload limit; watchers read longer ones from run_output_chunks.
+EVENT_OUTPUT_MAX_CHARS = 4000
+
+
+@dataclass
+class _RunOutput:
+    first_token_at: datetime
+    # Characters already handed to a flush.
+    flushed: int = 0
+    pending: list[str] = field(default_factory=list)
+    first_token_written: bool = False
+
+
+class OutputWriter:
+    """Buffers the output runners stream and appends it to run_output_chunks in batches.
+
+    Executor threads `append` chunks as they arrive. A background thread
+    writes everything pending, for all runs at once, in one transaction: one
+    multi-row INSERT of one chunk per run, plus first_token_at for runs that
+    just produced their first output and one event per chunk (see
+    app.events). It does so every `flush_seconds`, or as soon as
+    `flush_bytes` are pending. So the number of writes is bounded by time and
+    volume, not by how finely a runner splits its output, and each byte of
+    output is written once here and once more in the final runs.output.
+
+    `finish` is called when a run's stream ends; pending chunks are dropped
+    (the final output supersedes them) and any write already under way is
+    waited for, so the chunk rows that finish_runs deletes are all there.
+
+    Runs are tracked per claim (run id and attempt). Chunks are only written
+    while their claim is the run's current one, so the output of a claim
+    whose lease lapsed never lands next to the next attempt's; `discard`
+    drops such a claim's output as soon as the worker learns of the loss. A
+    batch the database rejects is retried run by run, so one bad chunk only
+    holds back its own run.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        *,
+        flush_bytes: int,
+        flush_seconds: float,
+    ) -> None:
+        self.session_factory = session_factory
+        self.flush_bytes = flush_bytes
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        # Held while a batch is written, so finish can wait for it.
+        self._write_lock = threading.Lock()
+        self._runs: dict[tuple[uuid.UUID, int], _RunOutput] = {}
+        self._discarded: set[tuple[uuid.UUID, int]] = set()
+        self._pending_bytes = 0
+        self._thread: threading.Thread | None = None
+        self._stop = False
+
+    def append(self, run_id: uuid.UUID, text: str, *, attempt: int = 1) -> None:
+        if not text:
+            return
+        key = (run_id, attempt)
+        with self._lock:
+            if key in self._discarded:
+                return
+            run = self._runs.get(key)
+            if run is None:
+                run = self._runs[key] = _RunOutput(first_token_at=datetime.now(timezone.utc))
+            run.pending.append(text)
+            self._pending_bytes += len(text.encode())
+            if self._pending_bytes >= self.flush_bytes:
+                self._wake.notify()
+
+    def finish(self, run_id: uuid.UUID, *, attempt: int = 1) -> datetime | None:
+        """Stop tracking a run whose stream ended; returns when its first chunk arrived."""
+
+        with self._write_lock, self._lock:
+            self._discarded.discard((run_id, attempt))
+            run = self._runs.pop((run_id, attempt), None)
+            if run is None:
+                return None
+            self._pending_bytes -= sum(len(text.encode()) for text in run.pending)
+            return run.first_token_at
+
+    def discard(self, run_id: uuid.UUID, *, attempt: int = 1) -> None:
+        """Drop a claim's pending output and ignore what it streams until `finish`."""
+
+        with self._lock:
+            self._discarded.add((run_id, attempt))
+            run = self._runs.pop((run_id, attempt), None)
+            if run is not None:
+                self._pending_bytes -= sum(len(text.encode()) for text in run.pending)
+
+    def discarded(self, run_id: uuid.UUID, *, attempt: int = 1) -> bool:
+        with self._lock:
+            return (run_id, attempt) in self._discarded
+
+    def flush(self) -> int:
+        """Write out everything pending; returns the number of chunks written."""
+
+        with self._write_lock:
+            with self._lock:
+                chunks = []
+                first_tokens = []
+                for (run_id, attempt), run in self._runs.items():
+                    if run.pending:
+                        text = "".join(run.pending)
+                        chunks.append(
+                            {"run_id": run_id, "attempt": attempt, "start": run.flushed, "text": text}
+                        )
+                        run.flushed += len(text)
+                        run.pending.clear()
+                    if not run.first_token_written:
+                        first_tokens.append((run_id, attempt, run.first_token_at))
+                        run.first_token_written = True
+                self._pending_bytes = 0
+            if not chunks:
+                return 0
+            try:
+                with self.session_factory() as db:
+                    self._write(db, chunks, first_tokens)
+            except Exception:
+                if len(chunks) == 1:
+                    self._requeue(chunks, first_tokens)
+                    raise
+                self._write_each(chunks, first_tokens)
+            return len(chunks)
+
+    def _write_each(self, chunks: list[dict], first_tokens: list[tuple]) -> None:
+        """Write a rejected batch run by run, putting back only the runs that fail again."""
+
+        failed = 0
+        for chunk in chunks:
+            key = (chunk["run_id"], chunk["attempt"])
+            first = [t for t in first_tokens if (t[0], t[1]) == key]
+            try:
+                with self.session_factory() as db:
+                    self._write(db, [chunk], first)
+            except Exception:
+                logger.exception("writing streamed output of run %s failed", chunk["run_id"])
+                self._requeue([chunk], first)
+                failed += 1
+        if failed:
+            raise RuntimeError(f"writing streamed output failed for {failed} of {len(chunks)} run(s)")
+
+    def _requeue(self, chunks: list[dict], first_tokens: list[tuple]) -> None:
+        """Put back what a failed write took, so the next flush has no gap."""
+
+        with self._lock:
+            for chunk in chunks:
+                run = self._runs.get((chunk["run_id"], chunk["attempt"]))
+                # Finished or discarded meanwhile: nothing to put back.
+                if run is None:
+                    continue
+                run.pending.insert(0, chunk["text"])
+                run.flushed = chunk["start"]
+                self._pending_bytes += len(chunk["text"].encode())
+            for run_id, attempt, _ in first_tokens:
+                if (run := self._runs.get((run_id, attempt))) is not None:
+                    run.first_token_written = False
+
+    def _write(self, db: Session, chunks: list[dict], first_tokens: list[tuple]) -> None:
+        chunk = values(
+            column("run_id", UUID(as_uuid=True)),
+            column("attempt", Integer),
+            column("start", Integer),
+            column("text", Text),
+            name="chunk",
+        ).data([(c["run_id"], c["attempt"], c["start"], c["text"]) for c in chunks])
+        # Only chunks of the run's current claim are written. FOR SHARE orders
+        # this write against a requeue, which locks the run FOR UPDATE: a
+        # requeue under way makes it wait and then find the claim gone, and
+        # one that comes later deletes these chunks.
+        current = (
+            select(chunk.c.run_id, chunk.c.start, chunk.c.text)
+            .join(
+                Run,
+                and_(Run.id == chunk.c.run_id, Run.status == "running", Run.attempts == chunk.c.attempt),
+            )
+            .with_for_update(read=True, of=Run)
+        )
+        written = {
+            (row.run_id, row.start)
+            for row in db.execute(
+                insert(RunOutputChunk)
+                .from_select(["run_id", "start", "text"], current)
+                .on_conflict_do_nothing()
+                .returning(RunOutputChunk.run_id, RunOutputChunk.start)
+            )
+        }
+        if first_tokens:
+            first = values(
+                column("id", UUID(as_uuid=True)),
+                column("attempt", Integer),
+                column("at", DateTime(timezone=True)),
+                name="first",
+            ).data(first_tokens)
+            db.execute(
+                update(Run)
+                .where(
+                    Run.id == first.c.id,
+                    Run.status == "running",
+                    Run.attempts == first.c.attempt,
+                    Run.first_token_at.is_(None),
+                )
+                .values(first_token_at=first.c.at)
+                .execution_options(synchronize_session=False)
+            )
+        events.notify(
+            db,
+            [
+                {"id": c["run_id"], "output_offset": c["start"], "output_length": len(c["text"])}
+                | ({"output": c["text"]} if len(json.dumps(c["text"])) <= EVENT_OUTPUT_MAX_CHARS else {})
+                for c in chunks
+                if (c["run_id"], c["start"]) in written
+            ],
+        )
+        db.commit()
+
+    def start(self) -> None:
+        with self._lock:
+            self._stop = False
+        self._thread = threading.Thread(target=self._run, name="run-output", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stop the background thread after a last flush."""
+
+        with self._lock:
+            self._stop = True
+            self._wake.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._stop and self._pending_bytes < self.flush_bytes:
+                    self._wake.wait(self.flush_seconds)
+                stop = self._stop
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("writing streamed run output failed")
+            if stop:
+                return
@@ -0,0 +1,393 @@
+from __future__ import annotations
+
+import uuid
+from collections import Counter
+from datetime import timedelta
+
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    String,
+    Text,
+    and_,
+    case,
+    cast,
+    column,
+    delete,
+    func,
+    or_,
+    select,
+    text,
+    true,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session
+
+from app import blobs, events, rollups, run_cache
+from app.db import AdvisoryLock, advisory_xact_lock
+from app.models import EvalRun, PromptVersion, Run, RunOutputChunk
+from app.settings import settings
+
+from .runners import RunJob, RunResult
+from .scheduler import QueuedPrompt, Scheduler
+
+# The prompts with queued runs, found by skipping through the queued-runs
+# index one prompt at a time (a loose index scan: one probe per prompt, however
+# many runs each has queued), each with its queued runs counted up to :limit
+# and its running runs counted; plus the total running.
+_QUEUED_PROMPTS = text(
+    """
+    WITH RECURSIVE queued AS (
+      (SELECT prompt_id FROM runs WHERE status = 'queued' ORDER BY prompt_id LIMIT 1)
+      UNION ALL
+      SELECT (
+        SELECT r.prompt_id FROM runs r
+        WHERE r.status = 'queued' AND r.prompt_id > queued.prompt_id
+        ORDER BY r.prompt_id LIMIT 1
+      )
+      FROM queued WHERE queued.prompt_id IS NOT NULL
+    )
+    SELECT q.prompt_id, p.name,
+           (SELECT count(*) FROM (
+              SELECT 1 FROM runs r WHERE r.status = 'queued' AND r.prompt_id = q.prompt_id LIMIT :limit
+            ) AS capped) AS queued,
+           (SELECT count(*) FROM runs r WHERE r.status = 'running' AND r.prompt_id = q.prompt_id) AS running,
+           (SELECT min(r.created_at) FROM runs r
+            WHERE r.status = 'queued' AND r.prompt_id = q.prompt_id) AS oldest_queued_at,
+           (SELECT count(*) FROM runs WHERE status = 'running') AS total_running
+    FROM queued q JOIN prompts p ON p.id = q.prompt_id
+    """
+)
+
+
+def queued_prompts(db: Session, limit: int) -> tuple[list[QueuedPrompt], int]:
+    """The prompts with queued runs, and how many runs are running in total."""
+
+    rows = db.execute(_QUEUED_PROMPTS, {"limit": limit}).all()
+    prompts = [QueuedPrompt(r.prompt_id, r.name, r.queued, r.running, r.oldest_queued_at) for r in rows]
+    if rows:
+        return prompts, rows[0].total_running
+    return prompts, db.scalar(select(func.count()).select_from(Run).where(Run.status == "running"))
+
+
+def claim_runs(
+    db: Session,
+    limit: int,
+    *,
+    scheduler: Scheduler | None = None,
+    lease_seconds: float = settings.worker_lease_seconds,
+) -> list[RunJob]:
+    """Atomically move up to `limit` queued runs to `running` and return them.
+
+    Without a scheduler, oldest first. With one, the scheduler decides how
+    many runs of each prompt to take (see app.worker.scheduler), oldest first
+    within each prompt. `FOR UPDATE SKIP LOCKED` makes concurrent claimers
+    (threads or processes) pass over rows another claimer has locked instead
+    of blocking on them, so no run is handed out twice. Claim and content
+    lookup are a single statement; the claim is committed before returning,
+    along with a `running` event per run (see app.events).
+
+    Each claim counts as an attempt and leases the run to the claimer for
+    `lease_seconds`: the claimer renews the lease (renew_leases) while the
+    run executes, and once it lapses requeue_expired_runs takes the run back.
+    """
+
+    if scheduler is None:
+        pick = (
+            select(Run.id)
+            .where(Run.status == "queued")
+            .order_by(Run.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return _claim(db, pick, lease_seconds)
+
+    if scheduler.caps_in_flight:
+        # Held for the rest of the claim, so two workers never both see room
+        # for the same slot.
+        advisory_xact_lock(db, AdvisoryLock.RUN_CLAIM)
+    prompts, running = queued_prompts(db, limit)
+    planned = scheduler.plan(prompts, limit, running=running)
+    if not planned:
+        db.commit()
+        return []
+    quota = values(column("prompt_id", UUID(as_uuid=True)), column("n", Integer), name="quota").data(
+        list(planned.items())
+    )
+    per_prompt = (
+        select(Run.id)
+        .where(Run.status == "queued", Run.prompt_id == quota.c.prompt_id)
+        .order_by(Run.created_at)
+        .limit(quota.c.n)
+        .with_for_update(skip_locked=True)
+        .lateral("per_prompt")
+    )
+    pick = select(per_prompt.c.id).select_from(quota).join(per_prompt, true())
+    jobs: list[RunJob] = []
+    try:
+        jobs = _claim(db, pick, lease_seconds)
+    finally:
+        scheduler.claimed(planned, Counter(job.prompt_id for job in jobs))
+    return jobs
+
+
+def _claim(db: Session, pick, lease_seconds: float) -> list[RunJob]:
+    claimed = (
+        update(Run)
+        .where(Run.id.in_(pick.scalar_subquery()))
+        .values(
+            status="running",
+            started_at=func.now(),
+            attempts=Run.attempts + 1,
+            lease_expires_at=func.now() + timedelta(seconds=lease_seconds),
+        )
+        .returning(Run.id, Run.prompt_id, Run.prompt_version, Run.input, Run.started_at, Run.attempts)
+        .cte("claimed")
+    )
+    stmt = select(claimed, PromptVersion.content).outerjoin(
+        PromptVersion,
+        and_(
+            PromptVersion.prompt_id == claimed.c.prompt_id,
+            PromptVersion.version == claimed.c.prompt_version,
+        ),
+    )
+
+    rows = db.execute(stmt).all()
+    events.notify(db, [{"id": r.id, "status": "running", "started_at": r.started_at} for r in rows])
+    db.commit()
+
+    return [
+        RunJob(
+            run_id=r.id,
+            prompt_id=r.prompt_id,
+            prompt_version=r.prompt_version,
+            content=r.content,
+            input=r.input,
+            attempt=r.attempts,
+        )
+        for r in rows
+    ]
+
+
+def renew_leases(db: Session, jobs: list[RunJob], lease_seconds: float) -> list[RunJob]:
+    """Extend the leases of claims still executing; returns the claims that were lost.
+
+    One statement for all of a worker's runs in flight. A claim is lost once
+    its run is no longer running under that attempt: a sweep took it back
+    after the lease lapsed (and it may have been claimed again since).
+    """
+
+    if not jobs:
+        return []
+    claim = values(column("id", UUID(as_uuid=True)), column("attempt", Integer), name="claim").data(
+        [(job.run_id, job.attempt) for job in jobs]
+    )
+    renewed = {
+        (row.id, row.attempts)
+        for row in db.execute(
+            update(Run)
+            .where(Run.id == claim.c.id, Run.status == "running", Run.attempts == claim.c.attempt)
+            .values(lease_expires_at=func.now() + timedelta(seconds=lease_seconds))
+            .returning(Run.id, Run.attempts)
+            .execution_options(synchronize_session=False)
+        )
+    }
+    db.commit()
+    return [job for job in jobs if (job.run_id, job.attempt) not in renewed]
+
+
+def requeue_expired_runs(
+    db: Session, *, max_attempts: int = settings.worker_max_attempts, limit: int = 1000
+) -> tuple[int, int]:
+    """Take back running runs whose lease lapsed; returns how many were requeued and failed.
+
+    A lapsed lease means the worker stopped renewing it: it crashed, was
+    killed or lost the database. Such a run goes back to the queue to be
+    claimed again, or, once it has been claimed `max_attempts` times (it may be
+    what brings workers down), is failed like any other run, which also
+    counts it towards its eval run. Output streamed by the lost attempt is
+    discarded. The expired rows are locked with SKIP LOCKED, so concurrent
+    sweeps split them up rather than handle any twice.
+    """
+
+    expired = db.execute(
+        select(Run.id, Run.attempts)
+        .where(Run.status == "running", Run.lease_expires_at < func.now())
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not expired:
+        db.rollback()
+        return 0, 0
+
+    retry = [row.id for row in expired if row.attempts < max_attempts]
+    give_up = [row for row in expired if row.attempts >= max_attempts]
+    db.execute(delete(RunOutputChunk).where(RunOutputChunk.run_id.in_([row.id for row in expired])))
+    if retry:
+        db.execute(
+            update(Run)
+            .where(Run.id.in_(retry))
+            .values(status="queued", started_at=None, first_token_at=None, lease_expires_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        events.notify(db, [{"id": run_id, "status": "queued"} for run_id in retry])
+    if not give_up:
+        db.commit()
+        return len(retry), 0
+
+    # finish_runs commits the requeues too.
+    failed = finish_runs(
+        db,
+        [
+            RunResult(
+                row.id,
+                error=f"worker lost the run: lease expired on attempt {row.attempts} of {max_attempts}",
+                attempt=row.attempts,
+            )
+            for row in give_up
+        ],
+    )
+    return len(retry), failed
+
+
+def finish_runs(db: Session, results: list[RunResult], *, cache_runner: str | None = None) -> int:
+    """Record the outcomes of claimed runs in one transaction; returns how many were applied.
+
+    All runs are updated by a single UPDATE ... FROM (VALUES ...), and each
+    affected eval run gets one counter update for the whole batch, so the
+    eval's progress row is written once per flush instead of once per run and
+    always agrees with the runs table. Runs no longer in `running` are skipped.
+    The finished runs are folded into the latency/error-rate rollups (see
+    app.rollups) and announced to watchers (see app.events) in the same
+    transaction. Results carrying an `attempt` only apply to that claim of
+    the run, so a worker whose lease lapsed cannot overwrite a later attempt.
+    Outputs over RUN_OUTPUT_SPILL_BYTES
+    are written to the blob store first and stored as a preview (see
+    app.blobs).
+
+    Streamed runs' chunks in run_output_chunks (see app.worker.output) are
+    deleted in the same transaction.
+
+    With `cache_runner`, successful outputs are also written to the run result
+    cache under that runner name, in the same transaction.
+    """
+
+    if not results:
+        return 0
+
+    # Large outputs go to the blob store before the rows pointing at them commit.
+    outputs = {r.run_id: blobs.spill(r.output) for r in results if r.output is not None}
+    outcome = values(
+        column("id", UUID(as_uuid=True)),
+        column("status", String),
+        column("output", Text),
+        column("output_blob_key", String),
+        column("output_size", Integer),
+        column("error", Text),
+        column("first_token_at", DateTime(timezone=True)),
+        column("attempt", Integer),
+        name="outcome",
+    ).data(
+        [
+            (
+                r.run_id,
+                "failed" if r.error is not None else "succeeded",
+                *(outputs.get(r.run_id) or (None, None, None)),
+                r.error,
+                r.first_token_at,
+                r.attempt,
+            )
+            for r in results
+        ]
+    )
+    finished = db.execute(
+        update(Run)
+        .where(
+            Run.id == outcome.c.id,
+            Run.status == "running",
+            # A result of a claim that has since been requeued (and maybe claimed
+            # again) is stale.
+            or_(outcome.c.attempt.is_(None), Run.attempts == cast(outcome.c.attempt, Integer)),
+        )
+        .values(
+            status=outcome.c.status,
+            output=outcome.c.output,
+            output_blob_key=outcome.c.output_blob_key,
+            # An all-NULL VALUES column is typed text.
+            output_size=cast(outcome.c.output_size, Integer),
+            error=outcome.c.error,
+            first_token_at=func.coalesce(
+                Run.first_token_at, cast(outcome.c.first_token_at, DateTime(timezone=True))
+            ),
+            finished_at=func.now(),
+            lease_expires_at=None,
+        )
+        .returning(
+            Run.id,
+            Run.eval_run_id,
+            Run.status,
+            Run.cache_key,
+            Run.prompt_id,
+            Run.prompt_version,
+            Run.created_at,
+            Run.started_at,
+            Run.finished_at,
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    if cache_runner is not None:
+        run_cache.store(
+            db,
+            cache_runner,
+            {
+                row.cache_key: outputs[row.id]
+                for row in finished
+                if row.status == "succeeded" and row.id in outputs
+            },
+        )
+
+    # The final output supersedes the chunks streamed while the run executed.
+    streamed = [r.run_id for r in results if r.first_token_at is not None]
+    if streamed:
+        db.execute(delete(RunOutputChunk).where(RunOutputChunk.run_id.in_(streamed)))
+
+    rollups.record(db, finished)
+    events.notify(db, [{"id": row.id, "status": row.status} for row in finished])
+
+    progress = Counter((row.eval_run_id, row.status) for row in finished if row.eval_run_id is not None)
+    # Sorted so concurrent workers lock eval rows in the same order.
+    for eval_run_id in sorted({eval_run_id for eval_run_id, _ in progress}, key=str):
+        _bump_eval_progress(
+            db,
+            eval_run_id,
+            succeeded=progress[(eval_run_id, "succeeded")],
+            failed=progress[(eval_run_id, "failed")],
+        )
+
+    db.commit()
+    return len(finished)
+
+
+def finish_run(
+    db: Session, run_id: uuid.UUID, *, output: str | None = None, error: str | None = None
+) -> bool:
+    """Record a single claimed run's outcome. Returns False if the run is no longer running."""
+
+    return finish_runs(db, [RunResult(run_id=run_id, output=output, error=error)]) == 1
+
+
+def _bump_eval_progress(db: Session, eval_run_id: uuid.UUID, *, succeeded: int, failed: int) -> None:
+    done = EvalRun.succeeded + EvalRun.failed + succeeded + failed >= EvalRun.total
+    db.execute(
+        update(EvalRun)
+        .where(EvalRun.id == eval_run_id)
+        .values(
+            succeeded=EvalRun.succeeded + succeeded,
+            failed=EvalRun.failed + failed,
+            status=case((done, "completed"), else_=EvalRun.status),
+            finished_at=case((done, func.now()), else_=EvalRun.finished_at),
+        )
+    )
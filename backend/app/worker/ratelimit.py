@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/second, up to `burst` banked.
+
+    Never blocks. The scheduler (app.worker.scheduler) keeps one per runner
+    and per prompt to cap how fast runs start, e.g. to stay under an upstream
+    model's requests-per-second limit: it `take`s a token for each run it
+    plans to claim and gives back the ones it did not get.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def take(self, n: int) -> int:
+        """Take up to `n` whole tokens without waiting; returns how many were taken."""
+
+        with self._lock:
+            self._refill()
+            taken = max(0, min(n, int(self._tokens)))
+            self._tokens -= taken
+            return taken
+
+    def give_back(self, n: int) -> None:
+        """Return tokens taken but not used."""
+
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.burst, self._tokens + n)
+
+    def full(self) -> bool:
+        with self._lock:
+            self._refill()
+            return self._tokens >= self.burst
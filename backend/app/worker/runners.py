@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import re
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Protocol
+
+from app.settings import settings
+
+_VAR_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+@dataclass(frozen=True)
+class RunJob:
+    """A claimed run plus the prompt version content it should execute."""
+
+    run_id: uuid.UUID
+    prompt_id: uuid.UUID
+    prompt_version: int
+    # None only if the version row is missing; the worker fails such runs.
+    content: str | None
+    input: dict | None
+    # Which claim of the run this is, counting from 1 (see app.worker.queue).
+    attempt: int = 1
+
+
+@dataclass(frozen=True)
+class RunResult:
+    run_id: uuid.UUID
+    output: str | None = None
+    # Set when the run failed; output is then None.
+    error: str | None = None
+    # When a streaming runner yielded the first chunk.
+    first_token_at: datetime | None = None
+    # The claim the result belongs to; a result for an older claim of a run
+    # that was requeued is dropped. None: whatever claim holds the run.
+    attempt: int | None = None
+
+
+class RunnerError(Exception):
+    """A run failed; the message is stored on the run as its error."""
+
+
+class Runner(Protocol):
+    name: str
+
+    def run(self, job: RunJob) -> str:
+        """Execute a job and return its output. Raise to mark the run failed."""
+        ...
+
+
+class StreamingRunner(Runner, Protocol):
+    """A runner that can also hand out its output as it is produced.
+
+    The worker prefers `stream` when a runner has it: chunks become visible
+    to readers of the run while it executes (see app.worker.output).
+    """
+
+    def stream(self, job: RunJob) -> Iterator[str]:
+        """Execute a job, yielding its output in order. Raise to mark the run failed."""
+        ...
+
+
+def render_prompt(content: str, input: dict | None) -> str:
+    """Substitute `{{var}}` placeholders from the run input; unknown ones are left as-is."""
+
+    values = input or {}
+    return _VAR_RE.sub(lambda m: str(values[m[1]]) if m[1] in values else m[0], content)
+
+
+class FakeRunner:
+    """Deterministic local runner for tests and development: echoes the rendered prompt.
+
+    `stream` yields it word by word (with the whitespace that follows each
+    word), spreading `delay_seconds` over the words.
+    """
+
+    name = "fake"
+
+    def __init__(self, delay_seconds: float = 0.0, fail_marker: str | None = None) -> None:
+        self.delay_seconds = delay_seconds
+        self.fail_marker = fail_marker
+
+    def _render(self, job: RunJob) -> str:
+        rendered = render_prompt(job.content, job.input)
+        if self.fail_marker is not None and self.fail_marker in rendered:
+            raise RunnerError(f"fake failure: prompt contains {self.fail_marker!r}")
+        return rendered
+
+    def run(self, job: RunJob) -> str:
+        if self.delay_seconds:
+            time.sleep(self.delay_seconds)
+        return self._render(job)
+
+    def stream(self, job: RunJob) -> Iterator[str]:
+        rendered = self._render(job)
+        words = re.findall(r"\s*\S+\s*", rendered) or [rendered]
+        for word in words:
+            if self.delay_seconds:
+                time.sleep(self.delay_seconds / len(words))
+            yield word
+
+
+class CodexRunner:
+    """Runs the rendered prompt through `codex exec` and returns its stdout.
+
+    `stream` yields stdout line by line as codex writes it.
+    """
+
+    name = "codex"
+
+    def __init__(
+        self,
+        binary: str = settings.codex_bin,
+        timeout_seconds: float = settings.codex_timeout_seconds,
+    ) -> None:
+        self.binary = binary
+        self.timeout_seconds = timeout_seconds
+
+    def run(self, job: RunJob) -> str:
+        return "".join(self.stream(job))
+
+    def stream(self, job: RunJob) -> Iterator[str]:
+        prompt = render_prompt(job.content, job.input)
+        # stderr goes to a file so a chatty codex cannot block on a full pipe
+        # while stdout is being read.
+        with tempfile.TemporaryFile(mode="w+") as stderr:
+            try:
+                proc = subprocess.Popen(
+                    [self.binary, "exec", prompt], stdout=subprocess.PIPE, stderr=stderr, text=True
+                )
+            except FileNotFoundError as e:
+                raise RunnerError(f"codex binary not found: {self.binary}") from e
+
+            timed_out = threading.Event()
+
+            def kill() -> None:
+                timed_out.set()
+                proc.kill()
+
+            timer = threading.Timer(self.timeout_seconds, kill)
+            timer.start()
+            try:
+                yield from proc.stdout
+                returncode = proc.wait()
+            finally:
+                timer.cancel()
+                if proc.poll() is None:  # the consumer stopped early
+                    proc.kill()
+                proc.wait()
+                proc.stdout.close()
+
+            if timed_out.is_set():
+                raise RunnerError(f"codex timed out after {self.timeout_seconds:g}s")
+            if returncode != 0:
+                stderr.seek(0)
+                raise RunnerError(f"codex exited with status {returncode}: {stderr.read().strip()[-2000:]}")
+
+
+def get_runner(name: str) -> Runner:
+    if name == "fake":
+        return FakeRunner()
+    if name == "codex":
+        return CodexRunner()
+    raise ValueError(f"unknown runner: {name!r}")
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import heapq
+import threading
+import time
+import uuid
+from collections import Counter
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from datetime import datetime
+
+from .ratelimit import TokenBucket
+
+
+@dataclass(frozen=True)
+class QueuedPrompt:
+    """A prompt with queued runs, as the claim query sees it."""
+
+    prompt_id: uuid.UUID
+    name: str
+    # Counted up to the claim's limit; more would not change the plan.
+    queued: int
+    # Across all workers.
+    running: int
+    oldest_queued_at: datetime
+
+
+def parse_weights(spec: str) -> dict[str, float]:
+    """Parse "name=weight,name=weight" (WORKER_PROMPT_WEIGHTS) into a mapping."""
+
+    weights: dict[str, float] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, sep, weight = item.rpartition("=")
+        if not sep or not name.strip():
+            raise ValueError(f"expected name=weight, got {item!r}")
+        value = float(weight)
+        if value <= 0:
+            raise ValueError(f"weight of {name.strip()!r} must be > 0")
+        weights[name.strip()] = value
+    return weights
+
+
+class Scheduler:
+    """Decides how many queued runs of each prompt a worker claims next.
+
+    Slots are shared out across prompts by weighted fair queuing (stride
+    scheduling): each prompt has a virtual finish tag that advances by
+    1/weight per run it is given, and the next run goes to the prompt with
+    the lowest tag, oldest queued run first on ties. A prompt that was idle
+    or held back starts from the current virtual time rather than its old
+    tag, so it cannot bank credit. A batch of 10,000 runs therefore takes
+    turns with a single run queued after it instead of going first.
+
+    Limits, each off when 0:
+
+    - `prompt_max_in_flight` / `max_in_flight`: running runs per prompt / in
+      total, across all workers (counted in the claim transaction, which is
+      then serialized so workers do not overshoot together);
+    - `prompt_rate` / `runner_rate`: run starts per second per prompt / in
+      total, token buckets local to this worker process.
+
+    Used by claim_runs: `plan` takes the tokens for the runs it hands out and
+    `claimed` returns those of runs another worker got first.
+    """
+
+    def __init__(
+        self,
+        *,
+        weights: Mapping[str, float] | None = None,
+        prompt_rate: float = 0.0,
+        prompt_max_in_flight: int = 0,
+        runner_rate: float = 0.0,
+        max_in_flight: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.weights = dict(weights or {})
+        self.prompt_rate = prompt_rate
+        self.prompt_max_in_flight = prompt_max_in_flight
+        self.max_in_flight = max_in_flight
+        self._clock = clock
+        self.runner_bucket = TokenBucket(runner_rate, clock=clock) if runner_rate > 0 else None
+        self._prompt_buckets: dict[uuid.UUID, TokenBucket] = {}
+        self._tags: dict[uuid.UUID, float] = {}
+        self._virtual_time = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def caps_in_flight(self) -> bool:
+        return self.prompt_max_in_flight > 0 or self.max_in_flight > 0
+
+    def weight(self, name: str) -> float:
+        return self.weights.get(name, 1.0)
+
+    def plan(self, prompts: list[QueuedPrompt], slots: int, *, running: int = 0) -> dict[uuid.UUID, int]:
+        """How many runs to claim per prompt, at most `slots` in all; `running` is the total in flight.
+
+        Takes the token bucket tokens for the planned runs; hand whatever is
+        not claimed back with `claimed`.
+        """
+
+        with self._lock:
+            caps = {p.prompt_id: p.queued for p in prompts}
+            if self.prompt_max_in_flight:
+                for p in prompts:
+                    caps[p.prompt_id] = min(caps[p.prompt_id], self.prompt_max_in_flight - p.running)
+            slots = min(slots, sum(max(cap, 0) for cap in caps.values()))
+            if self.max_in_flight:
+                slots = min(slots, self.max_in_flight - running)
+            if slots <= 0:
+                self._prune(prompts)
+                return {}
+            if self.runner_bucket is not None:
+                slots = self.runner_bucket.take(slots)
+            if self.prompt_rate:
+                for p in prompts:
+                    if caps[p.prompt_id] > 0:
+                        caps[p.prompt_id] = self._bucket(p.prompt_id).take(min(caps[p.prompt_id], slots))
+
+            heap = [
+                (max(self._tags.get(p.prompt_id, 0.0), self._virtual_time), p.oldest_queued_at, p.prompt_id)
+                for p in prompts
+                if caps[p.prompt_id] > 0
+            ]
+            heapq.heapify(heap)
+            weights = {p.prompt_id: self.weight(p.name) for p in prompts}
+            quotas: Counter[uuid.UUID] = Counter()
+            while slots and heap:
+                tag, oldest, prompt_id = heapq.heappop(heap)
+                self._virtual_time = tag
+                quotas[prompt_id] += 1
+                slots -= 1
+                tag += 1.0 / weights[prompt_id]
+                self._tags[prompt_id] = tag
+                if quotas[prompt_id] < caps[prompt_id]:
+                    heapq.heappush(heap, (tag, oldest, prompt_id))
+
+            if self.runner_bucket is not None and slots:
+                self.runner_bucket.give_back(slots)
+            if self.prompt_rate:
+                for prompt_id, cap in caps.items():
+                    if cap > quotas[prompt_id]:
+                        self._bucket(prompt_id).give_back(cap - quotas[prompt_id])
+            self._prune(prompts)
+            return dict(quotas)
+
+    def claimed(self, planned: Mapping[uuid.UUID, int], claimed: Mapping[uuid.UUID, int]) -> None:
+        """Hand back the tokens of planned runs that were not claimed (another worker got them)."""
+
+        with self._lock:
+            for prompt_id, n in planned.items():
+                missed = n - claimed.get(prompt_id, 0)
+                if missed <= 0:
+                    continue
+                if self.runner_bucket is not None:
+                    self.runner_bucket.give_back(missed)
+                if self.prompt_rate:
+                    self._bucket(prompt_id).give_back(missed)
+
+    def _bucket(self, prompt_id: uuid.UUID) -> TokenBucket:
+        bucket = self._prompt_buckets.get(prompt_id)
+        if bucket is None:
+            bucket = self._prompt_buckets[prompt_id] = TokenBucket(self.prompt_rate, clock=self._clock)
+        return bucket
+
+    def _prune(self, prompts: list[QueuedPrompt]) -> None:
+        """Forget prompts with nothing queued whose state is the same as a new prompt's."""
+
+        queued = {p.prompt_id for p in prompts}
+        idle = [p for p, tag in self._tags.items() if p not in queued and tag <= self._virtual_time]
+        for prompt_id in idle:
+            del self._tags[prompt_id]
+        for prompt_id in [p for p, b in self._prompt_buckets.items() if p not in queued and b.full()]:
+            del self._prompt_buckets[prompt_id]
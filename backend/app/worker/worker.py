@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Iterable
+
+from sqlalchemy.orm import Session
+
+from app import blobs, partitions, run_cache
+from app.db import SessionLocal
+from app.settings import settings
+
+from .output import OutputWriter
+from .queue import claim_runs, finish_runs, renew_leases, requeue_expired_runs
+from .runners import Runner, RunJob, RunnerError, RunResult
+from .scheduler import Scheduler
+
+logger = logging.getLogger(__name__)
+
+# How often run_forever evicts expired and surplus run cache entries.
+CACHE_EVICT_INTERVAL_SECONDS = 60.0
+# How often run_forever creates upcoming runs partitions and expires old ones.
+PARTITION_MAINTENANCE_INTERVAL_SECONDS = 3600.0
+# How often run_forever deletes blobs no row points at any more.
+BLOB_SWEEP_INTERVAL_SECONDS = 3600.0
+
+
+class Worker:
+    """Claims queued runs and executes them on a bounded thread pool.
+
+    At most `concurrency` runs are in flight per process; the worker only claims
+    as many runs as it has free slots, so queued work stays available to other
+    worker processes instead of waiting behind a busy one. Which runs it
+    claims is up to the `scheduler` (see app.worker.scheduler): by default
+    fair across prompts, without limits. Its limits (WORKER_MAX_IN_FLIGHT,
+    WORKER_MAX_RUNS_PER_SECOND and their per-prompt twins) are how run starts
+    are capped, at claim time.
+    With `cache_results`, successful outputs go to the run result cache under
+    the runner's name (see app.run_cache). Runners with a `stream` method are
+    streamed, and their output is readable while the run executes (see
+    app.worker.output).
+
+    Claimed runs are leased for `lease_seconds`. The worker renews the
+    leases of its runs in flight a few times per lease, including while
+    run_forever drains after `stop` and while run_once executes its batch.
+    run_forever also sweeps up runs whose lease lapsed (their worker died):
+    they are queued again, or failed after `max_attempts` claims.
+    """
+
+    def __init__(
+        self,
+        runner: Runner,
+        *,
+        concurrency: int,
+        batch_size: int,
+        poll_interval_seconds: float,
+        scheduler: Scheduler | None = None,
+        cache_results: bool = False,
+        lease_seconds: float = settings.worker_lease_seconds,
+        max_attempts: int = settings.worker_max_attempts,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ) -> None:
+        if concurrency < 1 or batch_size < 1:
+            raise ValueError("concurrency and batch_size must be >= 1")
+        if lease_seconds <= 0 or max_attempts < 1:
+            raise ValueError("lease_seconds must be > 0 and max_attempts >= 1")
+        self.runner = runner
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval_seconds = poll_interval_seconds
+        self.scheduler = scheduler if scheduler is not None else Scheduler()
+        self.cache_results = cache_results
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.session_factory = session_factory
+        self.output = OutputWriter(
+            session_factory,
+            flush_bytes=settings.run_output_flush_bytes,
+            flush_seconds=settings.run_output_flush_seconds,
+        )
+
+    def claim(self, limit: int) -> list[RunJob]:
+        with self.session_factory() as db:
+            return claim_runs(db, limit, scheduler=self.scheduler, lease_seconds=self.lease_seconds)
+
+    def execute(self, job: RunJob) -> RunResult:
+        if job.content is None:
+            return RunResult(
+                job.run_id, error=f"prompt version {job.prompt_version} not found", attempt=job.attempt
+            )
+        stream = getattr(self.runner, "stream", None)
+        try:
+            output = self.runner.run(job) if stream is None else self._stream(stream, job)
+        except Exception as e:
+            logger.warning("run %s failed: %s", job.run_id, e)
+            error = str(e) or type(e).__name__
+        else:
+            error = None
+        # Also forgets a claim whose output was discarded, streamed or not.
+        first_token_at = self.output.finish(job.run_id, attempt=job.attempt)
+        if error is not None:
+            return RunResult(job.run_id, error=error, first_token_at=first_token_at, attempt=job.attempt)
+        return RunResult(job.run_id, output=output, first_token_at=first_token_at, attempt=job.attempt)
+
+    def _stream(self, stream: Callable[[RunJob], Iterable[str]], job: RunJob) -> str:
+        chunks = []
+        for chunk in stream(job):
+            if self.output.discarded(job.run_id, attempt=job.attempt):
+                # The lease was lost: another claim runs it now. Stop streaming;
+                # finish_runs would drop the result anyway.
+                raise RunnerError(f"lease on attempt {job.attempt} was lost")
+            chunks.append(chunk)
+            self.output.append(job.run_id, chunk, attempt=job.attempt)
+        return "".join(chunks)
+
+    def finish(self, results: list[RunResult]) -> None:
+        """Write a batch of results back in one transaction."""
+
+        if not results:
+            return
+        cache_runner = self.runner.name if self.cache_results else None
+        with self.session_factory() as db:
+            applied = finish_runs(db, results, cache_runner=cache_runner)
+        if applied < len(results):
+            logger.warning("%d run(s) were no longer running; results dropped", len(results) - applied)
+
+    def run_once(self) -> int:
+        """Claim one batch, execute it to completion and return how many runs ran."""
+
+        jobs = self.claim(min(self.batch_size, self.concurrency))
+        if jobs:
+            done = threading.Event()
+            heartbeat = threading.Thread(
+                target=self._renew_until, args=(jobs, done), name="lease-heartbeat", daemon=True
+            )
+            self.output.start()
+            heartbeat.start()
+            try:
+                with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                    results = list(pool.map(self.execute, jobs))
+            finally:
+                done.set()
+                heartbeat.join()
+                self.output.close()
+            self.finish(results)
+        return len(jobs)
+
+    def _renew_until(self, jobs: list[RunJob], done: threading.Event) -> None:
+        while not done.wait(self.lease_seconds / 3):
+            self.renew_leases(jobs)
+
+    def run_forever(self, stop: threading.Event) -> None:
+        """Poll until `stop` is set, then let in-flight runs finish, renewing their leases.
+
+        Results are written back from this loop rather than from the executor
+        threads: whatever finished since the last pass is flushed together, so
+        under load one commit covers many runs.
+        """
+
+        in_flight: dict[Future[RunResult], RunJob] = {}
+        next_eviction = next_maintenance = next_sweep = next_heartbeat = time.monotonic()
+        self.output.start()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="run") as pool:
+            while not stop.is_set():
+                done = {f for f in in_flight if f.done()}
+                for f in done:
+                    del in_flight[f]
+                self._flush(done)
+
+                if time.monotonic() >= next_heartbeat:
+                    # Three renewals per lease, so one slow round trip does not lose it.
+                    next_heartbeat = time.monotonic() + self.lease_seconds / 3
+                    self.renew_leases(list(in_flight.values()))
+                    self.requeue_expired()
+
+                if self.cache_results and time.monotonic() >= next_eviction:
+                    next_eviction = time.monotonic() + CACHE_EVICT_INTERVAL_SECONDS
+                    self.evict_cache()
+                if time.monotonic() >= next_maintenance:
+                    next_maintenance = time.monotonic() + PARTITION_MAINTENANCE_INTERVAL_SECONDS
+                    self.maintain_partitions()
+                if time.monotonic() >= next_sweep:
+                    next_sweep = time.monotonic() + BLOB_SWEEP_INTERVAL_SECONDS
+                    self.sweep_blobs()
+
+                free = self.concurrency - len(in_flight)
+                jobs: list[RunJob] = []
+                if free:
+                    try:
+                        jobs = self.claim(min(self.batch_size, free))
+                    except Exception:
+                        logger.exception("claiming runs failed")
+                for job in jobs:
+                    in_flight[pool.submit(self.execute, job)] = job
+
+                # A full batch suggests more work is waiting; otherwise back off,
+                # waking early to flush results as runs complete.
+                if free and len(jobs) == min(self.batch_size, free):
+                    continue
+                if in_flight:
+                    wait(in_flight, timeout=self.poll_interval_seconds, return_when=FIRST_COMPLETED)
+                else:
+                    stop.wait(self.poll_interval_seconds)
+
+            # Runs still executing keep their leases while they drain, or a sweep
+            # would take them back and run them a second time.
+            while in_flight:
+                done, _ = wait(in_flight, timeout=self.lease_seconds / 3, return_when=FIRST_COMPLETED)
+                for f in done:
+                    del in_flight[f]
+                self._flush(done)
+                if in_flight and time.monotonic() >= next_heartbeat:
+                    next_heartbeat = time.monotonic() + self.lease_seconds / 3
+                    self.renew_leases(list(in_flight.values()))
+        self.output.close()
+
+    def renew_leases(self, jobs: list[RunJob]) -> None:
+        """Renew the leases of claims in flight; the output of lost ones is discarded."""
+
+        jobs = [job for job in jobs if not self.output.discarded(job.run_id, attempt=job.attempt)]
+        if not jobs:
+            return
+        try:
+            with self.session_factory() as db:
+                lost = renew_leases(db, jobs, self.lease_seconds)
+        except Exception:
+            logger.exception("renewing %d run lease(s) failed", len(jobs))
+            return
+        for job in lost:
+            self.output.discard(job.run_id, attempt=job.attempt)
+        if lost:
+            logger.warning("%d run(s) were taken back after their lease lapsed", len(lost))
+
+    def requeue_expired(self) -> None:
+        """Requeue (or fail, after max_attempts) runs whose worker stopped renewing their lease."""
+
+        try:
+            with self.session_factory() as db:
+                requeued, failed = requeue_expired_runs(db, max_attempts=self.max_attempts)
+        except Exception:
+            logger.exception("requeueing runs with expired leases failed")
+            return
+        if requeued or failed:
+            logger.warning("runs with expired leases: %d requeued, %d failed", requeued, failed)
+
+    def evict_cache(self) -> None:
+        try:
+            with self.session_factory() as db:
+                evicted = run_cache.evict(db)
+        except Exception:
+            logger.exception("evicting run cache entries failed")
+            return
+        if evicted:
+            logger.info("evicted %d run cache entries", evicted)
+
+    def maintain_partitions(self) -> None:
+        try:
+            with self.session_factory() as db:
+                created, dropped = partitions.maintain(db)
+        except Exception:
+            logger.exception("maintaining runs partitions failed")
+            return
+        if created or dropped:
+            logger.info("runs partitions created: %s; dropped: %s", created, dropped)
+
+    def sweep_blobs(self) -> None:
+        try:
+            with self.session_factory() as db:
+                deleted = blobs.sweep(db)
+        except Exception:
+            logger.exception("sweeping unreferenced blobs failed")
+            return
+        if deleted:
+            logger.info("deleted %d unreferenced blob(s)", deleted)
+
+    def _flush(self, done: set[Future[RunResult]]) -> None:
+        try:
+            self.finish([f.result() for f in done])
+        except Exception:
+            logger.exception("recording %d run result(s) failed", len(done))
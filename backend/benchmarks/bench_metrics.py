@@ -0,0 +1,87 @@
+"""Benchmark the vectorized metrics (app.metrics) on synthetic eval columns.
+
+Generates N (output, expected) pairs shaped like short-answer eval results
+(1-12 word answers over a 20k-word vocabulary, ~30% exact hits, some numeric
+answers), then times `score()` for each metric and reports rows/s. With
+--baseline, also times a straightforward per-row Python token F1 (Counter
+intersection per pair) on the same input for comparison. No database needed:
+
+    cd backend
+    python benchmarks/bench_metrics.py --rows 1000000 --baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import string
+import time
+from collections import Counter
+
+from app.metrics import METRICS, score
+
+PARAMS = {"regex": {"pattern": r"\b(?:yes|no)\b", "ignore_case": True}}
+
+
+def make_columns(n: int, seed: int = 0) -> tuple[list[str], list[str]]:
+    rng = random.Random(seed)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 8))) for _ in range(20_000)]
+    expected, outputs = [], []
+    for i in range(n):
+        if i % 10 == 0:
+            answer = f"{rng.randint(0, 10_000):,}"
+        else:
+            answer = " ".join(rng.choices(words, k=rng.randint(1, 12)))
+        expected.append(answer)
+        roll = rng.random()
+        if roll < 0.3:
+            outputs.append(answer)
+        elif roll < 0.5:
+            outputs.append(f"The answer is {answer.capitalize()}.")
+        else:
+            outputs.append(" ".join(rng.choices(words, k=rng.randint(1, 12))))
+    return outputs, expected
+
+
+def per_row_token_f1(outputs: list[str], expected: list[str]) -> list[float]:
+    table = str.maketrans("", "", string.punctuation)
+    articles = {"a", "an", "the"}
+    scores = []
+    for o, e in zip(outputs, expected):
+        out = [t for t in o.lower().translate(table).split() if t not in articles]
+        exp = [t for t in e.lower().translate(table).split() if t not in articles]
+        if not out or not exp:
+            scores.append(float(out == exp))
+            continue
+        common = sum((Counter(out) & Counter(exp)).values())
+        scores.append(2 * common / (len(out) + len(exp)))
+    return scores
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--metrics", nargs="+", default=list(METRICS), choices=list(METRICS))
+    parser.add_argument("--baseline", action="store_true", help="also time a per-row Python token F1")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    outputs, expected = make_columns(args.rows)
+    print(f"generated {args.rows} rows in {time.perf_counter() - t0:.1f}s\n")
+    print(f"{'metric':<18} {'seconds':>8} {'rows/s':>12} {'mean':>7}")
+
+    for name in args.metrics:
+        t0 = time.perf_counter()
+        scores = score(name, outputs, expected, PARAMS.get(name))
+        elapsed = time.perf_counter() - t0
+        print(f"{name:<18} {elapsed:8.2f} {args.rows / elapsed:12,.0f} {scores.mean():7.3f}")
+
+    if args.baseline:
+        t0 = time.perf_counter()
+        per_row_token_f1(outputs, expected)
+        elapsed = time.perf_counter() - t0
+        print(f"{'token_f1 per-row':<18} {elapsed:8.2f} {args.rows / elapsed:12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
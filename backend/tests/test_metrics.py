@@ -0,0 +1,158 @@
+import random
+import string
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from app.metrics import METRICS, MetricError, compare_paired, score, summarize
+
+_ARTICLES = {"a", "an", "the"}
+
+
+def _squad(text: str) -> list[str]:
+    text = text.lower().translate(str.maketrans("", "", string.punctuation))
+    return [t for t in text.split() if t not in _ARTICLES]
+
+
+def _words(text: str) -> list[str]:
+    return text.lower().translate(str.maketrans(string.punctuation, " " * len(string.punctuation))).split()
+
+
+def _grams(tokens: list[str], n: int) -> Counter:
+    return Counter(tuple(tokens[i : i + n]) for i in range(len(tokens) - n + 1))
+
+
+def _f1(out: Counter, exp: Counter) -> float:
+    total = sum(out.values()) + sum(exp.values())
+    return 2 * sum((out & exp).values()) / total if total else 0.0
+
+
+def _token_f1(o: str, e: str) -> float:
+    out, exp = _squad(o), _squad(e)
+    if not out or not exp:
+        return float(out == exp)
+    return _f1(Counter(out), Counter(exp))
+
+
+def _bleu(o: str, e: str) -> float:
+    out, exp = _words(o), _words(e)
+    log_p = 0.0
+    for n in range(1, 5):
+        matches = sum((_grams(out, n) & _grams(exp, n)).values())
+        candidates = max(len(out) - n + 1, 0)
+        if n == 1:
+            if matches == 0:
+                return 0.0
+            log_p += np.log(matches / candidates)
+        else:
+            log_p += np.log((matches + 1) / (candidates + 1))
+    return float(np.exp(min(0.0, 1 - len(exp) / len(out)) + log_p / 4))
+
+
+def _corpus(n: int, seed: int = 7) -> tuple[list[str], list[str]]:
+    rng = random.Random(seed)
+    vocab = ["the", "a", "cat", "Cat", "sat", "mat", "on", "don't", "42", "x-ray", "dog,", "ran."]
+    expected = [" ".join(rng.choices(vocab, k=rng.randint(0, 8))) for _ in range(n)]
+    outputs = [
+        e if rng.random() < 0.2 else " ".join(rng.choices(vocab, k=rng.randint(0, 8))) for e in expected
+    ]
+    return outputs, expected
+
+
+REFERENCE = {
+    "exact_match": lambda o, e: float(o.strip() == e.strip()),
+    "normalized_match": lambda o, e: float(_squad(o) == _squad(e)),
+    "token_f1": _token_f1,
+    "rouge1": lambda o, e: _f1(_grams(_words(o), 1), _grams(_words(e), 1)),
+    "rouge2": lambda o, e: _f1(_grams(_words(o), 2), _grams(_words(e), 2)),
+    "bleu": _bleu,
+}
+
+
+@pytest.mark.parametrize("name", sorted(REFERENCE))
+def test_vectorized_metrics_match_per_row_reference(name):
+    outputs, expected = _corpus(2000)
+    want = [REFERENCE[name](o, e) for o, e in zip(outputs, expected)]
+    np.testing.assert_allclose(score(name, outputs, expected), want)
+
+
+def test_known_values():
+    outputs = ["The cat sat on the mat.", "It is 1,234.5 dollars", None, "Answer: 12"]
+    expected = ["the cat sat on a mat", 1234.5, "x", "12"]
+
+    assert score("normalized_match", outputs, expected).tolist() == [1.0, 0.0, 0.0, 0.0]
+    assert score("numeric", outputs, expected).tolist() == [0.0, 1.0, 0.0, 1.0]
+    assert score("numeric", ["3.1"], [3], {"abs_tol": 0.2}).tolist() == [1.0]
+    assert score("bleu", outputs[:1], expected[:1])[0] == pytest.approx(0.6389, abs=1e-4)
+    # A missing output (failed run) scores 0 even against an empty expected value.
+    assert score("exact_match", [None, ""], ["", ""]).tolist() == [0.0, 1.0]
+
+
+def test_regex():
+    outputs = ["Paris is the capital", "no idea", "PARIS"]
+    params = {"pattern": "paris", "ignore_case": True}
+    assert score("regex", outputs, [None] * 3, params).tolist() == [1, 0, 1]
+    # Without a pattern, each item's expected value is the pattern.
+    assert score("regex", outputs, ["^Paris", "idea$", "^paris$"]).tolist() == [1, 1, 0]
+    with pytest.raises(MetricError, match="invalid pattern"):
+        score("regex", outputs, ["("] * 3)
+
+
+def test_rejects_unknown_metrics_and_params():
+    with pytest.raises(MetricError, match="unknown metric"):
+        score("meteor", ["a"], ["a"])
+    with pytest.raises(MetricError, match="unknown parameter"):
+        score("token_f1", ["a"], ["a"], {"pattern": "a"})
+    with pytest.raises(MetricError, match="same length"):
+        score("exact_match", ["a"], [])
+    assert set(METRICS) >= set(REFERENCE) | {"regex", "numeric"}
+
+
+def test_summarize():
+    assert summarize(np.array([1.0, 0.0, 0.5, 0.5])) == {
+        "count": 4,
+        "mean": 0.5,
+        "stddev": pytest.approx(0.4082, abs=1e-4),
+        "min": 0.0,
+        "max": 1.0,
+    }
+    assert summarize(np.array([]))["count"] == 0
+
+
+def test_nul_bytes_do_not_shift_rows():
+    outputs = ["a\x00b", "c"]
+    assert score("token_f1", outputs, ["ab", "c"]).tolist() == [1.0, 1.0]
+
+
+def test_compare_paired():
+    rng = np.random.default_rng(3)
+    baseline = rng.random(5000)
+
+    same = compare_paired(baseline, baseline.copy())
+    assert (same.delta, same.ci_low, same.ci_high, same.p_value) == (0.0, 0.0, 0.0, 1.0)
+
+    # A small drop on continuous scores: the interval brackets it and excludes 0.
+    candidate = np.clip(baseline - 0.05 + rng.normal(0, 0.1, 5000), 0, 1)
+    result = compare_paired(candidate, baseline)
+    assert result.n == 5000
+    assert result.delta == pytest.approx(candidate.mean() - baseline.mean())
+    assert result.ci_low < result.delta < result.ci_high < 0
+    assert result.p_value < 0.001
+    assert compare_paired(candidate, baseline) == result
+
+    # Bootstrap interval agrees with a naive index-resampling bootstrap.
+    deltas = candidate - baseline
+    naive = deltas[rng.integers(0, 5000, size=(2000, 5000))].mean(axis=1)
+    low, high = np.quantile(naive, [0.025, 0.975])
+    assert result.ci_low == pytest.approx(low, abs=5e-4)
+    assert result.ci_high == pytest.approx(high, abs=5e-4)
+
+    # 0/1 metric with as many wins as losses: no evidence of a difference.
+    hits = np.tile([1.0, 0.0, 1.0, 0.0], 250)
+    flipped = np.tile([0.0, 1.0, 1.0, 0.0], 250)
+    assert compare_paired(flipped, hits).p_value > 0.5
+
+    assert compare_paired(np.array([]), np.array([])).p_value == 1.0
+    with pytest.raises(ValueError, match="paired"):
+        compare_paired(np.zeros(3), np.zeros(4))
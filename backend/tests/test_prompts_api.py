@@ -1,4 +1,5 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # IMPORTANT: app.db creates its engine at import-time based on DATABASE_URL.
 # Ensure tests can point at CI's postgres before importing the app.
@@ -10,6 +11,7 @@ os.environ.setdefault(
 from fastapi.testclient import TestClient
 from sqlalchemy import text
 
+from app.cache import prompt_resolve_cache
 from app.db import engine
 from app.main import app
 
@@ -18,6 +20,8 @@ def _reset_db():
     # Keep it simple: truncate known tables (CASCADE handles FK ordering).
     with engine.begin() as conn:
         conn.execute(text("TRUNCATE TABLE runs, prompt_versions, prompts CASCADE"))
+    # The resolve cache is invalidated by API writes, not by raw TRUNCATEs.
+    prompt_resolve_cache.clear()
 
 
 def test_prompt_crud_happy_path():
@@ -144,3 +148,194 @@ def test_list_prompts_search_and_pagination():
     assert len(r1.json()) == 2
     assert len(r2.json()) == 2
     assert {p["name"] for p in r1.json()}.isdisjoint({p["name"] for p in r2.json()})
+
+    # Cursor pagination yields the same pages as offset when nothing changes.
+    cursor = r1.headers["x-next-cursor"]
+    r3 = client.get("/api/prompts", params={"limit": 2, "cursor": cursor})
+    assert r3.status_code == 200
+    assert [p["id"] for p in r3.json()] == [p["id"] for p in r2.json()]
+    assert "x-next-cursor" not in r3.headers
+
+
+def test_resolve_by_name_is_cached_and_invalidated_on_activate():
+    _reset_db()
+    client = TestClient(app)
+
+    r = client.post(
+        "/api/prompts",
+        json={"name": "cached", "tags": ["x"], "content": "v1", "parameters": None},
+    )
+    assert r.status_code == 201, r.text
+    prompt_id = r.json()["id"]
+
+    r = client.post(f"/api/prompts/{prompt_id}/versions", json={"content": "v2"})
+    assert r.status_code == 201, r.text
+
+    before = prompt_resolve_cache.snapshot()
+    r1 = client.get("/api/prompts/by-name/cached")
+    r2 = client.get("/api/prompts/by-name/cached")
+    assert r1.status_code == 200 and r2.status_code == 200
+    assert r1.json() == r2.json()
+    assert r1.json()["active"]["content"] == "v1"
+    assert r1.json()["tags"] == ["x"]
+
+    after = prompt_resolve_cache.snapshot()
+    assert after["misses"] == before["misses"] + 1
+    assert after["hits"] == before["hits"] + 1
+
+    r = client.post(f"/api/prompts/{prompt_id}/activate", json={"version": 2})
+    assert r.status_code == 200, r.text
+
+    r = client.get("/api/prompts/by-name/cached")
+    assert r.status_code == 200
+    assert r.json()["active_version"] == 2
+    assert r.json()["active"]["content"] == "v2"
+
+    r = client.patch(f"/api/prompts/{prompt_id}", json={"description": "new", "tags": []})
+    assert r.status_code == 200
+    r = client.get("/api/prompts/by-name/cached")
+    assert r.json()["description"] == "new"
+    assert r.json()["tags"] == []
+
+    r = client.delete(f"/api/prompts/{prompt_id}")
+    assert r.status_code == 204
+    r = client.get("/api/prompts/by-name/cached")
+    assert r.status_code == 404
+
+    r = client.get("/api/prompts/cache/stats")
+    assert r.status_code == 200
+    assert r.json()["invalidations"] >= 3
+
+
+def test_conditional_get_returns_304_until_prompt_changes():
+    _reset_db()
+    client = TestClient(app)
+
+    r = client.post("/api/prompts", json={"name": "etagged", "content": "v1", "parameters": None})
+    assert r.status_code == 201, r.text
+    prompt_id = r.json()["id"]
+
+    r = client.get(f"/api/prompts/{prompt_id}")
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+
+    r = client.get(f"/api/prompts/{prompt_id}", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["etag"] == etag
+
+    # A new version changes max(version) and therefore the detail ETag.
+    r = client.post(f"/api/prompts/{prompt_id}/versions", json={"content": "v2"})
+    assert r.status_code == 201
+    r = client.get(f"/api/prompts/{prompt_id}", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+
+    # Resolve ETags are served from the cache on repeat polls.
+    r = client.get("/api/prompts/by-name/etagged")
+    assert r.status_code == 200
+    resolved_etag = r.headers["etag"]
+    r = client.get("/api/prompts/by-name/etagged", headers={"If-None-Match": f'W/{resolved_etag}'})
+    assert r.status_code == 304
+
+    r = client.patch(f"/api/prompts/{prompt_id}", json={"description": "changed"})
+    assert r.status_code == 200
+    r = client.get("/api/prompts/by-name/etagged", headers={"If-None-Match": resolved_etag})
+    assert r.status_code == 200
+    assert r.json()["description"] == "changed"
+
+
+def test_bulk_resolve_returns_active_versions_in_request_order():
+    _reset_db()
+    client = TestClient(app)
+
+    ids = {}
+    for name in ["a", "b", "c"]:
+        r = client.post(
+            "/api/prompts",
+            json={"name": name, "tags": [f"t-{name}"], "content": f"{name} v1", "parameters": None},
+        )
+        assert r.status_code == 201, r.text
+        ids[name] = r.json()["id"]
+
+    r = client.post(f"/api/prompts/{ids['b']}/versions", json={"content": "b v2"})
+    assert r.status_code == 201
+    r = client.post(f"/api/prompts/{ids['b']}/activate", json={"version": 2})
+    assert r.status_code == 200
+
+    r = client.post("/api/prompts/resolve", json={"names": ["c", "missing", "b", "c"]})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert [p["name"] for p in body["prompts"]] == ["c", "b"]
+    assert body["missing"] == ["missing"]
+    assert body["prompts"][1]["active"]["content"] == "b v2"
+    assert body["prompts"][1]["tags"] == ["t-b"]
+
+    # Bulk resolution warms the by-name cache.
+    before = prompt_resolve_cache.snapshot()
+    r = client.get("/api/prompts/by-name/b")
+    assert r.json() == body["prompts"][1]
+    assert prompt_resolve_cache.snapshot()["hits"] == before["hits"] + 1
+
+    r = client.post("/api/prompts/resolve", json={"names": []})
+    assert r.status_code == 422
+
+
+def test_concurrent_version_creation_allocates_sequential_versions():
+    _reset_db()
+    client = TestClient(app)
+
+    r = client.post("/api/prompts", json={"name": "busy", "content": "v1", "parameters": None})
+    assert r.status_code == 201, r.text
+    prompt_id = r.json()["id"]
+
+    def create(i: int) -> int:
+        r = TestClient(app).post(f"/api/prompts/{prompt_id}/versions", json={"content": f"c{i}"})
+        assert r.status_code == 201, r.text
+        return r.json()["version"]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        versions = sorted(pool.map(create, range(8)))
+    assert versions == list(range(2, 10))
+
+    r = client.get("/api/prompts")
+    assert r.json()[0]["latest_version"]["version"] == 9
+
+    r = client.post("/api/prompts/00000000-0000-0000-0000-000000000000/versions", json={"content": "x"})
+    assert r.status_code == 404
+
+
+def test_list_prompts_fulltext_search_ranks_and_searches_content():
+    _reset_db()
+    client = TestClient(app)
+
+    prompts = [
+        ("support_reply", "Replies to customer support tickets", "Be kind and concise."),
+        ("summarizer", "Summarize long documents", "Write a short summary of the refund policy."),
+        ("translator", "Translate support macros", "Translate to French."),
+    ]
+    for name, description, content in prompts:
+        r = client.post(
+            "/api/prompts",
+            json={"name": name, "description": description, "tags": ["prod"], "content": content},
+        )
+        assert r.status_code == 201, r.text
+
+    # Stemmed word match across name/description; the name hit ranks first.
+    r = client.get("/api/prompts", params={"q": "supporting", "search_mode": "fulltext"})
+    assert r.status_code == 200, r.text
+    assert [p["name"] for p in r.json()] == ["support_reply", "translator"]
+
+    # Trigram similarity catches a typo in the name.
+    r = client.get("/api/prompts", params={"q": "sumarizer", "search_mode": "fulltext"})
+    assert [p["name"] for p in r.json()] == ["summarizer"]
+
+    # Content is only searched on request, and combines with the tag filter.
+    params = {"q": "refunds", "search_mode": "fulltext", "tag": "prod"}
+    r = client.get("/api/prompts", params=params)
+    assert r.json() == []
+    r = client.get("/api/prompts", params={**params, "search_content": "true"})
+    assert [p["name"] for p in r.json()] == ["summarizer"]
+
+    r = client.get("/api/prompts", params={"q": "support", "search_mode": "fulltext", "cursor": "x"})
+    assert r.status_code == 422
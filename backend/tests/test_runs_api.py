@@ -1,3 +1,5 @@
+import gzip
+import json
 import os
 
 # IMPORTANT: app.db creates its engine at import-time based on DATABASE_URL.
@@ -12,6 +14,7 @@ from sqlalchemy import text
 
 from app.db import engine
 from app.main import app
+from app.schemas.run import RunOut
 
 
 def _reset_db():
@@ -64,3 +67,130 @@ def test_create_run_unknown_prompt_is_404():
 
     r = client.post("/api/runs", json={"prompt_name": "missing", "input": None})
     assert r.status_code == 404
+
+
+def test_list_runs_cursor_pagination_walks_every_row_once():
+    _reset_db()
+    client = TestClient(app)
+
+    r = client.post("/api/prompts", json={"name": "paged", "content": "Hello", "parameters": None})
+    assert r.status_code == 201, r.text
+
+    created = set()
+    for i in range(7):
+        r = client.post("/api/runs", json={"prompt_name": "paged", "input": {"i": i}})
+        assert r.status_code == 201
+        created.add(r.json()["id"])
+
+    seen: list[str] = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 3}
+        if cursor is not None:
+            params["cursor"] = cursor
+        r = client.get("/api/runs", params=params)
+        assert r.status_code == 200, r.text
+        seen.extend(run["id"] for run in r.json())
+        pages += 1
+        cursor = r.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert len(seen) == len(set(seen)) == 7
+    assert set(seen) == created
+
+    r = client.get("/api/runs", params={"cursor": "not-a-cursor"})
+    assert r.status_code == 422
+    r = client.get("/api/runs", params={"cursor": cursor or "x", "offset": 3})
+    assert r.status_code == 422
+
+
+def test_bulk_create_runs_reports_per_item_errors():
+    _reset_db()
+    client = TestClient(app)
+
+    for name in ("a", "b"):
+        r = client.post("/api/prompts", json={"name": name, "content": f"prompt {name}"})
+        assert r.status_code == 201, r.text
+
+    r = client.post(
+        "/api/runs/bulk",
+        json={
+            "runs": [
+                {"prompt_name": "a", "input": {"i": 0}},
+                {"prompt_name": "missing", "input": {"i": 1}},
+                {"prompt_name": "b", "input": None},
+                {"prompt_name": "a", "input": {"i": 3}},
+                # Postgres cannot store NUL in jsonb.
+                {"prompt_name": "b", "input": {"i": ["\u0000"]}},
+            ]
+        },
+    )
+    assert r.status_code == 201, r.text
+    body = r.json()
+    assert body["created"] == 3
+    assert [(e["index"], e["detail"]) for e in body["errors"]] == [
+        (1, "prompt not found"),
+        (4, "input strings cannot contain NUL (\\u0000)"),
+    ]
+    assert body["ids"][1] is None and body["ids"][4] is None
+
+    run = client.get(f"/api/runs/{body['ids'][3]}").json()
+    assert run["status"] == "queued"
+    assert run["input"] == {"i": 3}
+    assert client.get(f"/api/runs/{body['ids'][2]}").json()["input"] is None
+
+    # Single prompt, many inputs.
+    r = client.post("/api/runs/bulk", json={"prompt_name": "b", "inputs": [{"n": n} for n in range(250)]})
+    assert r.status_code == 201, r.text
+    assert r.json()["created"] == 250
+    assert len(client.get("/api/runs", params={"limit": 200}).json()) == 200
+
+    # Exactly one of the two forms.
+    r = client.post("/api/runs/bulk", json={"prompt_name": "b"})
+    assert r.status_code == 422
+    r = client.post(
+        "/api/runs/bulk",
+        json={"runs": [{"prompt_name": "a"}], "prompt_name": "a", "inputs": [{}]},
+    )
+    assert r.status_code == 422
+
+
+def test_export_runs_streams_filtered_ndjson():
+    _reset_db()
+    client = TestClient(app)
+
+    for name in ("a", "b"):
+        r = client.post("/api/prompts", json={"name": name, "content": f"prompt {name}"})
+        assert r.status_code == 201, r.text
+    r = client.post(
+        "/api/runs/bulk",
+        json={"runs": [{"prompt_name": "a" if i % 3 else "b", "input": {"i": i}} for i in range(30)]},
+    )
+    assert r.status_code == 201, r.text
+    prompt_b = client.get("/api/prompts/by-name/b").json()["id"]
+
+    r = client.get("/api/runs/export")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert len(lines) == 30
+    assert set(lines[0]) == set(RunOut.model_fields)
+    assert lines == [client.get(f"/api/runs/{line['id']}").json() for line in lines]
+
+    r = client.get("/api/runs/export", params={"prompt_id": prompt_b, "status": "queued"})
+    assert len(r.text.splitlines()) == 10
+    assert client.get("/api/runs/export", params={"status": "failed"}).text == ""
+    assert client.get("/api/runs/export", params={"status": "bogus"}).status_code == 422
+
+    created_at = lines[0]["created_at"]
+    r = client.get("/api/runs/export", params={"created_before": created_at})
+    assert r.text == ""
+    r = client.get("/api/runs/export", params={"created_after": created_at})
+    assert len(r.text.splitlines()) == 30
+
+    r = client.get("/api/runs/export", params={"gzip": "true"})
+    assert r.headers["content-type"] == "application/gzip"
+    assert [json.loads(line) for line in gzip.decompress(r.content).decode().splitlines()] == lines
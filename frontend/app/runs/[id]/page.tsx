@@ -1,6 +1,6 @@
 import Link from 'next/link';
 
-import { getRun } from '@/lib/runsApi';
+import { getRun, runOutputUrl } from '@/lib/runsApi';
 
 function toJsonPretty(obj: unknown): string {
   if (obj == null) return '';
@@ -67,6 +67,11 @@ export default async function RunDetailPage({
         >
           {run.output ?? '—'}
         </pre>
+        {run.output_truncated ? (
+          <p style={{ fontSize: 12 }}>
+            Preview of {run.output_size} bytes. <a href={runOutputUrl(run.id)}>Full output</a>
+          </p>
+        ) : null}
       </section>
 
       <section style={{ marginTop: 16, padding: 12, border: '1px solid #ddd' }}>
@@ -1,5 +1,5 @@
 import { getApiBase } from '@/lib/api';
-import type { Run, RunCreateIn } from '@/lib/types';
+import type { Run, RunCreateIn, RunSummary } from '@/lib/types';
 
 async function readError(res: Response) {
   try {
@@ -14,7 +14,7 @@ export async function listRuns(opts?: {
   prompt_id?: string;
   limit?: number;
   offset?: number;
-}): Promise<Run[]> {
+}): Promise<RunSummary[]> {
   const params = new URLSearchParams();
   if (opts?.prompt_id) params.set('prompt_id', opts.prompt_id);
   if (opts?.limit != null) params.set('limit', String(opts.limit));
@@ -34,6 +34,10 @@ export async function getRun(id: string): Promise<Run> {
   return res.json();
 }
 
+export function runOutputUrl(id: string): string {
+  return `${getApiBase()}/api/runs/${id}/output`;
+}
+
 export async function createRun(payload: RunCreateIn): Promise<Run> {
   const res = await fetch(`${getApiBase()}/api/runs`, {
     method: 'POST',
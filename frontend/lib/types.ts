@@ -16,9 +16,29 @@ export type Run = {
   status: RunStatus;
   input?: Record<string, unknown> | null;
   output?: string | null;
+  output_size?: number | null;
+  // True when `output` is a preview of a larger output in the blob store.
+  output_truncated: boolean;
   error?: string | null;
   created_at: string;
   started_at?: string | null;
+  first_token_at?: string | null;
+  finished_at?: string | null;
+};
+
+export type RunSummary = {
+  id: string;
+  prompt_id: string;
+  prompt_version: number;
+  status: RunStatus;
+  input_preview?: string | null;
+  input_size?: number | null;
+  output_preview?: string | null;
+  output_size?: number | null;
+  error?: string | null;
+  created_at: string;
+  started_at?: string | null;
+  first_token_at?: string | null;
   finished_at?: string | null;
 };
 